@@ -0,0 +1,145 @@
+'''
+Пул соединений с PostgreSQL, живущий между вызовами в тёплом контейнере.
+Файл одинаковый во всех функциях backend: каждая функция деплоится отдельно,
+поэтому модуль лежит рядом с index.py.
+'''
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import psycopg2
+from psycopg2 import extensions, pool
+
+POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', '1'))
+POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '4'))
+# Соединение, простоявшее дольше этого времени, проверяется SELECT 1 перед выдачей
+HEALTH_CHECK_AFTER = float(os.environ.get('DB_HEALTH_CHECK_AFTER', '30'))
+
+_pool: Optional[pool.ThreadedConnectionPool] = None
+_returned_at: Dict[int, float] = {}
+_stats: Dict[str, int] = {
+    'checkouts': 0,
+    'connections_created': 0,
+    'connections_discarded': 0,
+    'health_checks': 0
+}
+
+
+def _get_pool() -> pool.ThreadedConnectionPool:
+    global _pool
+    if _pool is None or _pool.closed:
+        dsn = os.environ.get('DATABASE_URL')
+        if not dsn:
+            raise Exception('DATABASE_URL not configured')
+        _pool = pool.ThreadedConnectionPool(
+            POOL_MIN_SIZE,
+            POOL_MAX_SIZE,
+            dsn,
+            keepalives=1,
+            keepalives_idle=30,
+            keepalives_interval=10,
+            keepalives_count=3
+        )
+        _stats['connections_created'] += POOL_MIN_SIZE
+        for conn in _pool._pool:
+            _returned_at[id(conn)] = time.monotonic()
+    return _pool
+
+
+def _is_healthy(conn: Any) -> bool:
+    if conn.closed:
+        return False
+    if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+        return False
+    returned_at = _returned_at.get(id(conn))
+    if returned_at is not None and time.monotonic() - returned_at < HEALTH_CHECK_AFTER:
+        return True
+    _stats['health_checks'] += 1
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute('SELECT 1')
+        conn.autocommit = False
+        return True
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        return False
+
+
+def _checkout() -> Any:
+    db_pool = _get_pool()
+    for _ in range(POOL_MAX_SIZE + 1):
+        known = len(db_pool._pool) + len(db_pool._used)
+        conn = db_pool.getconn()
+        if len(db_pool._pool) + len(db_pool._used) > known:
+            _stats['connections_created'] += 1
+            _returned_at[id(conn)] = time.monotonic()
+        if _is_healthy(conn):
+            _stats['checkouts'] += 1
+            return conn
+        _discard(db_pool, conn)
+    raise psycopg2.OperationalError('Не удалось получить рабочее соединение с базой данных')
+
+
+def _discard(db_pool: pool.ThreadedConnectionPool, conn: Any) -> None:
+    _returned_at.pop(id(conn), None)
+    _stats['connections_discarded'] += 1
+    db_pool.putconn(conn, close=True)
+
+
+def _checkin(conn: Any, discard_session: bool) -> None:
+    db_pool = _get_pool()
+    if conn.closed:
+        _discard(db_pool, conn)
+        return
+    try:
+        if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+            conn.rollback()
+        if discard_session:
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute('DISCARD ALL')
+        conn.autocommit = False
+        del conn.notices[:]
+        del conn.notifies[:]
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        _discard(db_pool, conn)
+        return
+    _returned_at[id(conn)] = time.monotonic()
+    db_pool.putconn(conn)
+
+
+@contextmanager
+def connection(discard_session: bool = False) -> Iterator[Any]:
+    '''
+    Выдаёт соединение из пула и возвращает его обратно после использования.
+    Незакоммиченная транзакция откатывается. discard_session=True дополнительно
+    сбрасывает сессию (SET, LISTEN, prepared statements) через DISCARD ALL.
+    '''
+    conn = _checkout()
+    try:
+        yield conn
+    finally:
+        _checkin(conn, discard_session)
+
+
+def pool_stats() -> Dict[str, Any]:
+    '''Текущее состояние пула и счётчики с момента старта контейнера'''
+    stats: Dict[str, Any] = dict(_stats)
+    if _pool is not None and not _pool.closed:
+        stats['idle'] = len(_pool._pool)
+        stats['in_use'] = len(_pool._used)
+    else:
+        stats['idle'] = 0
+        stats['in_use'] = 0
+    stats['max_size'] = POOL_MAX_SIZE
+    return stats
+
+
+def content_version(conn: Any, scope: str) -> int:
+    '''Версия области контента из content_versions (catalog, promotions, blog)'''
+    with conn.cursor() as cur:
+        cur.execute('SELECT version FROM content_versions WHERE scope = %s', (scope,))
+        row = cur.fetchone()
+    return row[0] if row else 0
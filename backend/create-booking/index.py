@@ -1,76 +1,171 @@
+import hashlib
 import json
 import os
-from typing import Dict, Any
-from datetime import datetime
-import psycopg2
+from typing import Dict, Any, Optional
 from psycopg2.extras import RealDictCursor
 
+import db
+import ratelimit
+import slots
+from runtime import DEFAULT_ALLOW_HEADERS, Router, HttpError, Response, header, json_body, query_params
+
+router = Router(allow_headers=f'{DEFAULT_ALLOW_HEADERS}, Idempotency-Key', default_method='POST')
+
+IDEMPOTENCY_SCOPE = 'create-booking'
+IDEMPOTENCY_TTL_HOURS = int(os.environ.get('IDEMPOTENCY_TTL_HOURS', '24'))
+
+# 5 заявок подряд с одного IP, дальше одна в 2 минуты; на номер телефона — 3 подряд, дальше одна в 20 минут
+IP_LIMIT = ratelimit.RateLimit('create-booking:ip', capacity=5, refill_per_second=1 / 120)
+PHONE_LIMIT = ratelimit.RateLimit('create-booking:phone', capacity=3, refill_per_second=1 / 1200)
+
+DEFAULT_AVAILABILITY_DAYS = 14
+MAX_AVAILABILITY_DAYS = 31
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
-    Business: Save customer booking request to database
-    Args: event with httpMethod, body containing booking data
-    Returns: HTTP response with booking confirmation
+    Business: Save customer booking request to database, reserving the chosen time slots; GET lists free start times
+    Args: event with httpMethod, body containing booking data; optional Idempotency-Key header or idempotency_key field; GET queryStringParameters: service, days
+    Returns: HTTP response with booking confirmation (409 if the time is taken); a retry with the same key returns the original booking; GET returns free times by day
+    '''
+    return router(event, context)
+
+def idempotency_key(event: Dict[str, Any], body_data: Dict[str, Any]) -> Optional[str]:
+    key = (header(event, 'Idempotency-Key') or str(body_data.get('idempotency_key') or '')).strip()
+    if not key:
+        return None
+    if len(key) > 255:
+        raise HttpError(400, 'Idempotency-Key длиннее 255 символов')
+    return key
+
+def find_idempotent_booking(cur: Any, key: str, request_hash: str) -> Optional[Dict[str, Any]]:
+    '''
+    Заявка, уже созданная по действующему ключу, — до лимитов частоты, чтобы
+    повтор запроса не тратил токены. Ключ, занятый незавершённой транзакцией,
+    здесь не виден: такой повтор дождётся её в claim_idempotency_key.
+    '''
+    cur.execute(
+        """
+        SELECT k.request_hash, b.id, b.created_at
+        FROM idempotency_keys k
+        JOIN bookings b ON b.id = k.booking_id
+        WHERE k.scope = %s AND k.idempotency_key = %s AND k.expires_at >= CURRENT_TIMESTAMP
+        """,
+        (IDEMPOTENCY_SCOPE, key)
+    )
+    existing = cur.fetchone()
+    if existing and existing['request_hash'] != request_hash:
+        raise HttpError(422, 'Idempotency-Key уже использован с другими данными заявки')
+    return existing
+
+def replay(existing: Dict[str, Any]) -> Response:
+    return Response({
+        'success': True,
+        'booking_id': existing['id'],
+        'created_at': existing['created_at'],
+        'message': 'Заявка успешно создана'
+    }, headers={'Idempotent-Replayed': 'true'})
+
+def claim_idempotency_key(cur: Any, key: str, request_hash: str) -> Optional[Dict[str, Any]]:
+    '''
+    Занимает ключ в текущей транзакции. Возвращает None, если ключ наш и заявку
+    нужно создать, иначе — ранее созданную заявку. Конкурентный запрос с тем же
+    ключом ждёт на уникальном индексе, пока первая транзакция не завершится.
     '''
-    method: str = event.get('httpMethod', 'POST')
+    cur.execute(
+        """
+        INSERT INTO idempotency_keys (scope, idempotency_key, request_hash, expires_at)
+        VALUES (%s, %s, %s, CURRENT_TIMESTAMP + %s * interval '1 hour')
+        ON CONFLICT (scope, idempotency_key) DO UPDATE
+        SET request_hash = EXCLUDED.request_hash,
+            booking_id = NULL,
+            created_at = CURRENT_TIMESTAMP,
+            expires_at = EXCLUDED.expires_at
+        WHERE idempotency_keys.expires_at < CURRENT_TIMESTAMP
+        RETURNING idempotency_key
+        """,
+        (IDEMPOTENCY_SCOPE, key, request_hash, IDEMPOTENCY_TTL_HOURS)
+    )
+    if cur.fetchone():
+        return None
+
+    cur.execute(
+        """
+        SELECT k.request_hash, b.id, b.created_at
+        FROM idempotency_keys k
+        LEFT JOIN bookings b ON b.id = k.booking_id
+        WHERE k.scope = %s AND k.idempotency_key = %s
+        """,
+        (IDEMPOTENCY_SCOPE, key)
+    )
+    existing = cur.fetchone()
+    if existing['request_hash'] != request_hash:
+        raise HttpError(422, 'Idempotency-Key уже использован с другими данными заявки')
+    return existing
+
+@router.get
+def list_availability(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    params = query_params(event)
+    try:
+        days = int(params.get('days') or DEFAULT_AVAILABILITY_DAYS)
+    except ValueError:
+        raise HttpError(400, 'days должен быть числом')
+    days = max(1, min(days, MAX_AVAILABILITY_DAYS))
+
+    with db.connection() as conn:
+        slots_needed = slots.duration_slots(conn, params.get('service', ''))
+        return slots.availability(conn, days, slots_needed)
+
+@router.post
+def create_booking(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    body_data = json_body(event)
     
-    # Handle CORS OPTIONS request
-    if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-User-Id, X-Auth-Token, X-Session-Id',
-                'Access-Control-Max-Age': '86400'
-            },
-            'body': ''
-        }
+    # Extract booking data
+    customer_name = body_data.get('name', '').strip()
+    customer_phone = body_data.get('phone', '').strip()
+    customer_email = body_data.get('email', '').strip()
+    service_type = body_data.get('service', '').strip()
+    car_brand = body_data.get('brand', '').strip()
+    car_model = body_data.get('model', '').strip()
+    preferred_date = body_data.get('date', '').strip()
+    preferred_time = body_data.get('time', '').strip()
+    comment = body_data.get('comment', '').strip()
     
-    if method != 'POST':
-        return {
-            'statusCode': 405,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Method not allowed'})
-        }
+    # Validation
+    if not customer_name or not customer_phone:
+        raise HttpError(400, 'Имя и телефон обязательны для заполнения')
     
-    try:
-        # Parse request body
-        body_data = json.loads(event.get('body', '{}'))
-        
-        # Extract booking data
-        customer_name = body_data.get('name', '').strip()
-        customer_phone = body_data.get('phone', '').strip()
-        customer_email = body_data.get('email', '').strip()
-        service_type = body_data.get('service', '').strip()
-        car_brand = body_data.get('brand', '').strip()
-        car_model = body_data.get('model', '').strip()
-        preferred_date = body_data.get('date', '').strip()
-        preferred_time = body_data.get('time', '').strip()
-        comment = body_data.get('comment', '').strip()
-        
-        # Validation
-        if not customer_name or not customer_phone:
-            return {
-                'statusCode': 400,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'error': 'Имя и телефон обязательны для заполнения'
-                })
-            }
-        
-        # Connect to database
-        dsn = os.environ.get('DATABASE_URL')
-        if not dsn:
-            raise Exception('DATABASE_URL not configured')
-        
-        conn = psycopg2.connect(dsn)
+    key = idempotency_key(event, body_data)
+    fields = (customer_name, customer_phone, customer_email, service_type,
+              car_brand, car_model, preferred_date, preferred_time, comment)
+    request_hash = hashlib.sha256(json.dumps(fields, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    with db.connection() as conn:
         cur = conn.cursor(cursor_factory=RealDictCursor)
+
+        # Повтор уже выполненного запроса отвечает исходной заявкой и лимиты не тратит
+        if key:
+            existing = find_idempotent_booking(cur, key, request_hash)
+            conn.rollback()
+            if existing:
+                cur.close()
+                return replay(existing)
+
+        ratelimit.enforce(conn, IP_LIMIT, ratelimit.client_ip(event))
+        ratelimit.enforce(conn, PHONE_LIMIT, ''.join(ch for ch in customer_phone if ch.isdigit()) or customer_phone)
+
+        if key:
+            existing = claim_idempotency_key(cur, key, request_hash)
+            if existing:
+                conn.rollback()
+                cur.close()
+                return replay(existing)
+
+        # Слоты блокируются до вставки: параллельные заявки на то же время
+        # выстраиваются в очередь на строках booking_slots и не превышают ёмкость
+        slot_ids = None
+        requested = slots.requested_slot(preferred_date, preferred_time)
+        if requested:
+            slot_ids = slots.lock(conn, *requested, slots.duration_slots(conn, service_type))
         
         # Insert booking
         cur.execute(
@@ -86,43 +181,55 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         )
         
         result = cur.fetchone()
-        booking_id = result['id']
-        created_at = result['created_at'].isoformat() if result['created_at'] else None
-        
+
+        if slot_ids:
+            slots.attach(conn, result['id'], slot_ids)
+
+        # Уведомление уйдёт из outbox воркером notify-bookings-cron
+        cur.execute(
+            """
+            INSERT INTO booking_outbox (booking_id, event, payload)
+            VALUES (%s, 'booking.created', %s)
+            """,
+            (result['id'], json.dumps({
+                'name': customer_name,
+                'phone': customer_phone,
+                'email': customer_email,
+                'service': service_type,
+                'brand': car_brand,
+                'model': car_model,
+                'date': preferred_date,
+                'time': preferred_time,
+                'comment': comment
+            }, ensure_ascii=False))
+        )
+
+        if key:
+            cur.execute(
+                """
+                UPDATE idempotency_keys SET booking_id = %s
+                WHERE scope = %s AND idempotency_key = %s
+                """,
+                (result['id'], IDEMPOTENCY_SCOPE, key)
+            )
+            # Попутно чистим немного просроченных ключей
+            cur.execute(
+                """
+                DELETE FROM idempotency_keys
+                WHERE ctid IN (
+                    SELECT ctid FROM idempotency_keys
+                    WHERE expires_at < CURRENT_TIMESTAMP
+                    LIMIT 100
+                )
+                """
+            )
+
         conn.commit()
         cur.close()
-        conn.close()
-        
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'isBase64Encoded': False,
-            'body': json.dumps({
-                'success': True,
-                'booking_id': booking_id,
-                'created_at': created_at,
-                'message': 'Заявка успешно создана'
-            })
-        }
-        
-    except json.JSONDecodeError:
-        return {
-            'statusCode': 400,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Неверный формат данных'})
-        }
-    except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': f'Ошибка сервера: {str(e)}'})
-        }
+    
+    return {
+        'success': True,
+        'booking_id': result['id'],
+        'created_at': result['created_at'],
+        'message': 'Заявка успешно создана'
+    }
@@ -1,53 +1,27 @@
 import json
 import os
-import psycopg2
 from typing import Dict, Any, List
 from datetime import datetime
 import urllib.request
 import urllib.parse
 
+import db
+from runtime import Router, HttpError
+
+router = Router(allow_headers='Content-Type')
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
     Синхронизация отзывов с 2ГИС API
     GET - получить список отзывов из базы
     POST - синхронизировать отзывы с 2ГИС
     '''
-    
-    method: str = event.get('httpMethod', 'GET')
-    
-    if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type',
-                'Access-Control-Max-Age': '86400'
-            },
-            'body': '',
-            'isBase64Encoded': False
-        }
-    
-    if method == 'GET':
-        return get_reviews_from_db()
-    elif method == 'POST':
-        return sync_reviews_from_dgis()
-    else:
-        return {
-            'statusCode': 405,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Method not allowed'}),
-            'isBase64Encoded': False
-        }
+    return router(event, context)
 
-def get_reviews_from_db() -> Dict[str, Any]:
+@router.get
+def get_reviews_from_db(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''Получить отзывы из базы данных'''
-    conn = None
-    try:
-        conn = psycopg2.connect(os.environ['DATABASE_URL'])
+    with db.connection() as conn:
         cur = conn.cursor()
         
         cur.execute('''
@@ -56,93 +30,51 @@ def get_reviews_from_db() -> Dict[str, Any]:
             WHERE is_visible = TRUE
             ORDER BY review_date DESC
         ''')
-        
-        reviews = []
-        for row in cur.fetchall():
-            review_date = row[3]
-            formatted_date = review_date.strftime('%d.%m.%Y') if review_date else ''
-            
-            reviews.append({
-                'id': row[0],
-                'name': row[1],
-                'rating': row[2],
-                'date': formatted_date,
-                'text': row[4],
-                'service': row[5],
-                'source': row[6] if row[6] else 'manual',
-                'source_id': row[7]
-            })
-        
+        rows = cur.fetchall()
         cur.close()
+    
+    reviews = []
+    for row in rows:
+        review_date = row[3]
+        formatted_date = review_date.strftime('%d.%m.%Y') if review_date else ''
         
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'reviews': reviews, 'count': len(reviews)}, ensure_ascii=False),
-            'isBase64Encoded': False
-        }
-    except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': str(e)}, ensure_ascii=False),
-            'isBase64Encoded': False
-        }
-    finally:
-        if conn:
-            conn.close()
+        reviews.append({
+            'id': row[0],
+            'name': row[1],
+            'rating': row[2],
+            'date': formatted_date,
+            'text': row[4],
+            'service': row[5],
+            'source': row[6] if row[6] else 'manual',
+            'source_id': row[7]
+        })
+    
+    return {'reviews': reviews, 'count': len(reviews)}
 
-def sync_reviews_from_dgis() -> Dict[str, Any]:
+@router.post
+def sync_reviews_from_dgis(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''Синхронизировать отзывы с 2ГИС API'''
     api_key = os.environ.get('DGIS_API_KEY')
     org_id = os.environ.get('DGIS_ORG_ID')
     
     if not api_key:
-        return {
-            'statusCode': 400,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'error': 'DGIS_API_KEY не настроен',
-                'message': 'Добавьте API ключ 2ГИС в секреты проекта'
-            }, ensure_ascii=False),
-            'isBase64Encoded': False
-        }
+        raise HttpError(400, 'DGIS_API_KEY не настроен',
+                        message='Добавьте API ключ 2ГИС в секреты проекта')
     
     if not org_id:
-        return {
-            'statusCode': 400,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'error': 'DGIS_ORG_ID не настроен',
-                'message': 'Добавьте ID организации 2ГИС в секреты проекта'
-            }, ensure_ascii=False),
-            'isBase64Encoded': False
-        }
+        raise HttpError(400, 'DGIS_ORG_ID не настроен',
+                        message='Добавьте ID организации 2ГИС в секреты проекта')
     
-    conn = None
-    try:
-        reviews_data = fetch_dgis_reviews(api_key, org_id)
-        
-        conn = psycopg2.connect(os.environ['DATABASE_URL'])
+    reviews_data = fetch_dgis_reviews(api_key, org_id)
+    
+    added_count = 0
+    updated_count = 0
+    hidden_count = 0
+    visible_count = 0
+    
+    with db.connection() as conn:
         cur = conn.cursor()
         
-        added_count = 0
-        updated_count = 0
-        hidden_count = 0
-        visible_count = 0
-        
         for review in reviews_data:
             source_id = review.get('id', '')
             rating = review.get('rating', 5)
@@ -191,37 +123,15 @@ def sync_reviews_from_dgis() -> Dict[str, Any]:
         
         conn.commit()
         cur.close()
-        
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({
-                'success': True,
-                'added': added_count,
-                'updated': updated_count,
-                'total': len(reviews_data),
-                'visible': visible_count,
-                'hidden': hidden_count
-            }, ensure_ascii=False),
-            'isBase64Encoded': False
-        }
-        
-    except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': str(e)}, ensure_ascii=False),
-            'isBase64Encoded': False
-        }
-    finally:
-        if conn:
-            conn.close()
+    
+    return {
+        'success': True,
+        'added': added_count,
+        'updated': updated_count,
+        'total': len(reviews_data),
+        'visible': visible_count,
+        'hidden': hidden_count
+    }
 
 def fetch_dgis_reviews(api_key: str, org_id: str) -> List[Dict[str, Any]]:
     '''Получить отзывы из 2ГИС API'''
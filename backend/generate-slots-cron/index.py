@@ -0,0 +1,54 @@
+import os
+from typing import Dict, Any, List
+
+import db
+from runtime import Router, HttpError
+
+router = Router(allow_headers='Content-Type', default_method='POST')
+
+SLOT_HORIZON_DAYS = int(os.environ.get('SLOT_HORIZON_DAYS', '30'))
+SLOT_CAPACITY = int(os.environ.get('SLOT_CAPACITY', '2'))
+SLOT_DAY_START = os.environ.get('SLOT_DAY_START', '09:00')
+SLOT_DAY_END = os.environ.get('SLOT_DAY_END', '21:00')
+SLOT_TIMEZONE = os.environ.get('SLOT_TIMEZONE', 'Europe/Moscow')
+
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    '''
+    Создание часовых слотов записи по расписанию
+    Досоздаёт слоты от сегодняшнего дня на SLOT_HORIZON_DAYS вперёд, уже
+    существующие слоты и их занятость не меняет
+    '''
+    return router(event, context)
+
+def closed_weekdays() -> List[int]:
+    '''SLOT_CLOSED_WEEKDAYS: выходные дни через запятую, 1 — понедельник, 7 — воскресенье'''
+    raw = os.environ.get('SLOT_CLOSED_WEEKDAYS', '')
+    try:
+        days = [int(day) for day in raw.split(',') if day.strip()]
+    except ValueError:
+        raise HttpError(500, 'SLOT_CLOSED_WEEKDAYS должен быть списком чисел 1-7', success=False)
+    return [day for day in days if 1 <= day <= 7]
+
+@router.route('GET', 'POST')
+def generate_slots(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    with db.connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT generate_booking_slots(
+                (now() AT TIME ZONE %s)::date, %s, %s, %s::time, %s::time, %s::integer[]
+            )
+            """,
+            (SLOT_TIMEZONE, SLOT_HORIZON_DAYS, SLOT_CAPACITY, SLOT_DAY_START, SLOT_DAY_END, closed_weekdays())
+        )
+        created = cur.fetchone()[0]
+        cur.execute('SELECT MAX(slot_date) FROM booking_slots')
+        until = cur.fetchone()[0]
+        conn.commit()
+        cur.close()
+
+    return {
+        'success': True,
+        'created': created,
+        'until': until
+    }
@@ -1,115 +1,294 @@
-import json
+import base64
 import os
-from typing import Dict, Any
-from datetime import datetime
-import psycopg2
+import select
+import time
+from datetime import date, datetime
+from typing import Dict, Any, List, Optional, Tuple
 from psycopg2.extras import RealDictCursor
 
+import db
+from runtime import Router, HttpError, query_params
+
+router = Router()
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+# Водяной знак отстаёт от текущего времени на это окно и не обгоняет начало
+# самой старой пишущей транзакции: её строки ещё не видны, а updated_at у них
+# не меньше xact_start (V0015, V0026)
+SYNC_SAFETY_WINDOW = 5
+LONG_POLL_MAX_WAIT = float(os.environ.get('LONG_POLL_MAX_WAIT', '25'))
+# Массив названий услуг заявки; индекс idx_bookings_service_titles (V0029) построен по нему же
+SERVICE_TITLES = "regexp_split_to_array(service_type, '\\s*,\\s*')"
+
+BOOKING_COLUMNS = """
+    id, customer_name, customer_phone, customer_email,
+    service_type, car_brand, car_model, preferred_date,
+    preferred_time, comment, status, created_at, updated_at
+"""
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
-    Business: Get all bookings from database with filtering options
-    Args: event with httpMethod, queryStringParameters for status filter
-    Returns: HTTP response with bookings list
+    Business: Get bookings page by page (newest first) with status, date, brand and service filters, or changes since a watermark
+    Args: event with httpMethod, queryStringParameters: status, date_from, date_to, brand, service, limit, cursor; or since, latest, wait, limit
+    Returns: HTTP response with bookings page, next_cursor and counts on the first page; in since mode changed bookings, status counts when anything changed and a new watermark, with wait as a long poll
     '''
-    method: str = event.get('httpMethod', 'GET')
-    
-    # Handle CORS OPTIONS request
-    if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-User-Id, X-Auth-Token, X-Session-Id',
-                'Access-Control-Max-Age': '86400'
-            },
-            'body': ''
-        }
-    
-    if method != 'GET':
-        return {
-            'statusCode': 405,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Method not allowed'})
-        }
-    
+    return router(event, context)
+
+def encode_cursor(created_at: datetime, booking_id: int) -> str:
+    raw = f'{created_at.isoformat()}|{booking_id}'.encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        created_at, booking_id = raw.split('|')
+        return datetime.fromisoformat(created_at), int(booking_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HttpError(400, 'Неверный cursor')
+
+def decode_watermark(since: str) -> Tuple[datetime, int]:
+    '''Водяной знак из прошлого ответа или просто момент времени в ISO 8601'''
     try:
-        # Get query parameters
-        params = event.get('queryStringParameters') or {}
-        status_filter = params.get('status', '')
-        
-        # Connect to database
-        dsn = os.environ.get('DATABASE_URL')
-        if not dsn:
-            raise Exception('DATABASE_URL not configured')
-        
-        conn = psycopg2.connect(dsn)
+        return datetime.fromisoformat(since), 0
+    except ValueError:
+        pass
+    try:
+        return decode_cursor(since)
+    except HttpError:
+        raise HttpError(400, 'Неверный since')
+
+def safe_watermark(cur: Any) -> Tuple[datetime, int]:
+    cur.execute(
+        """
+        SELECT LEAST(
+            clock_timestamp()::timestamp - %s * interval '1 second',
+            (SELECT MIN(xact_start)::timestamp
+             FROM pg_stat_activity
+             WHERE datname = current_database()
+               AND backend_xid IS NOT NULL
+               AND pid <> pg_backend_pid())
+        ) AS safe_until
+        """,
+        (SYNC_SAFETY_WINDOW,)
+    )
+    return cur.fetchone()['safe_until'], 0
+
+def parse_date(value: str, name: str) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HttpError(400, f'{name} должен быть в формате YYYY-MM-DD')
+
+def parse_limit(value: str) -> int:
+    if not value:
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise HttpError(400, 'limit должен быть числом')
+    return max(1, min(limit, MAX_LIMIT))
+
+def build_filters(params: Dict[str, str]) -> Tuple[List[str], List[Any]]:
+    '''Условия WHERE без статуса: статус фильтруется отдельно, чтобы посчитать заявки по всем статусам'''
+    date_from = parse_date(params.get('date_from', ''), 'date_from')
+    date_to = parse_date(params.get('date_to', ''), 'date_to')
+    brand = params.get('brand', '').strip()
+    service = params.get('service', '').strip()
+
+    clauses: List[str] = []
+    args: List[Any] = []
+    if date_from:
+        clauses.append('preferred_date >= %s')
+        args.append(date_from)
+    if date_to:
+        clauses.append('preferred_date <= %s')
+        args.append(date_to)
+    if brand:
+        clauses.append('car_brand = %s')
+        args.append(brand)
+    titles = [title.strip() for title in service.split(',') if title.strip()]
+    if titles:
+        # Заявка подходит, если среди её услуг есть все запрошенные (точные названия)
+        clauses.append(f'{SERVICE_TITLES} @> %s::text[]')
+        args.append(titles)
+    return clauses, args
+
+def count_statuses(cur: Any, clauses: List[str], args: List[Any]) -> Dict[str, int]:
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    cur.execute(
+        f"""
+        SELECT status, COUNT(*) AS count
+        FROM bookings
+        {where}
+        GROUP BY status
+        """,
+        args
+    )
+    return {row['status']: row['count'] for row in cur.fetchall()}
+
+@router.get
+def list_bookings(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    params = query_params(event)
+    if params.get('since'):
+        return list_changes(params)
+
+    status_filter = params.get('status', '')
+    limit = parse_limit(params.get('limit', ''))
+    cursor = params.get('cursor', '')
+
+    clauses, args = build_filters(params)
+    page_clauses = list(clauses)
+    page_args = list(args)
+    if status_filter:
+        page_clauses.append('status = %s')
+        page_args.append(status_filter)
+    if cursor:
+        created_at, booking_id = decode_cursor(cursor)
+        page_clauses.append('(created_at, id) < (%s, %s)')
+        page_args.extend([created_at, booking_id])
+
+    where = f"WHERE {' AND '.join(page_clauses)}" if page_clauses else ''
+
+    with db.connection() as conn:
         cur = conn.cursor(cursor_factory=RealDictCursor)
-        
-        # Build query
-        if status_filter:
-            cur.execute(
-                """
-                SELECT id, customer_name, customer_phone, customer_email,
-                       service_type, car_brand, car_model, preferred_date,
-                       preferred_time, comment, status, created_at, updated_at
-                FROM bookings
-                WHERE status = %s
-                ORDER BY created_at DESC
-                """,
-                (status_filter,)
-            )
-        else:
-            cur.execute(
-                """
-                SELECT id, customer_name, customer_phone, customer_email,
-                       service_type, car_brand, car_model, preferred_date,
-                       preferred_time, comment, status, created_at, updated_at
-                FROM bookings
-                ORDER BY created_at DESC
-                """
-            )
-        
+        cur.execute(
+            f"""
+            SELECT {BOOKING_COLUMNS}
+            FROM bookings
+            {where}
+            ORDER BY created_at DESC, id DESC
+            LIMIT %s
+            """,
+            page_args + [limit + 1]
+        )
         rows = cur.fetchall()
-        
-        # Convert to JSON-serializable format
-        bookings = []
-        for row in rows:
-            booking = dict(row)
-            # Convert datetime objects to ISO format strings
-            if booking.get('created_at'):
-                booking['created_at'] = booking['created_at'].isoformat()
-            if booking.get('updated_at'):
-                booking['updated_at'] = booking['updated_at'].isoformat()
-            if booking.get('preferred_date'):
-                booking['preferred_date'] = booking['preferred_date'].isoformat()
-            bookings.append(booking)
-        
+
+        result: Dict[str, Any] = {}
+        # Счётчики нужны только для первой страницы: дальше клиент их уже знает
+        if not cursor:
+            status_counts = count_statuses(cur, clauses, args)
+            result['status_counts'] = status_counts
+            result['total'] = status_counts.get(status_filter, 0) if status_filter else sum(status_counts.values())
+            # С этого знака клиент дальше забирает только изменения (?since=)
+            result['watermark'] = encode_cursor(*safe_watermark(cur))
         cur.close()
-        conn.close()
-        
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'isBase64Encoded': False,
-            'body': json.dumps({
-                'bookings': bookings,
-                'total': len(bookings)
-            })
-        }
-        
-    except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': f'Ошибка сервера: {str(e)}'})
-        }
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['id'])
+
+    return {
+        'bookings': rows,
+        **result,
+        'next_cursor': next_cursor
+    }
+
+def parse_wait(value: str) -> float:
+    if not value:
+        return 0
+    try:
+        wait = float(value)
+    except ValueError:
+        raise HttpError(400, 'wait должен быть числом секунд')
+    return max(0.0, min(wait, LONG_POLL_MAX_WAIT))
+
+def fetch_changes(cur: Any, since_key: Tuple[datetime, int], limit: int) -> List[Dict[str, Any]]:
+    cur.execute(
+        f"""
+        SELECT {BOOKING_COLUMNS}
+        FROM bookings
+        WHERE (updated_at, id) > (%s, %s)
+        ORDER BY updated_at, id
+        LIMIT %s
+        """,
+        (since_key[0], since_key[1], limit + 1)
+    )
+    return cur.fetchall()
+
+def wait_for_notify(conn: Any, timeout: float) -> bool:
+    '''Ждёт NOTIFY на канале bookings не дольше timeout секунд'''
+    deadline = time.monotonic() + timeout
+    while not conn.notifies:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        if select.select([conn], [], [], remaining) == ([], [], []):
+            break
+        conn.poll()
+    notified = bool(conn.notifies)
+    del conn.notifies[:]
+    return notified
+
+def booking_key(row: Dict[str, Any]) -> Tuple[datetime, int]:
+    return row['updated_at'], row['id']
+
+def changed_counts(cur: Any, rows: List[Dict[str, Any]], latest_key: Tuple[datetime, int],
+                   clauses: List[str], args: List[Any]) -> Optional[Dict[str, int]]:
+    '''Счётчики по статусам, только если в ответе есть новые для клиента изменения'''
+    if all(booking_key(row) <= latest_key for row in rows):
+        return None
+    return count_statuses(cur, clauses, args)
+
+def list_changes(params: Dict[str, str]) -> Dict[str, Any]:
+    '''
+    Заявки, созданные или изменённые после водяного знака, по возрастанию
+    (updated_at, id). Фильтры не применяются: клиенту нужно узнать и о заявках,
+    которые из его фильтра ушли. Водяной знак отстаёт от текущего момента,
+    поэтому свежие строки приходят повторно; latest из прошлого ответа
+    отсекает уже полученные. С wait=N запрос ждёт до N секунд уведомления
+    о новой или изменённой заявке, если непрочитанных изменений нет.
+    Если изменения есть, status_counts пересчитываются с фильтрами списка
+    (date_from, date_to, brand, service): клиент не знает прежний статус
+    заявок за пределами загруженных страниц.
+    '''
+    since_key = decode_watermark(params['since'])
+    clauses, args = build_filters(params)
+    latest_key = decode_cursor(params['latest']) if params.get('latest') else since_key
+    limit = parse_limit(params.get('limit') or str(MAX_LIMIT))
+    wait = parse_wait(params.get('wait', ''))
+
+    if wait:
+        # LISTEN до чтения изменений: коммит между чтением и ожиданием не потеряется.
+        # DISCARD ALL при возврате соединения в пул снимает подписку
+        with db.connection(discard_session=True) as conn:
+            conn.autocommit = True
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            cur.execute('LISTEN bookings')
+            rows = fetch_changes(cur, since_key, limit)
+            if all(booking_key(row) <= latest_key for row in rows):
+                if wait_for_notify(conn, wait):
+                    rows = fetch_changes(cur, since_key, limit)
+            safe_key = safe_watermark(cur)
+            status_counts = changed_counts(cur, rows, latest_key, clauses, args)
+            cur.close()
+    else:
+        with db.connection() as conn:
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            rows = fetch_changes(cur, since_key, limit)
+            safe_key = safe_watermark(cur)
+            status_counts = changed_counts(cur, rows, latest_key, clauses, args)
+            cur.close()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    last_key = booking_key(rows[-1]) if rows else since_key
+
+    watermark_key = max(min(last_key, safe_key), since_key)
+    if watermark_key < last_key:
+        # Остаток страницы внутри окна безопасности придёт следующим опросом
+        has_more = False
+
+    changed = [row for row in rows if booking_key(row) > latest_key]
+    result: Dict[str, Any] = {'status_counts': status_counts} if status_counts is not None else {}
+    return {
+        'bookings': changed,
+        'changed_ids': [row['id'] for row in changed],
+        **result,
+        'watermark': encode_cursor(*watermark_key),
+        'latest': encode_cursor(*max(last_key, latest_key)),
+        'has_more': has_more
+    }
@@ -0,0 +1,49 @@
+'''
+Кэш каталога в памяти тёплого контейнера: TTL, ограничение размера и LRU.
+Каждая запись помнит версию каталога (content_versions.catalog), с которой
+она построена; при другой версии запись считается устаревшей.
+Файл одинаковый в функциях, читающих каталог.
+'''
+
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+CATALOG_CACHE_TTL = float(os.environ.get('CATALOG_CACHE_TTL', '300'))
+CATALOG_CACHE_SIZE = int(os.environ.get('CATALOG_CACHE_SIZE', '128'))
+
+
+class VersionedCache:
+    def __init__(self, max_entries: int = CATALOG_CACHE_SIZE, ttl: float = CATALOG_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: 'OrderedDict[Hashable, Tuple[int, float, Any]]' = OrderedDict()
+        self._stats: Dict[str, int] = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get(self, key: Hashable, version: int) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self._stats['misses'] += 1
+            return None
+        entry_version, expires_at, value = entry
+        if entry_version != version or expires_at < time.monotonic():
+            del self._entries[key]
+            self._stats['misses'] += 1
+            return None
+        self._entries.move_to_end(key)
+        self._stats['hits'] += 1
+        return value
+
+    def set(self, key: Hashable, version: int, value: Any) -> None:
+        self._entries[key] = (version, time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._stats, 'size': len(self._entries)}
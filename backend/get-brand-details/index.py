@@ -1,109 +1,123 @@
-import json
-import os
-import psycopg2
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+
+import catalog
+import db
+import pricing
+from cache import VersionedCache
+from runtime import Router, HttpError, Response, dumps, make_etag, not_modified, query_params
+
+router = Router(allow_headers='Content-Type, If-None-Match')
+catalog_cache = VersionedCache()
+pricing_cache = VersionedCache()
+
+MAX_BATCH_SLUGS = 50
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
     Business: Получает детальную информацию о бренде и его услугах с ценами
-    Args: event - HTTP запрос с параметром slug бренда, context - контекст выполнения
-    Returns: HTTP response с данными бренда и услугами
+    Args: event - HTTP запрос с параметром slug бренда или slugs=a,b,c для нескольких брендов; view=models с model и year — модели бренда и цены под автомобиль, context - контекст выполнения
+    Returns: HTTP response с данными бренда и услугами; для view=models — модели и цены услуг с уровнем (model, brand, global)
     '''
-    method: str = event.get('httpMethod', 'GET')
-    
-    if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type',
-                'Access-Control-Max-Age': '86400'
-            },
-            'body': ''
-        }
-    
-    if method != 'GET':
-        return {
-            'statusCode': 405,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'Method not allowed'})
-        }
-    
-    params = event.get('queryStringParameters', {}) or {}
+    return router(event, context)
+
+@router.get
+def get_brand_details(event: Dict[str, Any], context: Any) -> Response:
+    params = query_params(event)
+    if params.get('slugs'):
+        return get_brand_details_batch(event, params['slugs'])
+
     slug = params.get('slug', '')
-    
+
     if not slug:
-        return {
-            'statusCode': 400,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'Slug parameter is required'})
-        }
-    
-    dsn = os.environ.get('DATABASE_URL')
-    if not dsn:
-        return {
-            'statusCode': 500,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'DATABASE_URL not configured'})
-        }
-    
-    conn = psycopg2.connect(dsn)
-    cur = conn.cursor()
-    
-    cur.execute("""
-        SELECT id, name, slug, logo_url, description
-        FROM brands
-        WHERE slug = %s
-    """, (slug,))
-    
-    brand_row = cur.fetchone()
-    
-    if not brand_row:
-        cur.close()
-        conn.close()
-        return {
-            'statusCode': 404,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'Brand not found'})
-        }
-    
-    brand = {
-        'id': brand_row[0],
-        'name': brand_row[1],
-        'slug': brand_row[2],
-        'logo': brand_row[3],
-        'description': brand_row[4]
-    }
-    
-    cur.execute("""
-        SELECT s.id, s.title, s.description, s.icon, s.duration, sp.base_price, sp.currency
-        FROM services s
-        JOIN service_prices sp ON s.id = sp.service_id
-        WHERE sp.brand_id = %s AND s.is_active = true
-        ORDER BY s.id
-    """, (brand['id'],))
-    
-    services_rows = cur.fetchall()
-    services = []
-    for row in services_rows:
-        services.append({
-            'id': row[0],
-            'title': row[1],
-            'description': row[2],
-            'icon': row[3],
-            'duration': row[4],
-            'price': f"от {int(row[5]):,} {row[6]}".replace(',', ' ')
-        })
-    
-    cur.close()
-    conn.close()
-    
-    return {
-        'statusCode': 200,
-        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-        'body': json.dumps({
-            'brand': brand,
-            'services': services
-        })
-    }
+        raise HttpError(400, 'Slug parameter is required')
+    if params.get('view') == 'models':
+        return get_brand_models(event, slug, params)
+
+    with db.connection() as conn:
+        version = db.content_version(conn, 'catalog')
+        etag = make_etag('brand-details', slug, version)
+        cached = not_modified(event, etag)
+        if cached:
+            return cached
+
+        body = catalog_cache.get(slug, version)
+        if body is not None:
+            return Response(body=body, etag=etag)
+
+        body = catalog.brand_details_json(conn, [slug]).get(slug)
+
+    if body is None:
+        raise HttpError(404, 'Brand not found')
+
+    catalog_cache.set(slug, version, body)
+    return Response(body=body, etag=etag)
+
+def get_brand_details_batch(event: Dict[str, Any], slugs_param: str) -> Response:
+    slugs: List[str] = []
+    for slug in slugs_param.split(','):
+        slug = slug.strip()
+        if slug and slug not in slugs:
+            slugs.append(slug)
+
+    if not slugs:
+        raise HttpError(400, 'Slug parameter is required')
+    if len(slugs) > MAX_BATCH_SLUGS:
+        raise HttpError(400, f'Не больше {MAX_BATCH_SLUGS} брендов за запрос')
+
+    key = tuple(sorted(slugs))
+    with db.connection() as conn:
+        version = db.content_version(conn, 'catalog')
+        etag = make_etag('brand-details-batch', key, version)
+        cached = not_modified(event, etag)
+        if cached:
+            return cached
+
+        body = catalog_cache.get(key, version)
+        if body is not None:
+            return Response(body=body, etag=etag)
+
+        details = catalog.brand_details_json(conn, slugs)
+
+    # Тело склеивается из готовых JSON карточек без повторной сериализации
+    items = ','.join(f'{dumps(slug)}:{details[slug]}' for slug in slugs if slug in details)
+    not_found = [slug for slug in slugs if slug not in details]
+    body = f'{{"brands":{{{items}}},"not_found":{dumps(not_found)}}}'
+
+    catalog_cache.set(key, version, body)
+    return Response(body=body, etag=etag)
+
+def parse_year(value: str) -> Optional[int]:
+    if not value:
+        return None
+    try:
+        year = int(value)
+    except ValueError:
+        raise HttpError(400, 'year должен быть числом')
+    if not 1900 <= year <= 2100:
+        raise HttpError(400, 'Неверный год выпуска')
+    return year
+
+def get_brand_models(event: Dict[str, Any], slug: str, params: Dict[str, str]) -> Response:
+    model_param = params.get('model', '').strip()
+    year = parse_year(params.get('year', '').strip())
+
+    with db.connection() as conn:
+        version = db.content_version(conn, 'catalog')
+        etag = make_etag('brand-models', slug, model_param.lower(), year, version)
+        cached = not_modified(event, etag)
+        if cached:
+            return cached
+
+        brand_pricing = pricing_cache.get(slug, version)
+        if brand_pricing is None:
+            brand_pricing = pricing.load(conn, slug)
+            if brand_pricing is not None:
+                pricing_cache.set(slug, version, brand_pricing)
+
+    if brand_pricing is None:
+        raise HttpError(404, 'Brand not found')
+
+    result = pricing.payload(brand_pricing, model_param, year)
+    if model_param and result['model'] is None:
+        raise HttpError(404, 'Модель не найдена')
+    return Response(result, etag=etag)
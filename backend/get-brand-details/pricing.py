@@ -0,0 +1,112 @@
+'''
+Цены под конкретный автомобиль: для каждой услуги берётся самая точная цена —
+модели, затем бренда, затем общая (brand_id и model_id пусты). Всё нужное для
+бренда читается одним запросом и хранится компактно: тёплый контейнер
+считает цены любой модели бренда без обращения к базе.
+'''
+
+from typing import Any, Dict, List, Optional, Tuple
+
+# Цены бренда и общие, модели бренда и активные услуги. Ключи цен — по
+# индексам idx_service_prices_brand и uq_service_prices_key (V0021)
+BRAND_PRICING_SQL = """
+    SELECT b.id, b.name, b.slug,
+           COALESCE((
+               SELECT json_agg(json_build_array(m.id, m.name, m.year_from, m.year_to) ORDER BY m.name)
+               FROM models m
+               WHERE m.brand_id = b.id
+           ), '[]'::json),
+           COALESCE((
+               SELECT json_agg(json_build_array(s.id, s.title) ORDER BY s.id)
+               FROM services s
+               WHERE s.is_active = true
+           ), '[]'::json),
+           COALESCE((
+               SELECT json_agg(json_build_array(
+                   sp.service_id, sp.brand_id IS NULL, COALESCE(sp.model_id, 0), sp.base_price, sp.currency
+               ))
+               FROM service_prices sp
+               WHERE sp.brand_id = b.id
+                  OR (sp.brand_id IS NULL AND sp.model_id IS NULL)
+           ), '[]'::json)
+    FROM brands b
+    WHERE b.slug = %s
+"""
+
+GLOBAL = -1
+BRAND = 0
+
+
+class BrandPricing:
+    '''Модели бренда и цены: (service_id, model_id) для цен модели, BRAND — бренда, GLOBAL — общие'''
+
+    __slots__ = ('brand', 'models', 'services', 'prices')
+
+    def __init__(self, brand: Dict[str, Any], models: List[List[Any]], services: List[List[Any]],
+                 prices: Dict[Tuple[int, int], Tuple[float, str]]):
+        self.brand = brand
+        self.models = models
+        self.services = services
+        self.prices = prices
+
+    def find_model(self, value: str) -> Optional[List[Any]]:
+        '''Модель по id или названию без учёта регистра'''
+        lowered = value.strip().lower()
+        for model in self.models:
+            if str(model[0]) == lowered or model[1].lower() == lowered:
+                return model
+        return None
+
+    def resolve(self, model: Optional[List[Any]], year: Optional[int]) -> List[Dict[str, Any]]:
+        model_id = model[0] if model else None
+        # Цена модели действует в годы её выпуска; год вне диапазона — цена бренда
+        if model and year is not None:
+            year_from, year_to = model[2], model[3]
+            if (year_from and year < year_from) or (year_to and year > year_to):
+                model_id = None
+
+        result = []
+        for service_id, title in self.services:
+            price, level = None, None
+            for key, key_level in ((model_id, 'model'), (BRAND, 'brand'), (GLOBAL, 'global')):
+                if key is not None and (service_id, key) in self.prices:
+                    price, level = self.prices[(service_id, key)], key_level
+                    break
+            result.append({
+                'service_id': service_id,
+                'title': title,
+                'price': price[0] if price else None,
+                'currency': price[1] if price else None,
+                'level': level
+            })
+        return result
+
+
+def load(conn: Any, slug: str) -> Optional[BrandPricing]:
+    cur = conn.cursor()
+    cur.execute(BRAND_PRICING_SQL, (slug,))
+    row = cur.fetchone()
+    cur.close()
+    if row is None:
+        return None
+
+    brand_id, name, brand_slug, models, services, price_rows = row
+    prices: Dict[Tuple[int, int], Tuple[float, str]] = {}
+    for service_id, is_global, model_id, base_price, currency in price_rows:
+        key = GLOBAL if is_global else (model_id or BRAND)
+        prices[(service_id, key)] = (base_price, currency)
+    return BrandPricing({'id': brand_id, 'name': name, 'slug': brand_slug}, models, services, prices)
+
+
+def payload(pricing: BrandPricing, model_param: str, year: Optional[int]) -> Dict[str, Any]:
+    model = pricing.find_model(model_param) if model_param else None
+    return {
+        'brand': pricing.brand,
+        'models': [
+            {'id': model_id, 'name': name, 'year_from': year_from, 'year_to': year_to}
+            for model_id, name, year_from, year_to in pricing.models
+        ],
+        'model': {'id': model[0], 'name': model[1], 'year_from': model[2], 'year_to': model[3]} if model else None,
+        'year': year,
+        'prices': pricing.resolve(model, year)
+    }
@@ -0,0 +1,109 @@
+'''
+Сборка публичных данных каталога: список брендов, услуг и карточка бренда.
+Одни и те же payload отдают get-brands, get-services, get-brand-details и
+выкладывает publish-catalog, поэтому файл одинаковый во всех этих функциях.
+'''
+
+from typing import Any, Dict, List
+
+
+def brands_payload(conn: Any) -> Dict[str, Any]:
+    cur = conn.cursor()
+
+    cur.execute("""
+        SELECT id, name, slug, logo_url, description
+        FROM brands
+        ORDER BY name
+    """)
+
+    rows = cur.fetchall()
+    cur.close()
+
+    brands = []
+    for row in rows:
+        brands.append({
+            'id': row[0],
+            'name': row[1],
+            'slug': row[2],
+            'logo': row[3],
+            'description': row[4]
+        })
+
+    return {'brands': brands}
+
+
+def services_payload(conn: Any) -> Dict[str, Any]:
+    cur = conn.cursor()
+
+    # Минимальные цены поддерживаются триггерами в service_min_prices (V0012)
+    cur.execute("""
+        SELECT s.id, s.title, s.description, s.icon, s.duration, 
+               price_label(smp.min_price, smp.currency)
+        FROM service_min_prices smp
+        JOIN services s ON s.id = smp.service_id
+        WHERE s.is_active = true
+        ORDER BY s.id
+    """)
+
+    rows = cur.fetchall()
+    cur.close()
+
+    services = []
+    for row in rows:
+        services.append({
+            'id': row[0],
+            'title': row[1],
+            'description': row[2],
+            'icon': row[3],
+            'duration': row[4],
+            'price': row[5]
+        })
+
+    return {'services': services}
+
+
+# Карточка бренда целиком собирается в Postgres одним запросом и уходит клиенту как текст
+BRAND_DETAILS_SQL = """
+    SELECT b.slug, json_build_object(
+        'brand', json_build_object(
+            'id', b.id,
+            'name', b.name,
+            'slug', b.slug,
+            'logo', b.logo_url,
+            'description', b.description
+        ),
+        'services', COALESCE((
+            SELECT json_agg(json_build_object(
+                'id', s.id,
+                'title', s.title,
+                'description', s.description,
+                'icon', s.icon,
+                'duration', s.duration,
+                'price', price_label(sp.base_price, sp.currency)
+            ) ORDER BY s.id)
+            FROM services s
+            -- Цена бренда, иначе общая; цены отдельных моделей в карточку не попадают
+            JOIN LATERAL (
+                SELECT base_price, currency
+                FROM service_prices
+                WHERE service_id = s.id
+                  AND COALESCE(brand_id, 0) IN (b.id, 0)
+                  AND COALESCE(model_id, 0) = 0
+                ORDER BY COALESCE(brand_id, 0) = 0
+                LIMIT 1
+            ) sp ON true
+            WHERE s.is_active = true
+        ), '[]'::json)
+    )::text
+    FROM brands b
+    WHERE b.slug = ANY(%s)
+"""
+
+
+def brand_details_json(conn: Any, slugs: List[str]) -> Dict[str, str]:
+    '''Готовый JSON карточек брендов по slug; отсутствующих брендов в результате нет'''
+    cur = conn.cursor()
+    cur.execute(BRAND_DETAILS_SQL, (list(slugs),))
+    rows = cur.fetchall()
+    cur.close()
+    return {slug: body for slug, body in rows}
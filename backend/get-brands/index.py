@@ -1,68 +1,35 @@
-import json
-import os
-import psycopg2
 from typing import Dict, Any
 
+import catalog
+import db
+from cache import VersionedCache
+from runtime import Router, Response, dumps, make_etag, not_modified
+
+router = Router(allow_headers='Content-Type, If-None-Match')
+catalog_cache = VersionedCache()
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
     Business: Получает список всех брендов из базы данных
     Args: event - HTTP запрос, context - контекст выполнения
     Returns: HTTP response со списком брендов
     '''
-    method: str = event.get('httpMethod', 'GET')
-    
-    if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type',
-                'Access-Control-Max-Age': '86400'
-            },
-            'body': ''
-        }
-    
-    if method != 'GET':
-        return {
-            'statusCode': 405,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'Method not allowed'})
-        }
-    
-    dsn = os.environ.get('DATABASE_URL')
-    if not dsn:
-        return {
-            'statusCode': 500,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'DATABASE_URL not configured'})
-        }
-    
-    conn = psycopg2.connect(dsn)
-    cur = conn.cursor()
-    
-    cur.execute("""
-        SELECT id, name, slug, logo_url, description
-        FROM brands
-        ORDER BY name
-    """)
-    
-    rows = cur.fetchall()
-    brands = []
-    for row in rows:
-        brands.append({
-            'id': row[0],
-            'name': row[1],
-            'slug': row[2],
-            'logo': row[3],
-            'description': row[4]
-        })
-    
-    cur.close()
-    conn.close()
-    
-    return {
-        'statusCode': 200,
-        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-        'body': json.dumps({'brands': brands})
-    }
+    return router(event, context)
+
+@router.get
+def list_brands(event: Dict[str, Any], context: Any) -> Response:
+    with db.connection() as conn:
+        version = db.content_version(conn, 'catalog')
+        etag = make_etag('brands', version)
+        cached = not_modified(event, etag)
+        if cached:
+            return cached
+
+        body = catalog_cache.get('brands', version)
+        if body is not None:
+            return Response(body=body, etag=etag)
+
+        body = dumps(catalog.brands_payload(conn))
+
+    catalog_cache.set('brands', version, body)
+    return Response(body=body, etag=etag)
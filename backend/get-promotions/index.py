@@ -1,47 +1,37 @@
-import json
-import os
-import psycopg2
 from typing import Dict, Any
 
+import db
+from runtime import Router, Response, make_etag, not_modified
+
+router = Router(allow_headers='Content-Type, If-None-Match')
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
     Получение списка активных акций для публичного сайта
     '''
-    method: str = event.get('httpMethod', 'GET')
-    
-    if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type',
-                'Access-Control-Max-Age': '86400'
-            },
-            'body': '',
-            'isBase64Encoded': False
-        }
-    
-    if method != 'GET':
-        return {
-            'statusCode': 405,
-            'headers': {'Access-Control-Allow-Origin': '*', 'Content-Type': 'application/json'},
-            'body': json.dumps({'error': 'Method not allowed'}),
-            'isBase64Encoded': False
-        }
-    
-    conn = psycopg2.connect(os.environ['DATABASE_URL'])
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT id, title, description, discount, old_price, new_price, 
-               valid_until, icon, details
-        FROM promotions
-        WHERE is_active = true
-        ORDER BY created_at DESC
-    ''')
+    return router(event, context)
+
+@router.get
+def list_promotions(event: Dict[str, Any], context: Any) -> Response:
+    with db.connection() as conn:
+        etag = make_etag('promotions', db.content_version(conn, 'promotions'))
+        cached = not_modified(event, etag)
+        if cached:
+            return cached
+        
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT id, title, description, discount, old_price, new_price, 
+                   valid_until, icon, details
+            FROM promotions
+            WHERE is_active = true
+            ORDER BY created_at DESC
+        ''')
+        
+        rows = cursor.fetchall()
+        cursor.close()
     
-    rows = cursor.fetchall()
     promotions = []
     
     for row in rows:
@@ -57,12 +47,4 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             'details': row[8]
         })
     
-    cursor.close()
-    conn.close()
-    
-    return {
-        'statusCode': 200,
-        'headers': {'Access-Control-Allow-Origin': '*', 'Content-Type': 'application/json'},
-        'body': json.dumps({'promotions': promotions}),
-        'isBase64Encoded': False
-    }
+    return Response({'promotions': promotions}, etag=etag)
@@ -1,217 +1,112 @@
-import json
-import os
 from typing import Dict, Any
-import psycopg2
 from psycopg2.extras import RealDictCursor
 
+import db
+from runtime import Router, HttpError, Response, json_body
+
+router = Router()
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
     Business: Manage brands - create, update, delete operations
     Args: event with httpMethod (POST/PUT/DELETE), body with brand data
     Returns: HTTP response with operation result
     '''
-    method: str = event.get('httpMethod', 'GET')
+    return router(event, context)
+
+# CREATE new brand
+@router.post
+def create_brand(event: Dict[str, Any], context: Any) -> Response:
+    body_data = json_body(event)
+    name = body_data.get('name', '').strip()
+    slug = body_data.get('slug', '').strip()
+    logo_url = body_data.get('logo_url', '').strip()
+    description = body_data.get('description', '').strip()
     
-    # Handle CORS OPTIONS request
-    if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-User-Id, X-Auth-Token, X-Session-Id',
-                'Access-Control-Max-Age': '86400'
-            },
-            'body': ''
-        }
+    if not name or not slug:
+        raise HttpError(400, 'Название и slug обязательны')
     
-    try:
-        dsn = os.environ.get('DATABASE_URL')
-        if not dsn:
-            raise Exception('DATABASE_URL not configured')
+    with db.connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute(
+            """
+            INSERT INTO brands (name, slug, logo_url, description)
+            VALUES (%s, %s, %s, %s)
+            RETURNING id, name, slug, logo_url, description
+            """,
+            (name, slug, logo_url, description)
+        )
         
-        conn = psycopg2.connect(dsn)
+        result = cur.fetchone()
+        conn.commit()
+        cur.close()
+    
+    return Response({
+        'success': True,
+        'brand': dict(result),
+        'message': 'Бренд создан'
+    }, status=201)
+
+# UPDATE existing brand
+@router.put
+def update_brand(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    body_data = json_body(event)
+    brand_id = body_data.get('id')
+    name = body_data.get('name', '').strip()
+    slug = body_data.get('slug', '').strip()
+    logo_url = body_data.get('logo_url', '').strip()
+    description = body_data.get('description', '').strip()
+    
+    if not brand_id or not name or not slug:
+        raise HttpError(400, 'ID, название и slug обязательны')
+    
+    with db.connection() as conn:
         cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute(
+            """
+            UPDATE brands
+            SET name = %s, slug = %s, logo_url = %s, description = %s
+            WHERE id = %s
+            RETURNING id, name, slug, logo_url, description
+            """,
+            (name, slug, logo_url, description, brand_id)
+        )
         
-        # CREATE new brand
-        if method == 'POST':
-            body_data = json.loads(event.get('body', '{}'))
-            name = body_data.get('name', '').strip()
-            slug = body_data.get('slug', '').strip()
-            logo_url = body_data.get('logo_url', '').strip()
-            description = body_data.get('description', '').strip()
-            
-            if not name or not slug:
-                return {
-                    'statusCode': 400,
-                    'headers': {
-                        'Content-Type': 'application/json',
-                        'Access-Control-Allow-Origin': '*'
-                    },
-                    'body': json.dumps({'error': 'Название и slug обязательны'})
-                }
-            
-            cur.execute(
-                """
-                INSERT INTO brands (name, slug, logo_url, description)
-                VALUES (%s, %s, %s, %s)
-                RETURNING id, name, slug, logo_url, description
-                """,
-                (name, slug, logo_url, description)
-            )
-            
-            result = cur.fetchone()
-            conn.commit()
-            cur.close()
-            conn.close()
-            
-            return {
-                'statusCode': 201,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'isBase64Encoded': False,
-                'body': json.dumps({
-                    'success': True,
-                    'brand': dict(result),
-                    'message': 'Бренд создан'
-                })
-            }
+        result = cur.fetchone()
         
-        # UPDATE existing brand
-        elif method == 'PUT':
-            body_data = json.loads(event.get('body', '{}'))
-            brand_id = body_data.get('id')
-            name = body_data.get('name', '').strip()
-            slug = body_data.get('slug', '').strip()
-            logo_url = body_data.get('logo_url', '').strip()
-            description = body_data.get('description', '').strip()
-            
-            if not brand_id or not name or not slug:
-                return {
-                    'statusCode': 400,
-                    'headers': {
-                        'Content-Type': 'application/json',
-                        'Access-Control-Allow-Origin': '*'
-                    },
-                    'body': json.dumps({'error': 'ID, название и slug обязательны'})
-                }
-            
-            cur.execute(
-                """
-                UPDATE brands
-                SET name = %s, slug = %s, logo_url = %s, description = %s
-                WHERE id = %s
-                RETURNING id, name, slug, logo_url, description
-                """,
-                (name, slug, logo_url, description, brand_id)
-            )
-            
-            result = cur.fetchone()
-            
-            if not result:
-                cur.close()
-                conn.close()
-                return {
-                    'statusCode': 404,
-                    'headers': {
-                        'Content-Type': 'application/json',
-                        'Access-Control-Allow-Origin': '*'
-                    },
-                    'body': json.dumps({'error': 'Бренд не найден'})
-                }
-            
-            conn.commit()
-            cur.close()
-            conn.close()
-            
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'isBase64Encoded': False,
-                'body': json.dumps({
-                    'success': True,
-                    'brand': dict(result),
-                    'message': 'Бренд обновлён'
-                })
-            }
+        if not result:
+            raise HttpError(404, 'Бренд не найден')
         
-        # DELETE brand
-        elif method == 'DELETE':
-            body_data = json.loads(event.get('body', '{}'))
-            brand_id = body_data.get('id')
-            
-            if not brand_id:
-                return {
-                    'statusCode': 400,
-                    'headers': {
-                        'Content-Type': 'application/json',
-                        'Access-Control-Allow-Origin': '*'
-                    },
-                    'body': json.dumps({'error': 'ID бренда обязателен'})
-                }
-            
-            cur.execute("DELETE FROM brands WHERE id = %s RETURNING id", (brand_id,))
-            result = cur.fetchone()
-            
-            if not result:
-                cur.close()
-                conn.close()
-                return {
-                    'statusCode': 404,
-                    'headers': {
-                        'Content-Type': 'application/json',
-                        'Access-Control-Allow-Origin': '*'
-                    },
-                    'body': json.dumps({'error': 'Бренд не найден'})
-                }
-            
-            conn.commit()
-            cur.close()
-            conn.close()
-            
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'isBase64Encoded': False,
-                'body': json.dumps({
-                    'success': True,
-                    'message': 'Бренд удалён'
-                })
-            }
+        conn.commit()
+        cur.close()
+    
+    return {
+        'success': True,
+        'brand': dict(result),
+        'message': 'Бренд обновлён'
+    }
+
+# DELETE brand
+@router.delete
+def delete_brand(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    body_data = json_body(event)
+    brand_id = body_data.get('id')
+    
+    if not brand_id:
+        raise HttpError(400, 'ID бренда обязателен')
+    
+    with db.connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute("DELETE FROM brands WHERE id = %s RETURNING id", (brand_id,))
+        result = cur.fetchone()
         
-        else:
-            return {
-                'statusCode': 405,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({'error': 'Method not allowed'})
-            }
+        if not result:
+            raise HttpError(404, 'Бренд не найден')
         
-    except json.JSONDecodeError:
-        return {
-            'statusCode': 400,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Неверный формат данных'})
-        }
-    except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': f'Ошибка сервера: {str(e)}'})
-        }
+        conn.commit()
+        cur.close()
+    
+    return {
+        'success': True,
+        'message': 'Бренд удалён'
+    }
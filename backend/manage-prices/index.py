@@ -1,285 +1,254 @@
-import json
-import os
-from typing import Dict, Any
-from decimal import Decimal
-import psycopg2
+from typing import Dict, Any, List
 from psycopg2.extras import RealDictCursor
 
+import db
+import price_adjust
+import price_import
+from runtime import DEFAULT_ALLOW_HEADERS, Router, HttpError, Response, json_body, make_etag, not_modified, query_params
+
+router = Router(allow_headers=f'{DEFAULT_ALLOW_HEADERS}, If-None-Match')
+
+# Матрица бренд × услуга одним запросом: оси и плотные массивы цен и их ID
+# (null — цены нет). Только цены бренда целиком, без глобальных и модельных.
+# currency — валюта большинства цен; строка бренда, где есть другая валюта,
+# получает в currencies валюту каждой ячейки, остальные строки — null
+PRICE_MATRIX_SQL = """
+    WITH default_currency AS (
+        SELECT mode() WITHIN GROUP (ORDER BY currency) AS currency
+        FROM service_prices
+        WHERE brand_id IS NOT NULL AND model_id IS NULL
+    ),
+    brand_axis AS (
+        SELECT id, name, slug, logo_url, description,
+               ROW_NUMBER() OVER (ORDER BY name, id) AS position
+        FROM brands
+    ),
+    service_axis AS (
+        SELECT id, title, ROW_NUMBER() OVER (ORDER BY id) AS position
+        FROM services
+    ),
+    grid AS (
+        SELECT b.position AS brand_position,
+               json_agg(sp.base_price ORDER BY s.position) AS prices,
+               json_agg(sp.id ORDER BY s.position) AS price_ids,
+               CASE WHEN bool_and(sp.currency IS NULL OR sp.currency = (SELECT currency FROM default_currency))
+                    THEN NULL
+                    ELSE json_agg(sp.currency ORDER BY s.position)
+               END AS currencies
+        FROM brand_axis b
+        CROSS JOIN service_axis s
+        LEFT JOIN service_prices sp
+          ON sp.brand_id = b.id AND sp.service_id = s.id AND sp.model_id IS NULL
+        GROUP BY b.position
+    )
+    SELECT json_build_object(
+        'brands', COALESCE((
+            SELECT json_agg(json_build_object(
+                'id', id, 'name', name, 'slug', slug, 'logo_url', logo_url, 'description', description
+            ) ORDER BY position)
+            FROM brand_axis
+        ), '[]'::json),
+        'services', COALESCE((
+            SELECT json_agg(json_build_object('id', id, 'title', title) ORDER BY position)
+            FROM service_axis
+        ), '[]'::json),
+        'currency', (SELECT currency FROM default_currency),
+        'prices', COALESCE((SELECT json_agg(prices ORDER BY brand_position) FROM grid), '[]'::json),
+        'price_ids', COALESCE((SELECT json_agg(price_ids ORDER BY brand_position) FROM grid), '[]'::json),
+        'currencies', COALESCE((SELECT json_agg(currencies ORDER BY brand_position) FROM grid), '[]'::json)
+    )::text
+"""
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
-    Business: Manage service prices - get, create, update, delete operations
-    Args: event with httpMethod, body with price data
-    Returns: HTTP response with operation result
+    Business: Manage service prices - get, create, update, delete operations; bulk import of CSV/JSON rows; percentage or fixed adjustments
+    Args: event with httpMethod, body with price data; GET ?view=matrix returns a brand x service price matrix; POST with rows, csv or a text/csv body imports many prices at once; PATCH with brand_ids/service_ids, percent or delta, round_to, rounding, dry_run
+    Returns: HTTP response with operation result; import returns inserted/updated/unchanged counts, rejected lines and changed prices; PATCH returns old and new prices
     '''
-    method: str = event.get('httpMethod', 'GET')
+    return router(event, context)
+
+# GET all prices with brand and service names
+@router.get
+def list_prices(event: Dict[str, Any], context: Any) -> Any:
+    params = query_params(event)
+    if params.get('view') == 'matrix':
+        return price_matrix(event)
+    brand_id = params.get('brand_id')
+    service_id = params.get('service_id')
     
-    # Handle CORS OPTIONS request
-    if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-User-Id, X-Auth-Token, X-Session-Id',
-                'Access-Control-Max-Age': '86400'
-            },
-            'body': ''
-        }
+    query = """
+        SELECT 
+            sp.id, sp.service_id, sp.brand_id, sp.model_id,
+            sp.base_price, sp.currency, sp.created_at, sp.updated_at,
+            s.title as service_title,
+            b.name as brand_name
+        FROM service_prices sp
+        JOIN services s ON sp.service_id = s.id
+        JOIN brands b ON sp.brand_id = b.id
+        WHERE 1=1
+    """
     
-    try:
-        dsn = os.environ.get('DATABASE_URL')
-        if not dsn:
-            raise Exception('DATABASE_URL not configured')
-        
-        conn = psycopg2.connect(dsn)
+    params_list = []
+    if brand_id:
+        query += " AND sp.brand_id = %s"
+        params_list.append(brand_id)
+    if service_id:
+        query += " AND sp.service_id = %s"
+        params_list.append(service_id)
+    
+    query += " ORDER BY b.name, s.title"
+    
+    with db.connection() as conn:
         cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute(query, params_list)
+        rows = cur.fetchall()
+        cur.close()
+    
+    return {
+        'prices': rows,
+        'total': len(rows)
+    }
+
+def price_matrix(event: Dict[str, Any]) -> Response:
+    with db.connection() as conn:
+        version = db.content_version(conn, 'catalog')
+        etag = make_etag('price-matrix', version)
+        cached = not_modified(event, etag)
+        if cached:
+            return cached
+
+        cur = conn.cursor()
+        cur.execute(PRICE_MATRIX_SQL)
+        body = cur.fetchone()[0]
+        cur.close()
+
+    return Response(body=body, etag=etag)
+
+# CREATE new price or bulk import
+@router.post
+def create_price(event: Dict[str, Any], context: Any) -> Response:
+    if price_import.is_csv(event):
+        return import_prices(price_import.read_rows(event, None))
+    body_data = json_body(event)
+    if 'rows' in body_data or 'csv' in body_data:
+        return import_prices(price_import.read_rows(event, body_data))
+    service_id = body_data.get('service_id')
+    brand_id = body_data.get('brand_id')
+    base_price = body_data.get('base_price')
+    currency = (body_data.get('currency') or price_import.DEFAULT_CURRENCY).strip()
+    
+    if not service_id or not brand_id or base_price is None:
+        raise HttpError(400, 'service_id, brand_id и base_price обязательны')
+    
+    with db.connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute(
+            """
+            INSERT INTO service_prices (service_id, brand_id, base_price, currency)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (service_id, (COALESCE(brand_id, 0)), (COALESCE(model_id, 0))) DO UPDATE
+            SET base_price = EXCLUDED.base_price,
+                currency = EXCLUDED.currency,
+                updated_at = CURRENT_TIMESTAMP
+            RETURNING id, service_id, brand_id, base_price, currency
+            """,
+            (service_id, brand_id, base_price, currency)
+        )
         
-        # GET all prices with brand and service names
-        if method == 'GET':
-            params = event.get('queryStringParameters') or {}
-            brand_id = params.get('brand_id')
-            service_id = params.get('service_id')
-            
-            query = """
-                SELECT 
-                    sp.id, sp.service_id, sp.brand_id, sp.model_id,
-                    sp.base_price, sp.currency, sp.created_at, sp.updated_at,
-                    s.title as service_title,
-                    b.name as brand_name
-                FROM service_prices sp
-                JOIN services s ON sp.service_id = s.id
-                JOIN brands b ON sp.brand_id = b.id
-                WHERE 1=1
+        result = cur.fetchone()
+        conn.commit()
+        cur.close()
+    
+    return Response({
+        'success': True,
+        'price': result,
+        'message': 'Цена сохранена'
+    }, status=201)
+
+def import_prices(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    with db.connection() as conn:
+        summary = price_import.apply(conn, rows)
+        conn.commit()
+
+    return {
+        'success': True,
+        **summary,
+        'message': f"Загружено цен: {summary['inserted']} новых, {summary['updated']} изменено"
+    }
+
+# UPDATE existing price
+@router.put
+def update_price(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    body_data = json_body(event)
+    price_id = body_data.get('id')
+    base_price = body_data.get('base_price')
+    
+    if not price_id or base_price is None:
+        raise HttpError(400, 'ID и base_price обязательны')
+    
+    with db.connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute(
             """
-            
-            params_list = []
-            if brand_id:
-                query += " AND sp.brand_id = %s"
-                params_list.append(brand_id)
-            if service_id:
-                query += " AND sp.service_id = %s"
-                params_list.append(service_id)
-            
-            query += " ORDER BY b.name, s.title"
-            
-            if params_list:
-                cur.execute(query, params_list)
-            else:
-                cur.execute(query)
-            
-            rows = cur.fetchall()
-            
-            prices = []
-            for row in rows:
-                price = dict(row)
-                if price.get('created_at'):
-                    price['created_at'] = price['created_at'].isoformat()
-                if price.get('updated_at'):
-                    price['updated_at'] = price['updated_at'].isoformat()
-                if isinstance(price.get('base_price'), Decimal):
-                    price['base_price'] = float(price['base_price'])
-                prices.append(price)
-            
-            cur.close()
-            conn.close()
-            
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'isBase64Encoded': False,
-                'body': json.dumps({
-                    'prices': prices,
-                    'total': len(prices)
-                })
-            }
+            UPDATE service_prices
+            SET base_price = %s, updated_at = CURRENT_TIMESTAMP
+            WHERE id = %s
+            RETURNING id, service_id, brand_id, base_price, currency
+            """,
+            (base_price, price_id)
+        )
         
-        # CREATE new price
-        elif method == 'POST':
-            body_data = json.loads(event.get('body', '{}'))
-            service_id = body_data.get('service_id')
-            brand_id = body_data.get('brand_id')
-            base_price = body_data.get('base_price')
-            currency = body_data.get('currency', 'RUB').strip()
-            
-            if not service_id or not brand_id or base_price is None:
-                return {
-                    'statusCode': 400,
-                    'headers': {
-                        'Content-Type': 'application/json',
-                        'Access-Control-Allow-Origin': '*'
-                    },
-                    'body': json.dumps({'error': 'service_id, brand_id и base_price обязательны'})
-                }
-            
-            cur.execute(
-                """
-                INSERT INTO service_prices (service_id, brand_id, base_price, currency)
-                VALUES (%s, %s, %s, %s)
-                RETURNING id, service_id, brand_id, base_price, currency
-                """,
-                (service_id, brand_id, base_price, currency)
-            )
-            
-            result = cur.fetchone()
-            conn.commit()
-            cur.close()
-            conn.close()
-            
-            price_data = dict(result)
-            if isinstance(price_data.get('base_price'), Decimal):
-                price_data['base_price'] = float(price_data['base_price'])
-            
-            return {
-                'statusCode': 201,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'isBase64Encoded': False,
-                'body': json.dumps({
-                    'success': True,
-                    'price': price_data,
-                    'message': 'Цена создана'
-                })
-            }
+        result = cur.fetchone()
         
-        # UPDATE existing price
-        elif method == 'PUT':
-            body_data = json.loads(event.get('body', '{}'))
-            price_id = body_data.get('id')
-            base_price = body_data.get('base_price')
-            
-            if not price_id or base_price is None:
-                return {
-                    'statusCode': 400,
-                    'headers': {
-                        'Content-Type': 'application/json',
-                        'Access-Control-Allow-Origin': '*'
-                    },
-                    'body': json.dumps({'error': 'ID и base_price обязательны'})
-                }
-            
-            cur.execute(
-                """
-                UPDATE service_prices
-                SET base_price = %s, updated_at = CURRENT_TIMESTAMP
-                WHERE id = %s
-                RETURNING id, service_id, brand_id, base_price, currency
-                """,
-                (base_price, price_id)
-            )
-            
-            result = cur.fetchone()
-            
-            if not result:
-                cur.close()
-                conn.close()
-                return {
-                    'statusCode': 404,
-                    'headers': {
-                        'Content-Type': 'application/json',
-                        'Access-Control-Allow-Origin': '*'
-                    },
-                    'body': json.dumps({'error': 'Цена не найдена'})
-                }
-            
-            conn.commit()
-            cur.close()
-            conn.close()
-            
-            price_data = dict(result)
-            if isinstance(price_data.get('base_price'), Decimal):
-                price_data['base_price'] = float(price_data['base_price'])
-            
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'isBase64Encoded': False,
-                'body': json.dumps({
-                    'success': True,
-                    'price': price_data,
-                    'message': 'Цена обновлена'
-                })
-            }
+        if not result:
+            raise HttpError(404, 'Цена не найдена')
         
-        # DELETE price
-        elif method == 'DELETE':
-            body_data = json.loads(event.get('body', '{}'))
-            price_id = body_data.get('id')
-            
-            if not price_id:
-                return {
-                    'statusCode': 400,
-                    'headers': {
-                        'Content-Type': 'application/json',
-                        'Access-Control-Allow-Origin': '*'
-                    },
-                    'body': json.dumps({'error': 'ID цены обязателен'})
-                }
-            
-            cur.execute("DELETE FROM service_prices WHERE id = %s RETURNING id", (price_id,))
-            result = cur.fetchone()
-            
-            if not result:
-                cur.close()
-                conn.close()
-                return {
-                    'statusCode': 404,
-                    'headers': {
-                        'Content-Type': 'application/json',
-                        'Access-Control-Allow-Origin': '*'
-                    },
-                    'body': json.dumps({'error': 'Цена не найдена'})
-                }
-            
+        conn.commit()
+        cur.close()
+    
+    return {
+        'success': True,
+        'price': result,
+        'message': 'Цена обновлена'
+    }
+
+# ADJUST prices by percent or delta
+@router.route('PATCH')
+def adjust_prices(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    params = price_adjust.parse(json_body(event))
+
+    with db.connection() as conn:
+        result = price_adjust.apply(conn, params)
+        if not params['dry_run']:
             conn.commit()
-            cur.close()
-            conn.close()
-            
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'isBase64Encoded': False,
-                'body': json.dumps({
-                    'success': True,
-                    'message': 'Цена удалена'
-                })
-            }
+
+    return {
+        'success': True,
+        **result,
+        'message': 'Предпросмотр изменения цен' if params['dry_run'] else f"Изменено цен: {result['changed']}"
+    }
+
+# DELETE price
+@router.delete
+def delete_price(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    body_data = json_body(event)
+    price_id = body_data.get('id')
+    
+    if not price_id:
+        raise HttpError(400, 'ID цены обязателен')
+    
+    with db.connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        cur.execute("DELETE FROM service_prices WHERE id = %s RETURNING id", (price_id,))
+        result = cur.fetchone()
         
-        else:
-            return {
-                'statusCode': 405,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({'error': 'Method not allowed'})
-            }
+        if not result:
+            raise HttpError(404, 'Цена не найдена')
         
-    except json.JSONDecodeError:
-        return {
-            'statusCode': 400,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Неверный формат данных'})
-        }
-    except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': f'Ошибка сервера: {str(e)}'})
-        }
\ No newline at end of file
+        conn.commit()
+        cur.close()
+    
+    return {
+        'success': True,
+        'message': 'Цена удалена'
+    }
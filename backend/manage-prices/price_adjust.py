@@ -0,0 +1,138 @@
+'''
+Массовое изменение цен на процент или фиксированную сумму с округлением:
+один UPDATE ... RETURNING по фильтру брендов/услуг, в режиме dry_run — тот же
+расчёт через SELECT без записи.
+'''
+
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+from runtime import HttpError
+
+ROUNDING_MODES = ('nearest', 'up', 'down')
+MAX_PRICE = Decimal('99999999.99')
+
+
+def _ids(body_data: Dict[str, Any], single: str, plural: str) -> List[int]:
+    raw = body_data.get(plural)
+    if raw is None:
+        raw = [body_data[single]] if body_data.get(single) is not None else []
+    if not isinstance(raw, list):
+        raise HttpError(400, f'{plural} должен быть списком')
+    try:
+        return [int(value) for value in raw]
+    except (TypeError, ValueError):
+        raise HttpError(400, f'{plural} должен содержать числовые ID')
+
+
+def _decimal(value: Any, name: str) -> Decimal:
+    try:
+        number = Decimal(str(value).replace(' ', '').replace(',', '.'))
+    except InvalidOperation:
+        raise HttpError(400, f'{name} должен быть числом')
+    if not number.is_finite():
+        raise HttpError(400, f'{name} должен быть числом')
+    return number
+
+
+def parse(body_data: Dict[str, Any]) -> Dict[str, Any]:
+    '''Проверяет параметры: фильтры, percent или delta, шаг и режим округления'''
+    brand_ids = _ids(body_data, 'brand_id', 'brand_ids')
+    service_ids = _ids(body_data, 'service_id', 'service_ids')
+    if not brand_ids and not service_ids and body_data.get('all') is not True:
+        raise HttpError(400, 'Укажите brand_ids, service_ids или all: true для всех цен')
+
+    has_percent = body_data.get('percent') is not None
+    has_delta = body_data.get('delta') is not None
+    if has_percent == has_delta:
+        raise HttpError(400, 'Укажите либо percent, либо delta')
+    percent = _decimal(body_data['percent'], 'percent') if has_percent else Decimal(0)
+    delta = _decimal(body_data['delta'], 'delta') if has_delta else Decimal(0)
+    if percent <= -100:
+        raise HttpError(400, 'percent должен быть больше -100')
+
+    round_to = _decimal(body_data.get('round_to', '1'), 'round_to')
+    if round_to <= 0:
+        raise HttpError(400, 'round_to должен быть больше нуля')
+    rounding = body_data.get('rounding', 'nearest')
+    if rounding not in ROUNDING_MODES:
+        raise HttpError(400, f"rounding: одно из {', '.join(ROUNDING_MODES)}")
+
+    return {
+        'brand_ids': brand_ids,
+        'service_ids': service_ids,
+        'percent': percent,
+        'delta': delta,
+        'round_to': round_to,
+        'rounding': rounding,
+        'dry_run': body_data.get('dry_run') is True
+    }
+
+
+def _target_sql(params: Dict[str, Any], lock: bool) -> str:
+    clauses: List[str] = []
+    if params['brand_ids']:
+        clauses.append('sp.brand_id = ANY(%(brand_ids)s)')
+    if params['service_ids']:
+        clauses.append('sp.service_id = ANY(%(service_ids)s)')
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    # Округление до шага round_to; цена не уходит в минус
+    return f"""
+        SELECT sp.id, sp.service_id, sp.brand_id, sp.model_id,
+               s.title AS service_title, b.name AS brand_name,
+               sp.base_price AS old_price,
+               GREATEST(
+                   CASE %(rounding)s
+                       WHEN 'up' THEN ceil(raw.price / %(round_to)s) * %(round_to)s
+                       WHEN 'down' THEN floor(raw.price / %(round_to)s) * %(round_to)s
+                       ELSE round(raw.price / %(round_to)s) * %(round_to)s
+                   END,
+                   0
+               )::NUMERIC(10, 2) AS new_price
+        FROM service_prices sp
+        JOIN services s ON s.id = sp.service_id
+        LEFT JOIN brands b ON b.id = sp.brand_id
+        CROSS JOIN LATERAL (
+            SELECT sp.base_price * (1 + %(percent)s / 100.0) + %(delta)s AS price
+        ) raw
+        {where}
+        {'FOR UPDATE OF sp' if lock else ''}
+    """
+
+
+def apply(conn: Any, params: Dict[str, Any]) -> Dict[str, Any]:
+    '''Изменённые цены (было/стало); без dry_run записывает их в текущей транзакции'''
+    target_sql = _target_sql(params, lock=not params['dry_run'])
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        if params['dry_run']:
+            cur.execute(f"""
+                SELECT * FROM ({target_sql}) target
+                WHERE new_price <> old_price
+                ORDER BY brand_name NULLS FIRST, service_title, id
+            """, params)
+        else:
+            cur.execute(f"""
+                WITH target AS ({target_sql})
+                UPDATE service_prices sp
+                SET base_price = target.new_price, updated_at = CURRENT_TIMESTAMP
+                FROM target
+                WHERE sp.id = target.id AND target.new_price <> target.old_price
+                RETURNING sp.id, sp.service_id, sp.brand_id, sp.model_id,
+                          target.service_title, target.brand_name,
+                          target.old_price, target.new_price
+            """, params)
+    except psycopg2.errors.NumericValueOutOfRange:
+        raise HttpError(400, f'Новая цена больше допустимой ({MAX_PRICE})')
+    rows = cur.fetchall()
+    cur.close()
+    if not params['dry_run']:
+        rows.sort(key=lambda row: (row['brand_name'] or '', row['service_title'], row['id']))
+    return {
+        'dry_run': params['dry_run'],
+        'changed': len(rows),
+        'prices': rows
+    }
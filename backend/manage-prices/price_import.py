@@ -0,0 +1,243 @@
+'''
+Массовая загрузка цен: строки из CSV или JSON копируются через COPY во
+временную таблицу, услуги/бренды/модели сопоставляются одним запросом, и всё
+применяется одним INSERT ... ON CONFLICT по ключу uq_service_prices_key (V0021).
+'''
+
+import base64
+import csv
+import io
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Tuple
+
+from runtime import HttpError, header
+
+MAX_ROWS = 10000
+DEFAULT_CURRENCY = '₽'
+
+# Колонки CSV и ключи JSON: id или название/slug
+FIELD_ALIASES = {
+    'service': ('service_id', 'service'),
+    'brand': ('brand_id', 'brand'),
+    'model': ('model_id', 'model'),
+    'base_price': ('base_price', 'price'),
+    'currency': ('currency',)
+}
+
+
+def is_csv(event: Dict[str, Any]) -> bool:
+    return header(event, 'Content-Type').split(';')[0].strip().lower() == 'text/csv'
+
+
+def csv_rows(text: str) -> List[Dict[str, Any]]:
+    return list(csv.DictReader(io.StringIO(text.lstrip('\ufeff'))))
+
+
+def read_rows(event: Dict[str, Any], body_data: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    '''Строки загрузки: тело text/csv, {"csv": "..."} или {"rows": [{...}]}'''
+    if body_data is None:
+        body = event.get('body') or ''
+        if event.get('isBase64Encoded'):
+            body = base64.b64decode(body).decode('utf-8')
+        rows = csv_rows(body)
+    elif 'csv' in body_data:
+        rows = csv_rows(str(body_data['csv']))
+    else:
+        rows = body_data.get('rows')
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise HttpError(400, 'rows должен быть списком объектов')
+
+    if not rows:
+        raise HttpError(400, 'Нет строк для загрузки')
+    if len(rows) > MAX_ROWS:
+        raise HttpError(400, f'Не больше {MAX_ROWS} строк за раз')
+    return rows
+
+
+def _field(row: Dict[str, Any], name: str) -> Optional[str]:
+    for alias in FIELD_ALIASES[name]:
+        value = row.get(alias)
+        if value is not None and str(value).strip():
+            return str(value).strip()
+    return None
+
+
+def normalize(rows: List[Dict[str, Any]]) -> Tuple[List[Tuple[Any, ...]], List[Dict[str, Any]]]:
+    '''Строки для COPY (line, service, brand, model, base_price, currency) и отклонённые с причиной'''
+    staged: List[Tuple[Any, ...]] = []
+    rejected: List[Dict[str, Any]] = []
+    for line, row in enumerate(rows, start=1):
+        service = _field(row, 'service')
+        brand = _field(row, 'brand')
+        model = _field(row, 'model')
+        raw_price = _field(row, 'base_price')
+        currency = _field(row, 'currency')
+
+        try:
+            price = Decimal(raw_price.replace(' ', '').replace(',', '.')) if raw_price else None
+        except InvalidOperation:
+            price = None
+
+        if not service:
+            rejected.append({'line': line, 'error': 'Не указана услуга'})
+        elif price is None or not price.is_finite() or price < 0 or price >= Decimal('1e8'):
+            rejected.append({'line': line, 'error': 'Неверная цена'})
+        elif model and not brand:
+            rejected.append({'line': line, 'error': 'Модель указывается вместе с брендом'})
+        elif currency and len(currency) > 10:
+            rejected.append({'line': line, 'error': 'Неверная валюта'})
+        else:
+            staged.append((line, service, brand, model, price.quantize(Decimal('0.01')), currency))
+    return staged, rejected
+
+
+def _copy(cur: Any, staged: List[Tuple[Any, ...]]) -> None:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for line, service, brand, model, price, currency in staged:
+        # Пустое поле без кавычек в COPY CSV — NULL
+        writer.writerow([line, service, brand or '', model or '', price, currency or ''])
+    buffer.seek(0)
+    cur.copy_expert(
+        'COPY price_import (line, service, brand, model, base_price, currency) FROM STDIN WITH (FORMAT csv)',
+        buffer
+    )
+
+
+def apply(conn: Any, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    '''Загружает строки в текущей транзакции (коммит — за вызывающим) и возвращает сводку изменений'''
+    staged, rejected = normalize(rows)
+    cur = conn.cursor()
+    cur.execute("""
+        CREATE TEMP TABLE price_import (
+            line INTEGER NOT NULL,
+            service TEXT NOT NULL,
+            brand TEXT,
+            model TEXT,
+            base_price NUMERIC(10, 2) NOT NULL,
+            currency VARCHAR(10)
+        ) ON COMMIT DROP
+    """)
+    _copy(cur, staged)
+
+    # id или название/slug; модель ищется только внутри своего бренда
+    cur.execute("""
+        CREATE TEMP TABLE price_import_resolved ON COMMIT DROP AS
+        SELECT i.line, i.service, i.brand, i.model, i.base_price, i.currency,
+               s.id AS service_id, b.id AS brand_id, m.id AS model_id
+        FROM price_import i
+        LEFT JOIN LATERAL (
+            SELECT id FROM services
+            WHERE id = CASE WHEN i.service ~ '^[0-9]{1,9}$' THEN i.service::integer END
+               OR title = i.service
+            ORDER BY id
+            LIMIT 1
+        ) s ON true
+        LEFT JOIN LATERAL (
+            SELECT id FROM brands
+            WHERE id = CASE WHEN i.brand ~ '^[0-9]{1,9}$' THEN i.brand::integer END
+               OR slug = i.brand OR name = i.brand
+            LIMIT 1
+        ) b ON true
+        LEFT JOIN LATERAL (
+            SELECT id FROM models
+            WHERE brand_id = b.id
+              AND (id = CASE WHEN i.model ~ '^[0-9]{1,9}$' THEN i.model::integer END OR name = i.model)
+            LIMIT 1
+        ) m ON true
+    """)
+
+    cur.execute("""
+        SELECT line,
+               CASE WHEN service_id IS NULL THEN 'Услуга не найдена: ' || service
+                    WHEN brand IS NOT NULL AND brand_id IS NULL THEN 'Бренд не найден: ' || brand
+                    ELSE 'Модель не найдена: ' || model
+               END AS error
+        FROM price_import_resolved
+        WHERE service_id IS NULL
+           OR (brand IS NOT NULL AND brand_id IS NULL)
+           OR (model IS NOT NULL AND model_id IS NULL)
+        ORDER BY line
+    """)
+    rejected.extend({'line': line, 'error': error} for line, error in cur.fetchall())
+    rejected.sort(key=lambda item: item['line'])
+
+    # Повтор ключа в загрузке: действует последняя строка. Валюта не указана —
+    # остаётся прежняя; previous читает снимок до вставки, это старые значения
+    cur.execute("""
+        WITH incoming AS (
+            SELECT DISTINCT ON (service_id, COALESCE(brand_id, 0), COALESCE(model_id, 0))
+                   service_id, brand_id, model_id, base_price, currency
+            FROM price_import_resolved
+            WHERE service_id IS NOT NULL
+              AND (brand IS NULL OR brand_id IS NOT NULL)
+              AND (model IS NULL OR model_id IS NOT NULL)
+            ORDER BY service_id, COALESCE(brand_id, 0), COALESCE(model_id, 0), line DESC
+        ),
+        previous AS (
+            SELECT sp.id, sp.service_id, sp.brand_id, sp.model_id, sp.base_price, sp.currency
+            FROM service_prices sp
+            JOIN incoming i
+              ON sp.service_id = i.service_id
+             AND COALESCE(sp.brand_id, 0) = COALESCE(i.brand_id, 0)
+             AND COALESCE(sp.model_id, 0) = COALESCE(i.model_id, 0)
+        ),
+        upserted AS (
+            INSERT INTO service_prices (service_id, brand_id, model_id, base_price, currency)
+            SELECT i.service_id, i.brand_id, i.model_id, i.base_price, COALESCE(i.currency, p.currency, %s)
+            FROM incoming i
+            LEFT JOIN previous p
+              ON p.service_id = i.service_id
+             AND COALESCE(p.brand_id, 0) = COALESCE(i.brand_id, 0)
+             AND COALESCE(p.model_id, 0) = COALESCE(i.model_id, 0)
+            ON CONFLICT (service_id, (COALESCE(brand_id, 0)), (COALESCE(model_id, 0))) DO UPDATE
+            SET base_price = EXCLUDED.base_price,
+                currency = EXCLUDED.currency,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE (service_prices.base_price, service_prices.currency)
+                  IS DISTINCT FROM (EXCLUDED.base_price, EXCLUDED.currency)
+            RETURNING service_prices.id, service_prices.service_id, service_prices.brand_id,
+                      service_prices.model_id, service_prices.base_price, service_prices.currency,
+                      (xmax = 0) AS inserted
+        )
+        SELECT u.id, u.service_id, u.brand_id, u.model_id, u.base_price, u.currency, u.inserted,
+               p.base_price AS old_price, p.currency AS old_currency
+        FROM upserted u
+        LEFT JOIN previous p ON p.id = u.id
+        ORDER BY u.service_id, u.brand_id NULLS FIRST, u.model_id NULLS FIRST
+    """, (DEFAULT_CURRENCY,))
+    result = cur.fetchall()
+    cur.execute("""
+        SELECT COUNT(*) FROM (
+            SELECT DISTINCT service_id, COALESCE(brand_id, 0), COALESCE(model_id, 0)
+            FROM price_import_resolved
+            WHERE service_id IS NOT NULL
+              AND (brand IS NULL OR brand_id IS NOT NULL)
+              AND (model IS NULL OR model_id IS NOT NULL)
+        ) keys
+    """)
+    distinct_keys = cur.fetchone()[0]
+    cur.close()
+
+    changes = [{
+        'id': price_id,
+        'service_id': service_id,
+        'brand_id': brand_id,
+        'model_id': model_id,
+        'base_price': base_price,
+        'currency': currency,
+        'old_price': None if inserted else old_price,
+        'old_currency': None if inserted else old_currency
+    } for price_id, service_id, brand_id, model_id, base_price, currency, inserted, old_price, old_currency in result]
+    inserted = sum(1 for change in result if change[6])
+    accepted = len(rows) - len(rejected)
+
+    return {
+        'received': len(rows),
+        'inserted': inserted,
+        'updated': len(result) - inserted,
+        'unchanged': distinct_keys - len(result),
+        'duplicates': accepted - distinct_keys,
+        'rejected': rejected,
+        'changes': changes
+    }
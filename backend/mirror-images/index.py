@@ -0,0 +1,210 @@
+import hashlib
+import os
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+import boto3
+from psycopg2.extras import execute_values
+
+import db
+from runtime import Router, HttpError
+
+router = Router(default_method='POST')
+
+# Хосты, с которых копируем картинки; свои (cdn.poehali.dev, бакет) не трогаем
+MIRROR_HOSTS = [
+    host.strip().lower()
+    for host in os.environ.get('MIRROR_HOSTS', 'avtologo.ru,via.placeholder.com,picsum.photos').split(',')
+    if host.strip()
+]
+MIRROR_PREFIX = os.environ.get('MIRROR_PREFIX', 'mirror').strip('/')
+MIRROR_BATCH_SIZE = int(os.environ.get('MIRROR_BATCH_SIZE', '50'))
+MIRROR_WORKERS = int(os.environ.get('MIRROR_WORKERS', '4'))
+MIRROR_TIMEOUT = float(os.environ.get('MIRROR_TIMEOUT', '10'))
+MIRROR_RETRY_HOURS = int(os.environ.get('MIRROR_RETRY_HOURS', '24'))
+MAX_IMAGE_BYTES = 5 * 1024 * 1024
+
+EXTENSIONS = {
+    'image/png': 'png',
+    'image/jpeg': 'jpg',
+    'image/gif': 'gif',
+    'image/svg+xml': 'svg',
+    'image/webp': 'webp'
+}
+
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    '''
+    Business: Копирует внешние картинки (логотипы брендов, обложки статей) в S3 и подменяет ссылки в базе
+    Args: event - HTTP запрос или вызов по расписанию
+    Returns: HTTP response со счётчиками скопированных, ошибочных и переписанных ссылок
+    '''
+    return router(event, context)
+
+def _s3_client() -> Any:
+    s3_access_key = os.environ.get('S3_ACCESS_KEY')
+    s3_secret_key = os.environ.get('S3_SECRET_KEY')
+    if not s3_access_key or not s3_secret_key:
+        raise HttpError(500, 'S3 credentials not configured')
+    return boto3.client(
+        's3',
+        endpoint_url=os.environ.get('S3_ENDPOINT', 'https://storage.yandexcloud.net'),
+        aws_access_key_id=s3_access_key,
+        aws_secret_access_key=s3_secret_key,
+        region_name=os.environ.get('S3_REGION', 'ru-central1')
+    )
+
+def fetch(url: str) -> Tuple[Optional[bytes], Optional[str], Optional[str]]:
+    '''Содержимое и тип картинки или текст ошибки; редиректы (picsum) проходятся'''
+    req = urllib.request.Request(url, headers={'User-Agent': 'hybrid24-mirror/1.0'})
+    try:
+        with urllib.request.urlopen(req, timeout=MIRROR_TIMEOUT) as response:
+            content_type = response.headers.get_content_type()
+            data = response.read(MAX_IMAGE_BYTES + 1)
+    except Exception as e:
+        return None, None, str(e) or type(e).__name__
+    if content_type not in EXTENSIONS:
+        return None, None, f'Не картинка: {content_type}'
+    if len(data) > MAX_IMAGE_BYTES:
+        return None, None, 'Больше 5 МБ'
+    return data, content_type, None
+
+def put_image(s3_client: Any, bucket: str, key: str, data: bytes, content_type: str) -> Optional[str]:
+    '''Кладёт картинку в бакет; None или текст ошибки'''
+    try:
+        s3_client.put_object(
+            Bucket=bucket,
+            Key=key,
+            Body=data,
+            ContentType=content_type,
+            CacheControl='public, max-age=31536000, immutable',
+            ACL='public-read'
+        )
+    except Exception as e:
+        return str(e)
+    return None
+
+def pending_urls(conn: Any) -> List[str]:
+    '''Внешние ссылки без копии; неудачные — не чаще раза в MIRROR_RETRY_HOURS'''
+    cur = conn.cursor()
+    cur.execute("""
+        SELECT u.url
+        FROM (
+            SELECT logo_url AS url FROM brands
+            UNION
+            SELECT image FROM blog_posts
+        ) u
+        LEFT JOIN mirrored_images m ON m.source_url = u.url
+        WHERE lower(substring(u.url from '^https?://([^/:?#]+)')) = ANY(%s)
+          AND (m.source_url IS NULL
+               OR (m.mirrored_url IS NULL
+                   AND m.checked_at < CURRENT_TIMESTAMP - %s * interval '1 hour'))
+        ORDER BY u.url
+        LIMIT %s
+    """, (MIRROR_HOSTS, MIRROR_RETRY_HOURS, MIRROR_BATCH_SIZE))
+    urls = [row[0] for row in cur.fetchall()]
+    cur.close()
+    return urls
+
+@router.route('GET', 'POST')
+def mirror_images(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    s3_client = _s3_client()
+    s3_bucket = os.environ.get('S3_BUCKET', 'poehali-uploads')
+    s3_endpoint = os.environ.get('S3_ENDPOINT', 'https://storage.yandexcloud.net')
+
+    # Соединение не держим, пока качаем картинки
+    with db.connection() as conn:
+        urls = pending_urls(conn)
+        conn.commit()
+
+    fetched: Dict[str, Tuple[Optional[bytes], Optional[str], Optional[str]]] = {}
+    if urls:
+        with ThreadPoolExecutor(max_workers=min(MIRROR_WORKERS, len(urls))) as pool:
+            fetched = dict(zip(urls, pool.map(fetch, urls)))
+
+    # Ключ — хеш содержимого: одинаковые картинки с разных адресов хранятся один раз
+    objects: Dict[str, Tuple[bytes, str, str]] = {}
+    uploads: List[Tuple[str, bytes, str]] = []
+    records: List[Tuple[Any, ...]] = []
+    for url in urls:
+        data, content_type, error = fetched[url]
+        if data is None:
+            records.append((url, None, None, None, None, error))
+            continue
+        digest = hashlib.sha256(data).hexdigest()
+        key = f'{MIRROR_PREFIX}/{digest}.{EXTENSIONS[content_type]}'
+        objects[key] = (data, content_type, digest)
+        records.append((url, f'{s3_endpoint}/{s3_bucket}/{key}', digest, content_type, len(data), None))
+
+    if objects:
+        with db.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                'SELECT DISTINCT content_hash FROM mirrored_images WHERE content_hash = ANY(%s) AND mirrored_url IS NOT NULL',
+                ([digest for _, _, digest in objects.values()],)
+            )
+            stored = {row[0] for row in cur.fetchall()}
+            conn.commit()
+            cur.close()
+        uploads = [(key, data, content_type) for key, (data, content_type, digest) in objects.items()
+                   if digest not in stored]
+
+    # Загрузка в S3 тоже без соединения: оно берётся снова только для записи результатов
+    if uploads:
+        with ThreadPoolExecutor(max_workers=min(MIRROR_WORKERS, len(uploads))) as pool:
+            results = pool.map(lambda item: put_image(s3_client, s3_bucket, *item), uploads)
+            failed = {
+                f'{s3_endpoint}/{s3_bucket}/{key}': error
+                for (key, _, _), error in zip(uploads, results) if error
+            }
+        records = [
+            (url, None, None, None, None, f'Ошибка загрузки в S3: {failed[mirrored_url]}')
+            if mirrored_url in failed else (url, mirrored_url, digest, content_type, size, error)
+            for url, mirrored_url, digest, content_type, size, error in records
+        ]
+
+    with db.connection() as conn:
+        cur = conn.cursor()
+        if records:
+            execute_values(cur, """
+                INSERT INTO mirrored_images
+                    (source_url, mirrored_url, content_hash, content_type, size_bytes, last_error, attempts, checked_at)
+                VALUES %s
+                ON CONFLICT (source_url) DO UPDATE
+                SET mirrored_url = EXCLUDED.mirrored_url,
+                    content_hash = EXCLUDED.content_hash,
+                    content_type = EXCLUDED.content_type,
+                    size_bytes = EXCLUDED.size_bytes,
+                    last_error = EXCLUDED.last_error,
+                    attempts = mirrored_images.attempts + 1,
+                    checked_at = EXCLUDED.checked_at
+            """, records, template='(%s, %s, %s, %s, %s, %s, 1, CURRENT_TIMESTAMP)')
+
+        # Переписываем все ссылки с готовой копией, в том числе скопированные раньше
+        cur.execute("""
+            UPDATE brands b
+            SET logo_url = m.mirrored_url
+            FROM mirrored_images m
+            WHERE b.logo_url = m.source_url AND m.mirrored_url IS NOT NULL
+        """)
+        brands_rewritten = cur.rowcount
+        cur.execute("""
+            UPDATE blog_posts p
+            SET image = m.mirrored_url, updated_at = CURRENT_TIMESTAMP
+            FROM mirrored_images m
+            WHERE p.image = m.source_url AND m.mirrored_url IS NOT NULL
+        """)
+        posts_rewritten = cur.rowcount
+        conn.commit()
+        cur.close()
+
+    errors = [{'url': url, 'error': error} for url, mirrored_url, _, _, _, error in records if mirrored_url is None]
+    return {
+        'success': True,
+        'checked': len(urls),
+        'mirrored': len(urls) - len(errors),
+        'uploaded': len(uploads),
+        'failed': errors,
+        'brands_rewritten': brands_rewritten,
+        'posts_rewritten': posts_rewritten,
+        'more': len(urls) == MIRROR_BATCH_SIZE
+    }
@@ -0,0 +1,202 @@
+import json
+import os
+import smtplib
+import urllib.request
+import urllib.error
+from email.message import EmailMessage
+from typing import Callable, Dict, Any, List, Tuple
+from psycopg2.extras import RealDictCursor
+
+import db
+from runtime import Router
+
+router = Router(allow_headers='Content-Type', default_method='POST')
+
+BATCH_SIZE = int(os.environ.get('NOTIFY_BATCH_SIZE', '20'))
+MAX_BATCHES = int(os.environ.get('NOTIFY_MAX_BATCHES', '10'))
+MAX_ATTEMPTS = int(os.environ.get('NOTIFY_MAX_ATTEMPTS', '8'))
+BACKOFF_BASE_SECONDS = int(os.environ.get('NOTIFY_BACKOFF_BASE', '30'))
+BACKOFF_MAX_SECONDS = 3600
+TELEGRAM_API_URL = os.environ.get('TELEGRAM_API_URL', 'https://api.telegram.org').rstrip('/')
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    '''
+    Отправка уведомлений о новых заявках из booking_outbox по расписанию
+    Забирает пачки через FOR UPDATE SKIP LOCKED, шлёт в Telegram и/или на email,
+    при ошибке откладывает записи с экспоненциальной задержкой
+    '''
+    return router(event, context)
+
+def format_booking(row: Dict[str, Any]) -> str:
+    payload = row['payload']
+    lines = [f"Заявка #{row['booking_id']}: {payload.get('name', '')}, {payload.get('phone', '')}"]
+    car = ' '.join(part for part in (payload.get('brand'), payload.get('model')) if part)
+    if car:
+        lines.append(f'Автомобиль: {car}')
+    if payload.get('service'):
+        lines.append(f"Услуга: {payload['service']}")
+    if payload.get('date'):
+        lines.append(f"Дата: {payload['date']} {payload.get('time', '')}".rstrip())
+    if payload.get('comment'):
+        lines.append(f"Комментарий: {payload['comment']}")
+    return '\n'.join(lines)
+
+def split_messages(blocks: List[str], limit: int) -> List[str]:
+    messages: List[str] = []
+    current = ''
+    for block in blocks:
+        candidate = f'{current}\n\n{block}' if current else block
+        if len(candidate) > limit and current:
+            messages.append(current)
+            candidate = block
+        current = candidate[:limit]
+    if current:
+        messages.append(current)
+    return messages
+
+def send_telegram(text_blocks: List[str]) -> None:
+    token = os.environ['TELEGRAM_BOT_TOKEN']
+    chat_id = os.environ['TELEGRAM_CHAT_ID']
+    for text in split_messages(text_blocks, TELEGRAM_MESSAGE_LIMIT):
+        req = urllib.request.Request(
+            f'{TELEGRAM_API_URL}/bot{token}/sendMessage',
+            method='POST',
+            headers={'Content-Type': 'application/json'},
+            data=json.dumps({'chat_id': chat_id, 'text': text}, ensure_ascii=False).encode('utf-8')
+        )
+        with urllib.request.urlopen(req, timeout=10) as response:
+            result = json.loads(response.read().decode('utf-8'))
+        if not result.get('ok'):
+            raise Exception(f"Telegram: {result.get('description', 'ошибка отправки')}")
+
+def send_email(text_blocks: List[str]) -> None:
+    message = EmailMessage()
+    message['Subject'] = f'Новые заявки: {len(text_blocks)}'
+    message['From'] = os.environ.get('SMTP_FROM') or os.environ.get('SMTP_USER', 'noreply@localhost')
+    message['To'] = os.environ['NOTIFY_EMAIL_TO']
+    message.set_content('\n\n'.join(text_blocks))
+
+    host = os.environ['SMTP_HOST']
+    port = int(os.environ.get('SMTP_PORT', '465'))
+    smtp_class = smtplib.SMTP_SSL if port == 465 else smtplib.SMTP
+    with smtp_class(host, port, timeout=10) as smtp:
+        if port == 587:
+            smtp.starttls()
+        if os.environ.get('SMTP_USER'):
+            smtp.login(os.environ['SMTP_USER'], os.environ.get('SMTP_PASSWORD', ''))
+        smtp.send_message(message)
+
+Channel = Tuple[str, Callable[[List[str]], None]]
+
+def configured_channels() -> List[Channel]:
+    channels: List[Channel] = []
+    if os.environ.get('TELEGRAM_BOT_TOKEN') and os.environ.get('TELEGRAM_CHAT_ID'):
+        channels.append(('telegram', send_telegram))
+    if os.environ.get('SMTP_HOST') and os.environ.get('NOTIFY_EMAIL_TO'):
+        channels.append(('email', send_email))
+    return channels
+
+def process_batch(conn: Any, channels: List[Channel]) -> Dict[str, int]:
+    '''
+    Одна пачка в одной транзакции: строки заблокированы до коммита, параллельный
+    запуск воркера их пропускает (SKIP LOCKED) и берёт следующие.
+    Доставка учитывается по каналам: при повторе запись уходит только туда,
+    где прошлая отправка не удалась
+    '''
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    cur.execute(
+        """
+        SELECT id, booking_id, event, payload, attempts, delivered_channels
+        FROM booking_outbox
+        WHERE status = 'pending' AND next_attempt_at <= CURRENT_TIMESTAMP
+        ORDER BY next_attempt_at, id
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+        """,
+        (BATCH_SIZE,)
+    )
+    rows = cur.fetchall()
+    if not rows:
+        conn.commit()
+        cur.close()
+        return {'claimed': 0, 'sent': 0, 'failed': 0}
+
+    delivered = {row['id']: set(row['delivered_channels']) for row in rows}
+    errors: List[str] = []
+    for name, send in channels:
+        pending = [row for row in rows if name not in delivered[row['id']]]
+        if not pending:
+            continue
+        try:
+            send([format_booking(row) for row in pending])
+        except Exception as e:
+            errors.append(f'{name}: {e}')
+            continue
+        ids = [row['id'] for row in pending]
+        cur.execute(
+            "UPDATE booking_outbox SET delivered_channels = array_append(delivered_channels, %s) WHERE id = ANY(%s)",
+            (name, ids)
+        )
+        for row_id in ids:
+            delivered[row_id].add(name)
+
+    names = {name for name, _ in channels}
+    sent_ids = [row_id for row_id, done in delivered.items() if names <= done]
+    failed_ids = [row_id for row_id, done in delivered.items() if not names <= done]
+
+    if sent_ids:
+        cur.execute(
+            """
+            UPDATE booking_outbox
+            SET status = 'sent', sent_at = CURRENT_TIMESTAMP, attempts = attempts + 1, last_error = NULL
+            WHERE id = ANY(%s)
+            """,
+            (sent_ids,)
+        )
+    if failed_ids:
+        # attempts в SET — значение до увеличения, задержка растёт как base * 2^attempts
+        cur.execute(
+            """
+            UPDATE booking_outbox
+            SET attempts = attempts + 1,
+                last_error = %s,
+                status = CASE WHEN attempts + 1 >= %s THEN 'failed' ELSE 'pending' END,
+                next_attempt_at = CURRENT_TIMESTAMP
+                    + LEAST(%s * power(2, attempts), %s) * interval '1 second'
+            WHERE id = ANY(%s)
+            """,
+            ('; '.join(errors)[:1000], MAX_ATTEMPTS, BACKOFF_BASE_SECONDS, BACKOFF_MAX_SECONDS, failed_ids)
+        )
+    conn.commit()
+    cur.close()
+    return {'claimed': len(rows), 'sent': len(sent_ids), 'failed': len(failed_ids)}
+
+@router.route('GET', 'POST')
+def send_notifications(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    channels = configured_channels()
+    if not channels:
+        # Без каналов записи остаются в outbox и уйдут, когда каналы настроят
+        return {
+            'success': True,
+            'skipped': 'no channels',
+            'claimed': 0,
+            'sent': 0,
+            'failed': 0,
+            'message': 'Каналы уведомлений не настроены: нужен TELEGRAM_BOT_TOKEN/TELEGRAM_CHAT_ID или SMTP_HOST/NOTIFY_EMAIL_TO'
+        }
+
+    totals = {'claimed': 0, 'sent': 0, 'failed': 0}
+    with db.connection() as conn:
+        for _ in range(MAX_BATCHES):
+            stats = process_batch(conn, channels)
+            for name, value in stats.items():
+                totals[name] += value
+            # Пустая пачка или ошибка канала: дальше в этом запуске не пробуем
+            if stats['claimed'] < BATCH_SIZE or stats['failed']:
+                break
+
+    return {
+        'success': True,
+        **totals
+    }
@@ -0,0 +1,138 @@
+import os
+from datetime import datetime
+from typing import Dict, Any, List
+import boto3
+from botocore.exceptions import ClientError
+
+import catalog
+import db
+from runtime import Router, HttpError, dumps, query_params
+
+router = Router(default_method='POST')
+
+CATALOG_PREFIX = os.environ.get('CATALOG_PREFIX', 'catalog').strip('/')
+PUBLISH_BATCH_SIZE = int(os.environ.get('PUBLISH_BATCH_SIZE', '100'))
+
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    '''
+    Business: Выкладывает каталог (бренды, услуги, карточки брендов с ценами) статическими JSON в S3
+    Args: event - HTTP запрос или вызов по расписанию; ?full=1 перевыкладывает все бренды
+    Returns: HTTP response со списком выложенных и удалённых файлов
+    '''
+    return router(event, context)
+
+def _s3_client() -> Any:
+    s3_access_key = os.environ.get('S3_ACCESS_KEY')
+    s3_secret_key = os.environ.get('S3_SECRET_KEY')
+    if not s3_access_key or not s3_secret_key:
+        raise HttpError(500, 'S3 credentials not configured')
+    return boto3.client(
+        's3',
+        endpoint_url=os.environ.get('S3_ENDPOINT', 'https://storage.yandexcloud.net'),
+        aws_access_key_id=s3_access_key,
+        aws_secret_access_key=s3_secret_key,
+        region_name=os.environ.get('S3_REGION', 'ru-central1')
+    )
+
+def _put_json(s3_client: Any, bucket: str, key: str, data: Any) -> None:
+    body = data if isinstance(data, str) else dumps(data)
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=key,
+        Body=body.encode('utf-8'),
+        ContentType='application/json; charset=utf-8',
+        CacheControl='public, max-age=60',
+        ACL='public-read'
+    )
+
+@router.route('GET', 'POST')
+def publish_catalog(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    full = query_params(event).get('full') in ('1', 'true')
+    s3_client = _s3_client()
+    s3_bucket = os.environ.get('S3_BUCKET', 'poehali-uploads')
+    s3_endpoint = os.environ.get('S3_ENDPOINT', 'https://storage.yandexcloud.net')
+
+    with db.connection() as conn:
+        cur = conn.cursor()
+        if full:
+            cur.execute("""
+                INSERT INTO catalog_publish_queue (slug, queued_at)
+                SELECT slug, clock_timestamp() FROM brands
+                ON CONFLICT (slug) DO UPDATE SET queued_at = EXCLUDED.queued_at
+            """)
+            conn.commit()
+
+        cur.execute("""
+            SELECT slug, queued_at
+            FROM catalog_publish_queue
+            ORDER BY queued_at
+            LIMIT %s
+        """, (PUBLISH_BATCH_SIZE,))
+        queued = cur.fetchall()
+        conn.commit()
+
+        if not queued and not full:
+            cur.close()
+            return {
+                'success': True,
+                'published': [],
+                'removed': [],
+                'message': 'Изменений нет'
+            }
+
+        # Очередь читается вне транзакции рендера: запись, поставленная в очередь
+        # во время выкладки, получит новый queued_at и останется на следующий запуск
+        # Снимок задаётся первой командой транзакции, а не set_session: режим
+        # не переживает транзакцию и не уходит в пул вместе с соединением
+        cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+        version = db.content_version(conn, 'catalog')
+        brands = catalog.brands_payload(conn)
+        services = catalog.services_payload(conn)
+        details = catalog.brand_details_json(conn, [slug for slug, _ in queued])
+        conn.commit()
+
+        published: List[str] = []
+        removed: List[str] = []
+        try:
+            for slug, _ in queued:
+                key = f'{CATALOG_PREFIX}/brands/{slug}.json'
+                payload = details.get(slug)
+                if payload is None:
+                    s3_client.delete_object(Bucket=s3_bucket, Key=key)
+                    removed.append(key)
+                else:
+                    _put_json(s3_client, s3_bucket, key, payload)
+                    published.append(key)
+
+            for name, payload in (('brands', brands), ('services', services)):
+                key = f'{CATALOG_PREFIX}/{name}.json'
+                _put_json(s3_client, s3_bucket, key, payload)
+                published.append(key)
+
+            manifest_key = f'{CATALOG_PREFIX}/manifest.json'
+            _put_json(s3_client, s3_bucket, manifest_key, {
+                'version': version,
+                'published_at': datetime.utcnow().isoformat() + 'Z'
+            })
+            published.append(manifest_key)
+        except ClientError as e:
+            raise HttpError(500, f'Ошибка загрузки в S3: {str(e)}', published=published)
+
+        cur.execute("""
+            DELETE FROM catalog_publish_queue q
+            USING unnest(%s::varchar[], %s::timestamp[]) AS done(slug, queued_at)
+            WHERE q.slug = done.slug AND q.queued_at = done.queued_at
+        """, ([slug for slug, _ in queued], [queued_at for _, queued_at in queued]))
+        cur.execute("SELECT COUNT(*) FROM catalog_publish_queue")
+        remaining = cur.fetchone()[0]
+        conn.commit()
+        cur.close()
+
+    return {
+        'success': True,
+        'version': version,
+        'published': published,
+        'removed': removed,
+        'remaining': remaining,
+        'base_url': f'{s3_endpoint}/{s3_bucket}/{CATALOG_PREFIX}'
+    }
@@ -1,82 +1,71 @@
-import json
-import os
-from typing import Dict, Any
-from datetime import datetime
-import psycopg2
+from datetime import date
+from typing import Dict, Any, List
 from psycopg2.extras import RealDictCursor
 
+import db
+import slots
+from runtime import Router, HttpError, json_body
+
+router = Router(default_method='POST')
+
+VALID_STATUSES = ['new', 'confirmed', 'completed', 'cancelled']
+MAX_BATCH_SIZE = 500
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
-    Business: Update booking status in database
-    Args: event with httpMethod POST, body with booking_id and new status
-    Returns: HTTP response with updated booking
+    Business: Update booking status in database, for one booking or a batch
+    Args: event with httpMethod POST, body with booking_id (or booking_ids list) and new status
+    Returns: HTTP response with updated booking, or per-ID results for a batch; 409 when a cancelled booking's time is taken
     '''
-    method: str = event.get('httpMethod', 'POST')
+    return router(event, context)
+
+def validate_status(new_status: str) -> None:
+    if new_status not in VALID_STATUSES:
+        raise HttpError(400, f'Недопустимый статус. Допустимые значения: {", ".join(VALID_STATUSES)}')
+
+def lock_bookings(cur: Any, booking_ids: List[int]) -> List[Dict[str, Any]]:
+    cur.execute(
+        """
+        SELECT id, status, preferred_date, preferred_time, service_type
+        FROM bookings
+        WHERE id = ANY(%s)
+        ORDER BY id
+        FOR UPDATE
+        """,
+        (booking_ids,)
+    )
+    return cur.fetchall()
+
+def reopens(booking: Dict[str, Any], new_status: str) -> bool:
+    '''Заявка выходит из отмены — её слоты освобождены триггером V0020 и нужны снова'''
+    return booking['status'] == 'cancelled' and new_status != 'cancelled'
+
+@router.post
+def update_status(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    body_data = json_body(event)
+    if 'booking_ids' in body_data:
+        return update_status_batch(body_data)
     
-    # Handle CORS OPTIONS request
-    if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-User-Id, X-Auth-Token, X-Session-Id',
-                'Access-Control-Max-Age': '86400'
-            },
-            'body': ''
-        }
+    booking_id = body_data.get('booking_id')
+    new_status = body_data.get('status', '').strip()
     
-    if method != 'POST':
-        return {
-            'statusCode': 405,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Method not allowed'})
-        }
+    # Validation
+    if not booking_id or not new_status:
+        raise HttpError(400, 'ID заявки и статус обязательны')
     
-    try:
-        # Parse request body
-        body_data = json.loads(event.get('body', '{}'))
-        
-        booking_id = body_data.get('booking_id')
-        new_status = body_data.get('status', '').strip()
-        
-        # Validation
-        if not booking_id or not new_status:
-            return {
-                'statusCode': 400,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'error': 'ID заявки и статус обязательны'
-                })
-            }
-        
-        # Validate status value
-        valid_statuses = ['new', 'confirmed', 'completed', 'cancelled']
-        if new_status not in valid_statuses:
-            return {
-                'statusCode': 400,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'error': f'Недопустимый статус. Допустимые значения: {", ".join(valid_statuses)}'
-                })
-            }
-        
-        # Connect to database
-        dsn = os.environ.get('DATABASE_URL')
-        if not dsn:
-            raise Exception('DATABASE_URL not configured')
-        
-        conn = psycopg2.connect(dsn)
+    validate_status(new_status)
+    if isinstance(booking_id, bool) or not str(booking_id).isdigit():
+        raise HttpError(400, f'Неверный ID заявки: {booking_id}')
+    booking_id = int(booking_id)
+    
+    with db.connection() as conn:
         cur = conn.cursor(cursor_factory=RealDictCursor)
+
+        bookings = lock_bookings(cur, [booking_id])
+        if not bookings:
+            raise HttpError(404, 'Заявка не найдена')
+        if reopens(bookings[0], new_status):
+            slots.reserve(conn, bookings[0])
         
         # Update booking status
         cur.execute(
@@ -92,54 +81,101 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         result = cur.fetchone()
         
         if not result:
-            cur.close()
-            conn.close()
-            return {
-                'statusCode': 404,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({'error': 'Заявка не найдена'})
-            }
-        
-        updated_at = result['updated_at'].isoformat() if result['updated_at'] else None
+            raise HttpError(404, 'Заявка не найдена')
         
         conn.commit()
         cur.close()
-        conn.close()
-        
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'isBase64Encoded': False,
-            'body': json.dumps({
+    
+    return {
+        'success': True,
+        'booking_id': result['id'],
+        'status': result['status'],
+        'updated_at': result['updated_at'],
+        'message': 'Статус заявки обновлён'
+    }
+
+def update_status_batch(body_data: Dict[str, Any]) -> Dict[str, Any]:
+    raw_ids = body_data.get('booking_ids')
+    new_status = str(body_data.get('status') or '').strip()
+
+    if not isinstance(raw_ids, list) or not raw_ids or not new_status:
+        raise HttpError(400, 'Список ID заявок и статус обязательны')
+    if len(raw_ids) > MAX_BATCH_SIZE:
+        raise HttpError(400, f'Не больше {MAX_BATCH_SIZE} заявок за запрос')
+
+    validate_status(new_status)
+
+    booking_ids: List[int] = []
+    for raw_id in raw_ids:
+        if isinstance(raw_id, bool) or not isinstance(raw_id, (int, str)) or not str(raw_id).isdigit():
+            raise HttpError(400, f'Неверный ID заявки: {raw_id}')
+        if int(raw_id) not in booking_ids:
+            booking_ids.append(int(raw_id))
+
+    with db.connection() as conn:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        bookings = lock_bookings(cur, booking_ids)
+
+        # Слоты занимаем по возрастанию времени, как create-booking, — без взаимных
+        # блокировок; занятое время отклоняет только свою заявку
+        conflicts: Dict[int, HttpError] = {}
+        reopened = [booking for booking in bookings if reopens(booking, new_status)]
+        reopened.sort(key=lambda booking: (booking['preferred_date'] or date.max, booking['preferred_time'] or ''))
+        for booking in reopened:
+            cur.execute('SAVEPOINT reserve_slots')
+            try:
+                slots.reserve(conn, booking)
+            except HttpError as e:
+                cur.execute('ROLLBACK TO SAVEPOINT reserve_slots')
+                conflicts[booking['id']] = e
+            else:
+                cur.execute('RELEASE SAVEPOINT reserve_slots')
+
+        previous = {booking['id']: booking['status'] for booking in bookings if booking['id'] not in conflicts}
+        cur.execute(
+            """
+            UPDATE bookings
+            SET status = %s, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ANY(%s)
+            RETURNING id, status, updated_at
+            """,
+            (new_status, list(previous))
+        )
+        updated = {row['id']: {**row, 'previous_status': previous[row['id']]} for row in cur.fetchall()}
+        conn.commit()
+        cur.close()
+
+    results = []
+    for booking_id in booking_ids:
+        row = updated.get(booking_id)
+        if row:
+            results.append({
+                'booking_id': booking_id,
                 'success': True,
-                'booking_id': result['id'],
-                'status': result['status'],
-                'updated_at': updated_at,
-                'message': 'Статус заявки обновлён'
+                'previous_status': row['previous_status'],
+                'status': row['status'],
+                'updated_at': row['updated_at']
             })
-        }
-        
-    except json.JSONDecodeError:
-        return {
-            'statusCode': 400,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Неверный формат данных'})
-        }
-    except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': f'Ошибка сервера: {str(e)}'})
-        }
+        elif booking_id in conflicts:
+            results.append({
+                'booking_id': booking_id,
+                'success': False,
+                'status_code': conflicts[booking_id].status,
+                'error': conflicts[booking_id].error
+            })
+        else:
+            results.append({
+                'booking_id': booking_id,
+                'success': False,
+                'error': 'Заявка не найдена'
+            })
+
+    return {
+        'success': True,
+        'status': new_status,
+        'updated': len(updated),
+        'not_found': len(booking_ids) - len(updated) - len(conflicts),
+        'conflicts': len(conflicts),
+        'results': results,
+        'message': f'Статус обновлён у {len(updated)} из {len(booking_ids)} заявок'
+    }
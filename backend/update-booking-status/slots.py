@@ -0,0 +1,166 @@
+'''
+Слоты записи (V0020): свободное время на ближайшие дни и атомарное
+бронирование цепочки часовых слотов под длительность выбранных услуг.
+Файл одинаковый в create-booking и update-booking-status.
+'''
+
+import math
+import os
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from runtime import HttpError
+
+SLOT_MINUTES = 60
+SLOT_TIMEZONE = os.environ.get('SLOT_TIMEZONE', 'Europe/Moscow')
+
+
+def parse_time(value: str) -> Optional[time]:
+    try:
+        return datetime.strptime(value.strip(), '%H:%M').time()
+    except ValueError:
+        return None
+
+
+def requested_slot(preferred_date: Union[str, date, None], preferred_time: Optional[str]) -> Optional[Tuple[date, time]]:
+    '''Дата и время начала, если заявка на конкретное время (YYYY-MM-DD и HH:MM)'''
+    if isinstance(preferred_date, date):
+        slot_date = preferred_date
+    else:
+        try:
+            slot_date = date.fromisoformat(preferred_date or '')
+        except ValueError:
+            return None
+    start_time = parse_time(preferred_time or '')
+    return (slot_date, start_time) if start_time else None
+
+
+def duration_slots(conn: Any, service: str) -> int:
+    '''Сколько часовых слотов подряд занимают услуги (названия через запятую)'''
+    titles = [title.strip() for title in service.split(',') if title.strip()]
+    with conn.cursor() as cur:
+        cur.execute(
+            'SELECT COALESCE(SUM(duration_minutes), 0) FROM services WHERE title = ANY(%s)',
+            (titles,)
+        )
+        minutes = cur.fetchone()[0] or SLOT_MINUTES
+    return max(1, math.ceil(minutes / SLOT_MINUTES))
+
+
+def availability(conn: Any, days: int, slots_needed: int) -> Dict[str, Any]:
+    '''
+    Свободное время начала на days дней вперёд: с него подряд идут slots_needed
+    слотов одного дня, в каждом есть свободный пост. Один запрос по
+    уникальному индексу (slot_date, start_time).
+    '''
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT slot_date, start_time
+            FROM (
+                SELECT slot_date, start_time,
+                       MIN(capacity - reserved) OVER w AS free,
+                       COUNT(*) OVER w AS span,
+                       MAX(start_time) OVER w AS last_start
+                FROM booking_slots
+                WHERE slot_date >= (now() AT TIME ZONE %(tz)s)::date
+                  AND slot_date < (now() AT TIME ZONE %(tz)s)::date + %(days)s
+                WINDOW w AS (
+                    PARTITION BY slot_date ORDER BY start_time
+                    ROWS BETWEEN CURRENT ROW AND %(following)s FOLLOWING
+                )
+            ) s
+            WHERE free > 0
+              AND span = %(slots)s
+              AND last_start - start_time = %(following)s * interval '1 hour'
+              AND slot_date + start_time > now() AT TIME ZONE %(tz)s
+            ORDER BY slot_date, start_time
+            """,
+            {'tz': SLOT_TIMEZONE, 'days': days, 'slots': slots_needed, 'following': slots_needed - 1}
+        )
+        rows = cur.fetchall()
+        cur.execute('SELECT MAX(slot_date) FROM booking_slots')
+        until = cur.fetchone()[0]
+
+    free: Dict[date, List[str]] = {}
+    for slot_date, start_time in rows:
+        free.setdefault(slot_date, []).append(start_time.strftime('%H:%M'))
+
+    return {
+        'duration_slots': slots_needed,
+        'until': until,
+        'days': [{'date': slot_date, 'times': times} for slot_date, times in free.items()]
+    }
+
+
+def started(conn: Any, start: datetime) -> bool:
+    '''Время start уже наступило по часам сервиса (SLOT_TIMEZONE), как в availability()'''
+    with conn.cursor() as cur:
+        cur.execute('SELECT %s <= now() AT TIME ZONE %s', (start, SLOT_TIMEZONE))
+        return cur.fetchone()[0]
+
+
+def lock(conn: Any, slot_date: date, start_time: time, slots_needed: int) -> Optional[List[int]]:
+    '''
+    Блокирует (FOR UPDATE, по возрастанию времени — без взаимных блокировок)
+    и проверяет слоты под заявку в текущей транзакции. None — на эту дату слоты
+    не ведутся и заявка принимается без брони; прошедшее время или время вне
+    рабочих часов (слотов нет) — HttpError 400; занятое время — HttpError 409.
+    '''
+    start = datetime.combine(slot_date, start_time)
+    end = start + timedelta(minutes=SLOT_MINUTES * slots_needed)
+    if started(conn, start):
+        raise HttpError(400, 'Это время уже прошло, выберите другое', slot_date=slot_date,
+                        slot_time=start_time.strftime('%H:%M'))
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT id, start_time, capacity, reserved
+            FROM booking_slots
+            WHERE slot_date = %s AND start_time >= %s AND (slot_date + start_time) < %s
+            ORDER BY start_time
+            FOR UPDATE
+            """,
+            (slot_date, start_time, end)
+        )
+        rows = cur.fetchall()
+        if not rows:
+            cur.execute('SELECT EXISTS (SELECT 1 FROM booking_slots WHERE slot_date = %s)', (slot_date,))
+            if not cur.fetchone()[0]:
+                return None
+
+    expected = [(start + timedelta(minutes=SLOT_MINUTES * i)).time() for i in range(slots_needed)]
+    if [row[1] for row in rows] != expected:
+        raise HttpError(400, 'Время вне часов работы сервиса, выберите другое', slot_date=slot_date,
+                        slot_time=start_time.strftime('%H:%M'))
+    if any(row[3] >= row[2] for row in rows):
+        raise HttpError(409, 'Выбранное время уже занято, выберите другое', slot_date=slot_date,
+                        slot_time=start_time.strftime('%H:%M'))
+    return [row[0] for row in rows]
+
+
+def attach(conn: Any, booking_id: int, slot_ids: List[int]) -> None:
+    '''Занимает заблокированные lock() слоты за заявкой'''
+    with conn.cursor() as cur:
+        cur.execute('UPDATE booking_slots SET reserved = reserved + 1 WHERE id = ANY(%s)', (slot_ids,))
+        cur.execute(
+            """
+            INSERT INTO booking_slot_reservations (booking_id, slot_id)
+            SELECT %s, unnest(%s::integer[])
+            """,
+            (booking_id, slot_ids)
+        )
+
+
+def reserve(conn: Any, booking: Dict[str, Any]) -> None:
+    '''
+    Снова занимает слоты заявки, возвращённой из отмены (отмена их освободила).
+    Ошибки — как у lock(); заявка без даты и времени, на дату без слотов или
+    на уже прошедшее время проходит без брони.
+    '''
+    requested = requested_slot(booking['preferred_date'], booking['preferred_time'])
+    if not requested or started(conn, datetime.combine(*requested)):
+        return
+    slot_ids = lock(conn, *requested, duration_slots(conn, booking['service_type'] or ''))
+    if slot_ids:
+        attach(conn, booking['id'], slot_ids)
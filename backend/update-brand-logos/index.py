@@ -1,100 +1,130 @@
-import json
 import os
-import psycopg2
-from typing import Dict, Any
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+from psycopg2.extras import execute_values
+
+import db
+from runtime import Router, json_body, query_params
+
+router = Router(allow_headers='Content-Type')
+
+# Базовый адрес логотипов; для проверки без внешней сети — локальный HTTP-сервер
+LOGO_BASE_URL = os.environ.get('LOGO_BASE_URL', 'https://avtologo.ru/foto').rstrip('/')
+LOGO_CHECK_WORKERS = int(os.environ.get('LOGO_CHECK_WORKERS', '8'))
+LOGO_CHECK_TIMEOUT = float(os.environ.get('LOGO_CHECK_TIMEOUT', '5'))
+
+# slug бренда -> файл логотипа относительно LOGO_BASE_URL
+LOGOS_MAP = {
+    'toyota': 'Toyota.png',
+    'honda': 'Honda.png',
+    'nissan': 'Nissan.png',
+    'lexus': 'Lexus.png',
+    'mazda': 'Mazda.png',
+    'mitsubishi': 'Mitsubishi.png',
+    'subaru': 'Subaru.png',
+    'suzuki': 'Suzuki.png',
+    'acura': 'Acura.png',
+    'hyundai': 'Hyundai.png',
+    'kia': 'Kia.png',
+    'haval': 'Haval.png',
+    'geely': 'Geely.png',
+    'changan': 'Changan.png',
+    'belgee': 'Belgee.png',
+    'lifan': 'Lifan.png',
+    'jetour': 'Jetour.png',
+    'tank': 'Tank.png',
+    'exeed': 'Exeed.png',
+    'omoda': 'Omoda.png',
+    'gac': 'GAC.png',
+    'li auto': 'Li-Auto.png',
+    'jac': 'JAC.png',
+    'voyah': 'Voyah.png',
+    'zeekr': 'Zeekr.png',
+    'hongqi': 'Hongqi.png',
+    'faw': 'FAW.png',
+    'dongfeng': 'Dongfeng.png',
+    'jaecoo': 'Jaecoo.png',
+    'bestune': 'Bestune.png',
+    'chery': 'Chery.png'
+}
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
     Business: Обновляет логотипы всех брендов в базе данных с автолого.рф
-    Args: event - HTTP запрос, context - контекст выполнения
+    Args: event - HTTP запрос, context - контекст выполнения;
+          ?verify=1 или {"verify": true} — дополнительно проверить, что ссылки на логотипы открываются
     Returns: HTTP response с результатом
     '''
-    method: str = event.get('httpMethod', 'GET')
-    
-    if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type',
-                'Access-Control-Max-Age': '86400'
-            },
-            'body': ''
-        }
-    
-    if method != 'POST':
-        return {
-            'statusCode': 405,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'Method not allowed'})
-        }
-    
-    dsn = os.environ.get('DATABASE_URL')
-    if not dsn:
-        return {
-            'statusCode': 500,
-            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({'error': 'DATABASE_URL not configured'})
-        }
-    
-    conn = psycopg2.connect(dsn)
-    cur = conn.cursor()
-    
-    logos_map = {
-        'toyota': 'https://avtologo.ru/foto/Toyota.png',
-        'honda': 'https://avtologo.ru/foto/Honda.png',
-        'nissan': 'https://avtologo.ru/foto/Nissan.png',
-        'lexus': 'https://avtologo.ru/foto/Lexus.png',
-        'mazda': 'https://avtologo.ru/foto/Mazda.png',
-        'mitsubishi': 'https://avtologo.ru/foto/Mitsubishi.png',
-        'subaru': 'https://avtologo.ru/foto/Subaru.png',
-        'suzuki': 'https://avtologo.ru/foto/Suzuki.png',
-        'acura': 'https://avtologo.ru/foto/Acura.png',
-        'hyundai': 'https://avtologo.ru/foto/Hyundai.png',
-        'kia': 'https://avtologo.ru/foto/Kia.png',
-        'haval': 'https://avtologo.ru/foto/Haval.png',
-        'geely': 'https://avtologo.ru/foto/Geely.png',
-        'changan': 'https://avtologo.ru/foto/Changan.png',
-        'belgee': 'https://avtologo.ru/foto/Belgee.png',
-        'lifan': 'https://avtologo.ru/foto/Lifan.png',
-        'jetour': 'https://avtologo.ru/foto/Jetour.png',
-        'tank': 'https://avtologo.ru/foto/Tank.png',
-        'exeed': 'https://avtologo.ru/foto/Exeed.png',
-        'omoda': 'https://avtologo.ru/foto/Omoda.png',
-        'gac': 'https://avtologo.ru/foto/GAC.png',
-        'li auto': 'https://avtologo.ru/foto/Li-Auto.png',
-        'jac': 'https://avtologo.ru/foto/JAC.png',
-        'voyah': 'https://avtologo.ru/foto/Voyah.png',
-        'zeekr': 'https://avtologo.ru/foto/Zeekr.png',
-        'hongqi': 'https://avtologo.ru/foto/Hongqi.png',
-        'faw': 'https://avtologo.ru/foto/FAW.png',
-        'dongfeng': 'https://avtologo.ru/foto/Dongfeng.png',
-        'jaecoo': 'https://avtologo.ru/foto/Jaecoo.png',
-        'bestune': 'https://avtologo.ru/foto/Bestune.png',
-        'chery': 'https://avtologo.ru/foto/Chery.png'
-    }
-    
-    updated_count = 0
-    
-    for slug, logo_url in logos_map.items():
-        cur.execute(
-            "UPDATE brands SET logo_url = %s WHERE slug = %s",
-            (logo_url, slug)
+    return router(event, context)
+
+def check_url(url: str) -> Tuple[Optional[int], Optional[str]]:
+    '''HTTP-статус ссылки или текст ошибки; сервер без HEAD проверяется GET первого байта'''
+    for method in ('HEAD', 'GET'):
+        req = urllib.request.Request(url, method=method, headers={'Range': 'bytes=0-0'} if method == 'GET' else {})
+        try:
+            with urllib.request.urlopen(req, timeout=LOGO_CHECK_TIMEOUT) as response:
+                return response.status, None
+        except urllib.error.HTTPError as e:
+            if method == 'HEAD' and e.code in (405, 501):
+                continue
+            return e.code, None
+        except Exception as e:
+            return None, str(e) or type(e).__name__
+    return None, None
+
+def verify_logos(logos: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    '''Параллельные запросы ко всем логотипам (не больше LOGO_CHECK_WORKERS сразу); возвращает битые'''
+    if not logos:
+        return []
+    with ThreadPoolExecutor(max_workers=min(LOGO_CHECK_WORKERS, len(logos))) as pool:
+        results = list(pool.map(check_url, [url for _, url in logos]))
+
+    broken = []
+    for (slug, url), (status, error) in zip(logos, results):
+        if status is None or status >= 400:
+            broken.append({'slug': slug, 'url': url, 'status': status, 'error': error})
+    return broken
+
+@router.post
+def update_logos(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    params = query_params(event)
+    verify = params.get('verify') in ('1', 'true') or json_body(event).get('verify') is True
+    mapping = [(slug, f'{LOGO_BASE_URL}/{file_name}') for slug, file_name in LOGOS_MAP.items()]
+
+    with db.connection() as conn:
+        cur = conn.cursor()
+        # Одним запросом; неизменённые строки не трогаем, чтобы не перевыпускать каталог.
+        # Логотип, уже скопированный mirror-images, берётся из нашего бакета
+        updated = execute_values(
+            cur,
+            """
+            UPDATE brands b
+            SET logo_url = COALESCE(m.mirrored_url, v.logo_url)
+            FROM (VALUES %s) AS v(slug, logo_url)
+            LEFT JOIN mirrored_images m ON m.source_url = v.logo_url AND m.mirrored_url IS NOT NULL
+            WHERE b.slug = v.slug AND b.logo_url IS DISTINCT FROM COALESCE(m.mirrored_url, v.logo_url)
+            RETURNING b.slug
+            """,
+            mapping,
+            page_size=len(mapping),
+            fetch=True
         )
-        if cur.rowcount > 0:
-            updated_count += 1
-    
-    conn.commit()
-    cur.close()
-    conn.close()
-    
-    return {
-        'statusCode': 200,
-        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
-        'body': json.dumps({
-            'success': True,
-            'message': f'Обновлено логотипов: {updated_count}',
-            'updated_count': updated_count
-        })
-    }
\ No newline at end of file
+        cur.execute('SELECT slug, logo_url FROM brands WHERE logo_url IS NOT NULL ORDER BY slug')
+        logos = cur.fetchall()
+        conn.commit()
+        cur.close()
+
+    updated_count = len(updated)
+    result = {
+        'success': True,
+        'message': f'Обновлено логотипов: {updated_count}',
+        'updated_count': updated_count
+    }
+    if verify:
+        broken = verify_logos(logos)
+        result['checked_count'] = len(logos)
+        result['broken'] = broken
+    return result
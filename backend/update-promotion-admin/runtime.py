@@ -0,0 +1,339 @@
+'''
+Общий runtime HTTP-обработчиков: диспетчеризация по методу, CORS preflight,
+сериализация ответа и превращение исключений в HTTP-статусы.
+Файл одинаковый во всех функциях backend: каждая функция деплоится отдельно,
+поэтому модуль лежит рядом с index.py.
+'''
+
+import base64
+import gzip
+import hashlib
+import json
+import os
+import zlib
+from datetime import date, datetime, time
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_ALLOW_HEADERS = 'Content-Type, X-User-Id, X-Auth-Token, X-Session-Id'
+
+# Шаблоны заголовков собираются один раз при импорте и доступны только для чтения:
+# в каждый ответ уходит свежая копия, правка заголовков ответа их не портит
+JSON_HEADERS: Mapping[str, str] = MappingProxyType({
+    'Content-Type': 'application/json; charset=utf-8',
+    'Access-Control-Allow-Origin': '*'
+})
+
+# Ответы меньше порога отдаются без сжатия: выигрыш не окупает CPU и base64
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', '1024'))
+
+# Vary и на несжатых ответах: тело с тем же ETag зависит от Accept-Encoding
+CACHE_HEADERS: Mapping[str, str] = MappingProxyType({
+    'Cache-Control': 'no-cache',
+    'Vary': 'Accept-Encoding',
+    'Access-Control-Expose-Headers': 'ETag'
+})
+
+
+def _code_revision() -> int:
+    # ETag зависит и от кода функции: после деплоя старые ответы в кэше клиента не подходят
+    revision = 0
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in ('index.py', 'runtime.py'):
+        try:
+            with open(os.path.join(here, name), 'rb') as f:
+                revision = zlib.crc32(f.read(), revision)
+        except OSError:
+            pass
+    return revision
+
+
+_CODE_REVISION = _code_revision()
+
+Route = Callable[[Dict[str, Any], Any], Any]
+
+
+class HttpError(Exception):
+    '''Ошибка, которая отдаётся клиенту как {"error": error, **extra} с заданным статусом'''
+
+    def __init__(self, status: int, error: str, **extra: Any):
+        super().__init__(error)
+        self.status = status
+        self.error = error
+        self.extra = extra
+
+
+class Response:
+    '''
+    Ответ с нестандартным статусом, заголовками или ETag; обычный результат
+    обработчика — просто данные. body — уже сериализованный JSON (например,
+    из кэша), тогда data не используется.
+    '''
+
+    __slots__ = ('data', 'status', 'headers', 'etag', 'body')
+
+    def __init__(self, data: Any = None, status: int = 200, headers: Optional[Dict[str, str]] = None,
+                 etag: Optional[str] = None, body: Optional[str] = None):
+        self.data = data
+        self.status = status
+        self.headers = headers
+        self.etag = etag
+        self.body = body
+
+
+def _encode_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def dumps(data: Any) -> str:
+    '''
+    JSON в UTF-8 без \\uXXXX-экранирования кириллицы. Decimal, date и datetime
+    сериализуются прямо здесь, без конвертации в обработчиках; при наличии orjson
+    используется он.
+    '''
+    if orjson is not None:
+        return orjson.dumps(data, default=_encode_default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=_encode_default)
+
+
+def json_body(event: Dict[str, Any]) -> Dict[str, Any]:
+    '''Тело запроса как dict; пустое тело — пустой dict'''
+    body = event.get('body') or '{}'
+    data = json.loads(body)
+    if not isinstance(data, dict):
+        raise HttpError(400, 'Неверный формат данных')
+    return data
+
+
+def query_params(event: Dict[str, Any]) -> Dict[str, str]:
+    return event.get('queryStringParameters') or {}
+
+
+def header(event: Dict[str, Any], name: str) -> str:
+    '''Значение заголовка запроса без учёта регистра имени'''
+    headers = event.get('headers') or {}
+    value = headers.get(name)
+    if value is None:
+        lowered = name.lower()
+        for key, candidate in headers.items():
+            if key.lower() == lowered:
+                return candidate or ''
+        return ''
+    return value
+
+
+def accepted_encodings(event: Dict[str, Any]) -> Tuple[str, ...]:
+    '''Кодировки из Accept-Encoding, кроме явно запрещённых через q=0'''
+    encodings = []
+    for part in header(event, 'Accept-Encoding').split(','):
+        token, _, params = part.partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        encodings.append(token)
+    return tuple(encodings)
+
+
+def compress(event: Dict[str, Any], response: Dict[str, Any]) -> Dict[str, Any]:
+    '''
+    Сжимает тело ответа в br или gzip, если клиент это поддерживает и тело
+    не меньше COMPRESS_MIN_SIZE байт. Сжатое тело отдаётся в base64.
+    '''
+    body = response.get('body')
+    if not body or response.get('isBase64Encoded'):
+        return response
+    raw = body.encode('utf-8')
+    if len(raw) < COMPRESS_MIN_SIZE:
+        return response
+
+    encodings = accepted_encodings(event)
+    if brotli is not None and 'br' in encodings:
+        encoding = 'br'
+        compressed = brotli.compress(raw, quality=5)
+    elif 'gzip' in encodings or '*' in encodings:
+        encoding = 'gzip'
+        compressed = gzip.compress(raw, compresslevel=5)
+    else:
+        return response
+
+    headers = {**response['headers'], 'Content-Encoding': encoding, 'Vary': 'Accept-Encoding'}
+    etag = headers.get('ETag')
+    if etag:
+        headers['ETag'] = f'{etag[:-1]}-{encoding}"'
+
+    return {
+        **response,
+        'headers': headers,
+        'body': base64.b64encode(compressed).decode('ascii'),
+        'isBase64Encoded': True
+    }
+
+
+def make_etag(*parts: Any) -> str:
+    '''Сильный ETag из версии данных и параметров запроса'''
+    digest = hashlib.blake2s(repr((_CODE_REVISION,) + parts).encode('utf-8'), digest_size=10).hexdigest()
+    return f'"{digest}"'
+
+
+def _split_etag(tag: str) -> Tuple[str, str]:
+    '''Значение ETag без кавычек и W/ и суффикс сжатия ('-br', '-gzip' или '')'''
+    tag = tag.strip()
+    if tag.startswith('W/'):
+        tag = tag[2:]
+    tag = tag.strip('"')
+    for suffix in ('-br', '-gzip'):
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)], suffix
+    return tag, ''
+
+
+def _strip_etag(tag: str) -> str:
+    return _split_etag(tag)[0]
+
+
+def not_modified(event: Dict[str, Any], etag: str) -> Optional[Response]:
+    '''
+    Ответ 304, если If-None-Match совпадает с etag (в том числе со сжатым
+    вариантом); иначе None и обработчик строит тело как обычно. В 304 уходит
+    тот вариант ETag, который совпал, — как в 200 с тем же телом.
+    '''
+    value = header(event, 'If-None-Match')
+    if not value:
+        return None
+    if value.strip() == '*':
+        return Response(status=304, etag=etag)
+    current = _strip_etag(etag)
+    for tag in value.split(','):
+        stripped, suffix = _split_etag(tag)
+        if stripped == current:
+            return Response(status=304, etag=f'"{current}{suffix}"')
+    return None
+
+
+def error_response(status: int, error: str, **extra: Any) -> Dict[str, Any]:
+    return {
+        'statusCode': status,
+        'headers': dict(JSON_HEADERS),
+        'body': dumps({'error': error, **extra}),
+        'isBase64Encoded': False
+    }
+
+
+class Router:
+    '''
+    Диспетчер HTTP-методов одной функции. Обработчики регистрируются
+    декораторами и возвращают данные для JSON-ответа либо Response;
+    HttpError и прочие исключения превращаются в ответы с ошибкой.
+    '''
+
+    def __init__(self, allow_headers: str = DEFAULT_ALLOW_HEADERS, default_method: str = 'GET'):
+        self.allow_headers = allow_headers
+        self.default_method = default_method
+        self._routes: Dict[str, Route] = {}
+        self._preflight_headers: Mapping[str, str] = MappingProxyType({})
+
+    def route(self, *methods: str) -> Callable[[Route], Route]:
+        def register(func: Route) -> Route:
+            for method in methods:
+                self._routes[method] = func
+            self._build_preflight()
+            return func
+        return register
+
+    def get(self, func: Route) -> Route:
+        return self.route('GET')(func)
+
+    def post(self, func: Route) -> Route:
+        return self.route('POST')(func)
+
+    def put(self, func: Route) -> Route:
+        return self.route('PUT')(func)
+
+    def delete(self, func: Route) -> Route:
+        return self.route('DELETE')(func)
+
+    def _build_preflight(self) -> None:
+        methods = ', '.join(list(self._routes) + ['OPTIONS'])
+        self._preflight_headers = MappingProxyType({
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Methods': methods,
+            'Access-Control-Allow-Headers': self.allow_headers,
+            'Access-Control-Max-Age': '86400'
+        })
+
+    def __call__(self, event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+        method: str = event.get('httpMethod') or self.default_method
+
+        if method == 'OPTIONS':
+            return {
+                'statusCode': 200,
+                'headers': dict(self._preflight_headers),
+                'body': '',
+                'isBase64Encoded': False
+            }
+
+        route = self._routes.get(method)
+        if route is None:
+            return error_response(405, 'Method not allowed')
+
+        try:
+            result = route(event, context)
+        except HttpError as e:
+            return error_response(e.status, e.error, **e.extra)
+        except json.JSONDecodeError:
+            return error_response(400, 'Неверный формат данных')
+        except Exception as e:
+            return error_response(500, f'Ошибка сервера: {str(e)}')
+
+        return compress(event, self._render(result))
+
+    def _render(self, result: Any) -> Dict[str, Any]:
+        status, headers, body = _unpack(result)
+        return {
+            'statusCode': status,
+            'headers': headers,
+            'body': body,
+            'isBase64Encoded': False
+        }
+
+
+def _unpack(result: Any) -> Tuple[int, Dict[str, str], str]:
+    if not isinstance(result, Response):
+        return 200, dict(JSON_HEADERS), dumps(result)
+
+    if result.status == 304:
+        body = ''
+    elif result.body is not None:
+        body = result.body
+    else:
+        body = dumps(result.data)
+
+    if result.etag is None and not result.headers:
+        return result.status, dict(JSON_HEADERS), body
+    headers = {**JSON_HEADERS, **(result.headers or {})}
+    if result.etag is not None:
+        headers.update(CACHE_HEADERS)
+        headers['ETag'] = result.etag
+    return result.status, headers, body
@@ -1,108 +1,45 @@
-import json
 import os
 from typing import Dict, Any
 
+import db
+import ratelimit
+from runtime import Router, HttpError, json_body
+
+router = Router(default_method='POST')
+
+# Подбор пароля: 5 попыток подряд с одного IP, дальше одна в минуту
+IP_LIMIT = ratelimit.RateLimit('verify-admin:ip', capacity=5, refill_per_second=1 / 60)
+
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
     Business: Verify admin password for authentication
     Args: event with httpMethod POST, body with password
     Returns: HTTP response with authentication result
     '''
-    method: str = event.get('httpMethod', 'POST')
+    return router(event, context)
+
+@router.post
+def verify_password(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    body_data = json_body(event)
+    password = body_data.get('password', '').strip()
+    
+    if not password:
+        raise HttpError(400, 'Пароль обязателен')
+
+    with db.connection() as conn:
+        ratelimit.enforce(conn, IP_LIMIT, ratelimit.client_ip(event))
+    
+    # Get admin password from environment
+    admin_password = os.environ.get('ADMIN_PASSWORD', '')
     
-    # Handle CORS OPTIONS request
-    if method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-User-Id, X-Auth-Token, X-Session-Id',
-                'Access-Control-Max-Age': '86400'
-            },
-            'body': ''
-        }
+    if not admin_password:
+        raise HttpError(500, 'ADMIN_PASSWORD не настроен')
     
-    if method != 'POST':
-        return {
-            'statusCode': 405,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Method not allowed'})
-        }
+    # Verify password
+    if password != admin_password:
+        raise HttpError(401, 'Неверный пароль', success=False)
     
-    try:
-        # Parse request body
-        body_data = json.loads(event.get('body', '{}'))
-        password = body_data.get('password', '').strip()
-        
-        if not password:
-            return {
-                'statusCode': 400,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({'error': 'Пароль обязателен'})
-            }
-        
-        # Get admin password from environment
-        admin_password = os.environ.get('ADMIN_PASSWORD', '')
-        
-        if not admin_password:
-            return {
-                'statusCode': 500,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({'error': 'ADMIN_PASSWORD не настроен'})
-            }
-        
-        # Verify password
-        if password == admin_password:
-            return {
-                'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'isBase64Encoded': False,
-                'body': json.dumps({
-                    'success': True,
-                    'message': 'Авторизация успешна'
-                })
-            }
-        else:
-            return {
-                'statusCode': 401,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*'
-                },
-                'body': json.dumps({
-                    'success': False,
-                    'error': 'Неверный пароль'
-                })
-            }
-        
-    except json.JSONDecodeError:
-        return {
-            'statusCode': 400,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': 'Неверный формат данных'})
-        }
-    except Exception as e:
-        return {
-            'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
-            'body': json.dumps({'error': f'Ошибка сервера: {str(e)}'})
-        }
+    return {
+        'success': True,
+        'message': 'Авторизация успешна'
+    }
@@ -0,0 +1,79 @@
+'''
+Ограничение частоты запросов: token bucket в таблице rate_limits (V0019),
+общий для всех контейнеров функции. Тёплый контейнер дополнительно ведёт
+локальную копию корзины и отказывает без обращения к базе, когда она пуста:
+локальный расход не больше общего, значит общая корзина тоже пуста.
+Файл одинаковый в create-booking и verify-admin.
+'''
+
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+from runtime import HttpError
+
+LOCAL_BUCKETS_MAX = 10000
+CLEANUP_PROBABILITY = 0.001
+
+_local: 'OrderedDict[str, Tuple[float, float]]' = OrderedDict()
+
+
+class RateLimit:
+    '''capacity запросов подряд, затем refill_per_second новых запросов в секунду'''
+
+    def __init__(self, name: str, capacity: float, refill_per_second: float):
+        self.name = name
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+
+
+def client_ip(event: Dict[str, Any]) -> str:
+    '''
+    Адрес, который видит шлюз. X-Forwarded-For задаёт клиент, по нему лимит
+    обходится сменой заголовка, поэтому без sourceIp — общая корзина 'unknown'
+    '''
+    identity = (event.get('requestContext') or {}).get('identity') or {}
+    return identity.get('sourceIp') or 'unknown'
+
+
+def _take_local(bucket: str, limit: RateLimit, cost: float) -> float:
+    now = time.monotonic()
+    tokens, updated_at = _local.get(bucket, (limit.capacity, now))
+    tokens = min(limit.capacity, tokens + (now - updated_at) * limit.refill_per_second)
+    retry_after = 0.0
+    if tokens >= cost:
+        tokens -= cost
+    else:
+        retry_after = (cost - tokens) / limit.refill_per_second
+    _local[bucket] = (tokens, now)
+    _local.move_to_end(bucket)
+    while len(_local) > LOCAL_BUCKETS_MAX:
+        _local.popitem(last=False)
+    return retry_after
+
+
+def enforce(conn: Any, limit: RateLimit, key: str, cost: float = 1) -> None:
+    '''
+    Забирает cost токенов из корзины limit для key либо поднимает HttpError 429.
+    Решение фиксируется отдельным коммитом, поэтому вызывать до начала
+    основной транзакции обработчика.
+    '''
+    bucket = f'{limit.name}:{key}'
+    retry_after = _take_local(bucket, limit, cost)
+    if not retry_after:
+        with conn.cursor() as cur:
+            cur.execute(
+                'SELECT rate_limit_take(%s, %s, %s, %s)',
+                (bucket, limit.capacity, limit.refill_per_second, cost)
+            )
+            retry_after = cur.fetchone()[0]
+            if retry_after:
+                # Корзина пуста в общем счёте: локальная копия отказывает сама, пока не пополнится
+                _local[bucket] = (cost - retry_after * limit.refill_per_second, time.monotonic())
+            if random.random() < CLEANUP_PROBABILITY:
+                cur.execute("DELETE FROM rate_limits WHERE updated_at < CURRENT_TIMESTAMP - interval '1 day'")
+        conn.commit()
+
+    if retry_after:
+        raise HttpError(429, 'Слишком много запросов, попробуйте позже', retry_after=int(retry_after) + 1)
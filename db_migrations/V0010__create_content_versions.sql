@@ -0,0 +1,45 @@
+-- Версии публичного контента: дешёвый источник ETag для каталога, акций и блога
+CREATE TABLE IF NOT EXISTS content_versions (
+    scope VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO content_versions (scope) VALUES ('catalog'), ('promotions'), ('blog')
+ON CONFLICT (scope) DO NOTHING;
+
+-- Любая запись в таблицу увеличивает версию своей области в той же транзакции
+CREATE OR REPLACE FUNCTION bump_content_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE content_versions
+    SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE scope = TG_ARGV[0];
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_brands_content_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON brands
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_content_version('catalog');
+
+CREATE TRIGGER trg_models_content_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON models
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_content_version('catalog');
+
+CREATE TRIGGER trg_services_content_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON services
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_content_version('catalog');
+
+CREATE TRIGGER trg_service_prices_content_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON service_prices
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_content_version('catalog');
+
+CREATE TRIGGER trg_promotions_content_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON promotions
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_content_version('promotions');
+
+CREATE TRIGGER trg_blog_posts_content_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON blog_posts
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_content_version('blog');
+
+COMMENT ON TABLE content_versions IS 'Счётчики изменений публичного контента для ETag и кэшей';
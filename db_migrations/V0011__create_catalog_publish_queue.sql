@@ -0,0 +1,66 @@
+-- Очередь брендов, чьи статические JSON нужно перевыложить в S3 (publish-catalog)
+CREATE TABLE IF NOT EXISTS catalog_publish_queue (
+    slug VARCHAR(100) PRIMARY KEY,
+    queued_at TIMESTAMP NOT NULL DEFAULT clock_timestamp()
+);
+
+CREATE OR REPLACE FUNCTION enqueue_catalog_publish(p_slug VARCHAR) RETURNS void AS $$
+BEGIN
+    IF p_slug IS NULL THEN
+        RETURN;
+    END IF;
+    INSERT INTO catalog_publish_queue (slug, queued_at)
+    VALUES (p_slug, clock_timestamp())
+    ON CONFLICT (slug) DO UPDATE SET queued_at = EXCLUDED.queued_at;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Изменение бренда: старый slug (удаление или переименование) и новый
+CREATE OR REPLACE FUNCTION queue_brand_publish() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM enqueue_catalog_publish(OLD.slug);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM enqueue_catalog_publish(NEW.slug);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Изменение цены: бренды, к которым относилась старая и новая строка
+CREATE OR REPLACE FUNCTION queue_price_publish() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM enqueue_catalog_publish((SELECT slug FROM brands WHERE id = OLD.brand_id));
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM enqueue_catalog_publish((SELECT slug FROM brands WHERE id = NEW.brand_id));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Услуги входят в карточку каждого бренда
+CREATE OR REPLACE FUNCTION queue_all_brands_publish() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO catalog_publish_queue (slug, queued_at)
+    SELECT slug, clock_timestamp() FROM brands
+    ON CONFLICT (slug) DO UPDATE SET queued_at = EXCLUDED.queued_at;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_brands_catalog_publish
+    AFTER INSERT OR UPDATE OR DELETE ON brands
+    FOR EACH ROW EXECUTE FUNCTION queue_brand_publish();
+
+CREATE TRIGGER trg_service_prices_catalog_publish
+    AFTER INSERT OR UPDATE OR DELETE ON service_prices
+    FOR EACH ROW EXECUTE FUNCTION queue_price_publish();
+
+CREATE TRIGGER trg_services_catalog_publish
+    AFTER INSERT OR UPDATE OR DELETE ON services
+    FOR EACH STATEMENT EXECUTE FUNCTION queue_all_brands_publish();
+
+COMMENT ON TABLE catalog_publish_queue IS 'Бренды, ожидающие перевыкладки статического каталога';
@@ -0,0 +1,63 @@
+-- Минимальная цена по каждой услуге для get-services: одна строка на услугу
+CREATE TABLE IF NOT EXISTS service_min_prices (
+    service_id INTEGER PRIMARY KEY REFERENCES services(id) ON DELETE CASCADE,
+    min_price DECIMAL(10, 2) NOT NULL,
+    currency VARCHAR(10),
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_service_prices_service_price ON service_prices(service_id, base_price);
+
+-- Пересчёт сводки только для переданных услуг
+CREATE OR REPLACE FUNCTION refresh_service_min_prices(p_service_ids INTEGER[]) RETURNS void AS $$
+BEGIN
+    DELETE FROM service_min_prices smp
+    WHERE smp.service_id = ANY(p_service_ids)
+      AND NOT EXISTS (SELECT 1 FROM service_prices sp WHERE sp.service_id = smp.service_id);
+
+    INSERT INTO service_min_prices (service_id, min_price, currency, updated_at)
+    SELECT DISTINCT ON (sp.service_id) sp.service_id, sp.base_price, sp.currency, CURRENT_TIMESTAMP
+    FROM service_prices sp
+    WHERE sp.service_id = ANY(p_service_ids)
+    ORDER BY sp.service_id, sp.base_price
+    ON CONFLICT (service_id) DO UPDATE
+    SET min_price = EXCLUDED.min_price,
+        currency = EXCLUDED.currency,
+        updated_at = EXCLUDED.updated_at;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Триггеры уровня оператора: массовое изменение цен пересчитывает каждую услугу один раз
+CREATE OR REPLACE FUNCTION service_prices_refresh_min() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM refresh_service_min_prices(ARRAY(SELECT DISTINCT service_id FROM new_rows));
+    ELSIF TG_OP = 'UPDATE' THEN
+        PERFORM refresh_service_min_prices(ARRAY(
+            SELECT service_id FROM new_rows UNION SELECT service_id FROM old_rows
+        ));
+    ELSE
+        PERFORM refresh_service_min_prices(ARRAY(SELECT DISTINCT service_id FROM old_rows));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_service_prices_min_insert
+    AFTER INSERT ON service_prices
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION service_prices_refresh_min();
+
+CREATE TRIGGER trg_service_prices_min_update
+    AFTER UPDATE ON service_prices
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION service_prices_refresh_min();
+
+CREATE TRIGGER trg_service_prices_min_delete
+    AFTER DELETE ON service_prices
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION service_prices_refresh_min();
+
+SELECT refresh_service_min_prices(ARRAY(SELECT id FROM services));
+
+COMMENT ON TABLE service_min_prices IS 'Сводка: минимальная цена и валюта по услуге, поддерживается триггерами service_prices';
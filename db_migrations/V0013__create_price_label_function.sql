@@ -0,0 +1,4 @@
+-- Подпись цены для публичного каталога: «от 12 500 ₽»
+CREATE OR REPLACE FUNCTION price_label(p_amount NUMERIC, p_currency VARCHAR) RETURNS TEXT AS $$
+    SELECT 'от ' || replace(to_char(trunc(p_amount), 'FM999,999,999,990'), ',', ' ') || ' ' || COALESCE(p_currency, '');
+$$ LANGUAGE sql IMMUTABLE;
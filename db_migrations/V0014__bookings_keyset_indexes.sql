@@ -0,0 +1,11 @@
+-- Keyset-пагинация get-bookings по (created_at, id): created_at не может быть NULL
+UPDATE bookings SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL;
+ALTER TABLE bookings ALTER COLUMN created_at SET NOT NULL;
+
+DROP INDEX IF EXISTS idx_bookings_created_at;
+DROP INDEX IF EXISTS idx_bookings_status;
+
+CREATE INDEX IF NOT EXISTS idx_bookings_created_id ON bookings(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_bookings_status_created_id ON bookings(status, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_bookings_brand_created_id ON bookings(car_brand, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_bookings_preferred_date ON bookings(preferred_date);
@@ -0,0 +1,16 @@
+-- Синхронизация get-bookings?since=: любое изменение заявки сдвигает updated_at
+UPDATE bookings SET updated_at = created_at WHERE updated_at IS NULL;
+ALTER TABLE bookings ALTER COLUMN updated_at SET NOT NULL;
+
+CREATE OR REPLACE FUNCTION bookings_touch_updated_at() RETURNS trigger AS $$
+BEGIN
+    NEW.updated_at = clock_timestamp();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_bookings_touch_updated_at
+    BEFORE UPDATE ON bookings
+    FOR EACH ROW EXECUTE FUNCTION bookings_touch_updated_at();
+
+CREATE INDEX IF NOT EXISTS idx_bookings_updated_id ON bookings(updated_at, id);
@@ -0,0 +1,12 @@
+-- Уведомление о новой или изменённой заявке для long-poll в get-bookings (?wait=)
+-- NOTIFY доставляется слушателям только после коммита транзакции
+CREATE OR REPLACE FUNCTION notify_booking_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('bookings', NEW.id::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_bookings_notify
+    AFTER INSERT OR UPDATE ON bookings
+    FOR EACH ROW EXECUTE FUNCTION notify_booking_change();
@@ -0,0 +1,14 @@
+-- Ключи идемпотентности: повтор запроса с тем же ключом возвращает исходный результат
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    scope VARCHAR(50) NOT NULL,
+    idempotency_key VARCHAR(255) NOT NULL,
+    request_hash CHAR(64) NOT NULL,
+    booking_id INTEGER REFERENCES bookings(id) ON DELETE CASCADE,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (scope, idempotency_key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires ON idempotency_keys(expires_at);
+
+COMMENT ON TABLE idempotency_keys IS 'Idempotency-Key запросов create-booking и созданные по ним заявки';
@@ -0,0 +1,20 @@
+-- Outbox уведомлений о заявках: пишется в транзакции create-booking,
+-- отправляется notify-bookings-cron
+CREATE TABLE IF NOT EXISTS booking_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    booking_id INTEGER REFERENCES bookings(id) ON DELETE CASCADE,
+    event VARCHAR(50) NOT NULL,
+    payload JSONB NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_error TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_booking_outbox_pending
+    ON booking_outbox(next_attempt_at, id) WHERE status = 'pending';
+
+COMMENT ON TABLE booking_outbox IS 'Очередь уведомлений о заявках: pending, sent, failed';
+COMMENT ON COLUMN booking_outbox.next_attempt_at IS 'Не раньше этого момента запись будет взята в работу (экспоненциальная задержка)';
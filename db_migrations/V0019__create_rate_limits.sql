@@ -0,0 +1,37 @@
+-- Token bucket ограничителя частоты запросов (create-booking, verify-admin)
+CREATE TABLE IF NOT EXISTS rate_limits (
+    bucket VARCHAR(200) PRIMARY KEY,
+    tokens DOUBLE PRECISION NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT clock_timestamp()
+);
+
+CREATE INDEX IF NOT EXISTS idx_rate_limits_updated ON rate_limits(updated_at);
+
+-- Пополняет корзину по прошедшему времени и забирает p_cost токенов.
+-- Возвращает 0, если запрос разрешён, иначе сколько секунд ждать.
+-- Строка блокируется первым UPDATE, поэтому параллельные запросы идут по очереди
+CREATE OR REPLACE FUNCTION rate_limit_take(
+    p_bucket VARCHAR, p_capacity DOUBLE PRECISION, p_refill_per_second DOUBLE PRECISION, p_cost DOUBLE PRECISION
+) RETURNS DOUBLE PRECISION AS $$
+DECLARE
+    v_tokens DOUBLE PRECISION;
+BEGIN
+    INSERT INTO rate_limits AS rl (bucket, tokens, updated_at)
+    VALUES (p_bucket, p_capacity, clock_timestamp())
+    ON CONFLICT (bucket) DO UPDATE
+    SET tokens = LEAST(
+            p_capacity,
+            rl.tokens + EXTRACT(EPOCH FROM clock_timestamp() - rl.updated_at) * p_refill_per_second
+        ),
+        updated_at = clock_timestamp()
+    RETURNING tokens INTO v_tokens;
+
+    IF v_tokens >= p_cost THEN
+        UPDATE rate_limits SET tokens = tokens - p_cost WHERE bucket = p_bucket;
+        RETURN 0;
+    END IF;
+    RETURN (p_cost - v_tokens) / p_refill_per_second;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON TABLE rate_limits IS 'Token bucket на ключ (IP, телефон): остаток токенов и время последнего пополнения';
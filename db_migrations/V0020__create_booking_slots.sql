@@ -0,0 +1,92 @@
+-- Длительность услуги в минутах из текстового services.duration («30 мин», «2 часа», «от 1 дня»)
+CREATE OR REPLACE FUNCTION parse_duration_minutes(p_duration TEXT) RETURNS INTEGER AS $$
+DECLARE
+    v_amount NUMERIC;
+BEGIN
+    v_amount := COALESCE(replace(substring(p_duration FROM '([0-9]+(?:[.,][0-9]+)?)'), ',', '.')::NUMERIC, 1);
+    IF p_duration ~* 'мин' THEN
+        RETURN ceil(v_amount)::INTEGER;
+    ELSIF p_duration ~* 'час' THEN
+        RETURN ceil(v_amount * 60)::INTEGER;
+    ELSIF p_duration ~* 'д[ен]' THEN
+        -- Рабочий день сервиса — 12 часовых слотов
+        RETURN ceil(v_amount * 720)::INTEGER;
+    END IF;
+    RETURN 60;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+ALTER TABLE services
+    ADD COLUMN IF NOT EXISTS duration_minutes INTEGER
+    GENERATED ALWAYS AS (parse_duration_minutes(duration)) STORED;
+
+-- Часовые слоты записи: capacity — число постов, reserved — занято заявками
+CREATE TABLE IF NOT EXISTS booking_slots (
+    id SERIAL PRIMARY KEY,
+    slot_date DATE NOT NULL,
+    start_time TIME NOT NULL,
+    capacity INTEGER NOT NULL,
+    reserved INTEGER NOT NULL DEFAULT 0,
+    CHECK (reserved >= 0 AND reserved <= capacity),
+    UNIQUE (slot_date, start_time)
+);
+
+CREATE TABLE IF NOT EXISTS booking_slot_reservations (
+    booking_id INTEGER NOT NULL REFERENCES bookings(id) ON DELETE CASCADE,
+    slot_id INTEGER NOT NULL REFERENCES booking_slots(id),
+    PRIMARY KEY (booking_id, slot_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_booking_slot_reservations_slot ON booking_slot_reservations(slot_id);
+
+-- Создаёт недостающие слоты на p_days дней вперёд; существующие не трогает
+CREATE OR REPLACE FUNCTION generate_booking_slots(
+    p_from DATE, p_days INTEGER, p_capacity INTEGER,
+    p_day_start TIME DEFAULT '09:00', p_day_end TIME DEFAULT '21:00',
+    p_closed_weekdays INTEGER[] DEFAULT '{}'
+) RETURNS INTEGER AS $$
+DECLARE
+    v_created INTEGER;
+BEGIN
+    INSERT INTO booking_slots (slot_date, start_time, capacity)
+    SELECT d::DATE, t::TIME, p_capacity
+    FROM generate_series(p_from, p_from + p_days - 1, interval '1 day') AS d,
+         generate_series(TIMESTAMP '2000-01-01' + p_day_start,
+                         TIMESTAMP '2000-01-01' + p_day_end - interval '1 hour',
+                         interval '1 hour') AS t
+    WHERE NOT (EXTRACT(ISODOW FROM d)::INTEGER = ANY(p_closed_weekdays))
+    ON CONFLICT (slot_date, start_time) DO NOTHING;
+    GET DIAGNOSTICS v_created = ROW_COUNT;
+    RETURN v_created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Отмена или удаление заявки освобождает её слоты
+CREATE OR REPLACE FUNCTION release_booking_slots() RETURNS trigger AS $$
+BEGIN
+    UPDATE booking_slots s
+    SET reserved = s.reserved - 1
+    FROM booking_slot_reservations r
+    WHERE r.booking_id = OLD.id AND r.slot_id = s.id;
+    DELETE FROM booking_slot_reservations WHERE booking_id = OLD.id;
+    IF TG_OP = 'DELETE' THEN
+        RETURN OLD;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_bookings_release_slots_on_cancel
+    AFTER UPDATE OF status ON bookings
+    FOR EACH ROW
+    WHEN (NEW.status = 'cancelled' AND OLD.status IS DISTINCT FROM 'cancelled')
+    EXECUTE FUNCTION release_booking_slots();
+
+CREATE TRIGGER trg_bookings_release_slots_on_delete
+    BEFORE DELETE ON bookings
+    FOR EACH ROW EXECUTE FUNCTION release_booking_slots();
+
+SELECT generate_booking_slots(CURRENT_DATE, 30, 2);
+
+COMMENT ON TABLE booking_slots IS 'Часовые слоты записи с ёмкостью (число постов) и занятостью';
+COMMENT ON TABLE booking_slot_reservations IS 'Какие слоты занимает заявка';
@@ -0,0 +1,20 @@
+-- Одна цена на (услуга, бренд, модель): повторные вставки seed-database и
+-- массового редактирования оставили дубли, сохраняем самую свежую запись
+DELETE FROM service_prices sp
+USING (
+    SELECT id,
+           ROW_NUMBER() OVER (
+               PARTITION BY service_id, COALESCE(brand_id, 0), COALESCE(model_id, 0)
+               ORDER BY updated_at DESC NULLS LAST, id DESC
+           ) AS position
+    FROM service_prices
+) ranked
+WHERE sp.id = ranked.id AND ranked.position > 1;
+
+-- brand_id и model_id допускают NULL (цена для всех брендов/моделей): ключ по COALESCE,
+-- ON CONFLICT указывает те же выражения
+CREATE UNIQUE INDEX IF NOT EXISTS uq_service_prices_key
+    ON service_prices (service_id, (COALESCE(brand_id, 0)), (COALESCE(model_id, 0)));
+
+-- Покрывается ведущим столбцом уникального индекса
+DROP INDEX IF EXISTS idx_service_prices_service;
@@ -0,0 +1,20 @@
+-- Карточка бренда берёт общую цену (brand_id и model_id пусты), если у бренда своей
+-- нет: её изменение перевыкладывает все бренды
+CREATE OR REPLACE FUNCTION queue_price_publish() RETURNS trigger AS $$
+BEGIN
+    IF (TG_OP IN ('UPDATE', 'DELETE') AND OLD.brand_id IS NULL AND OLD.model_id IS NULL)
+       OR (TG_OP IN ('INSERT', 'UPDATE') AND NEW.brand_id IS NULL AND NEW.model_id IS NULL) THEN
+        INSERT INTO catalog_publish_queue (slug, queued_at)
+        SELECT slug, clock_timestamp() FROM brands
+        ON CONFLICT (slug) DO UPDATE SET queued_at = EXCLUDED.queued_at;
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM enqueue_catalog_publish((SELECT slug FROM brands WHERE id = OLD.brand_id));
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM enqueue_catalog_publish((SELECT slug FROM brands WHERE id = NEW.brand_id));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
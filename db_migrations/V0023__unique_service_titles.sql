@@ -0,0 +1,30 @@
+-- Каждый повторный запуск seed-database добавлял услуги заново. Оставляем первую
+-- услугу с каждым названием: цены дублей переносим на неё, если у неё такой цены
+-- ещё нет, остальные удаляем
+WITH canonical AS (
+    SELECT id, MIN(id) OVER (PARTITION BY title) AS keep_id
+    FROM services
+),
+movable AS (
+    SELECT DISTINCT ON (c.keep_id, COALESCE(sp.brand_id, 0), COALESCE(sp.model_id, 0))
+           sp.id, c.keep_id
+    FROM service_prices sp
+    JOIN canonical c ON c.id = sp.service_id
+    ORDER BY c.keep_id, COALESCE(sp.brand_id, 0), COALESCE(sp.model_id, 0),
+             sp.service_id = c.keep_id DESC, sp.updated_at DESC NULLS LAST, sp.id DESC
+)
+UPDATE service_prices sp
+SET service_id = movable.keep_id
+FROM movable
+WHERE sp.id = movable.id AND sp.service_id <> movable.keep_id;
+
+DELETE FROM service_prices sp
+USING services s
+WHERE sp.service_id = s.id
+  AND EXISTS (SELECT 1 FROM services k WHERE k.title = s.title AND k.id < s.id);
+
+DELETE FROM services s
+WHERE EXISTS (SELECT 1 FROM services k WHERE k.title = s.title AND k.id < s.id);
+
+-- Естественный ключ услуги для upsert в seed-database
+ALTER TABLE services ADD CONSTRAINT services_title_key UNIQUE (title);
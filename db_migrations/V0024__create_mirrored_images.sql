@@ -0,0 +1,15 @@
+-- Внешние картинки (логотипы брендов, обложки статей), скопированные в наш бакет
+-- функцией mirror-images. mirrored_url пуст — скачать не удалось, last_error
+-- объясняет почему, повтор не раньше чем через MIRROR_RETRY_HOURS после checked_at
+CREATE TABLE IF NOT EXISTS mirrored_images (
+    source_url TEXT PRIMARY KEY,
+    mirrored_url TEXT,
+    content_hash CHAR(64),
+    content_type VARCHAR(100),
+    size_bytes INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    checked_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_mirrored_images_hash ON mirrored_images(content_hash);
@@ -0,0 +1,2 @@
+-- Одиночное создание цены подставляло 'RUB', сид и импорт — '₽': приводим к одному обозначению
+UPDATE service_prices SET currency = '₽' WHERE currency = 'RUB';
@@ -0,0 +1,8 @@
+-- updated_at новой заявки — момент вставки, а не начала транзакции (DEFAULT
+-- CURRENT_TIMESTAMP): долгая транзакция create-booking иначе коммитит строку
+-- с меткой ниже водяного знака, который клиент get-bookings?since= уже прошёл
+DROP TRIGGER IF EXISTS trg_bookings_touch_updated_at ON bookings;
+
+CREATE TRIGGER trg_bookings_touch_updated_at
+    BEFORE INSERT OR UPDATE ON bookings
+    FOR EACH ROW EXECUTE FUNCTION bookings_touch_updated_at();
@@ -0,0 +1,25 @@
+-- Два параллельных изменения цен одной услуги пересчитывали минимум каждое по
+-- своему снимку, и последний пересчёт мог не видеть строку другого. Пересчёт
+-- услуги сериализуется транзакционной advisory-блокировкой (по возрастанию id —
+-- без взаимных блокировок); в READ COMMITTED следующие запросы функции берут
+-- новый снимок и видят закоммиченные изменения предыдущей транзакции
+CREATE OR REPLACE FUNCTION refresh_service_min_prices(p_service_ids INTEGER[]) RETURNS void AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('service_min_prices'), service_id)
+    FROM (SELECT DISTINCT unnest(p_service_ids) AS service_id ORDER BY 1) ids;
+
+    DELETE FROM service_min_prices smp
+    WHERE smp.service_id = ANY(p_service_ids)
+      AND NOT EXISTS (SELECT 1 FROM service_prices sp WHERE sp.service_id = smp.service_id);
+
+    INSERT INTO service_min_prices (service_id, min_price, currency, updated_at)
+    SELECT DISTINCT ON (sp.service_id) sp.service_id, sp.base_price, sp.currency, CURRENT_TIMESTAMP
+    FROM service_prices sp
+    WHERE sp.service_id = ANY(p_service_ids)
+    ORDER BY sp.service_id, sp.base_price
+    ON CONFLICT (service_id) DO UPDATE
+    SET min_price = EXCLUDED.min_price,
+        currency = EXCLUDED.currency,
+        updated_at = EXCLUDED.updated_at;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,6 @@
+-- Каналы, в которые запись уже доставлена: при повторе после ошибки одного
+-- канала notify-bookings-cron шлёт только в недоставленные
+ALTER TABLE booking_outbox
+    ADD COLUMN IF NOT EXISTS delivered_channels TEXT[] NOT NULL DEFAULT '{}';
+
+COMMENT ON COLUMN booking_outbox.delivered_channels IS 'Каналы (telegram, email), в которые уведомление уже ушло';
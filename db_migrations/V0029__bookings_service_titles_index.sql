@@ -0,0 +1,5 @@
+-- Фильтр get-bookings по услуге: service_type — названия через запятую,
+-- фильтр ищет название среди них (@>), GIN по массиву названий обслуживает
+-- его без pg_trgm. Выражение должно совпадать с SERVICE_TITLES в get-bookings
+CREATE INDEX IF NOT EXISTS idx_bookings_service_titles
+    ON bookings USING GIN (regexp_split_to_array(service_type, '\s*,\s*'));
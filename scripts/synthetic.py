@@ -0,0 +1,286 @@
+'''
+Синтетические данные для нагрузочных тестов и проверки планов запросов на
+локальной базе: заявки, отзывы (ручные и из 2ГИС), статьи блога с секциями
+в JSONB, модели брендов и цены моделей. Объёмы задаются параметрами, при том
+же --seed, тех же брендах/услугах и в тот же день данные получаются те же
+(даты отсчитываются от полуночи сегодняшнего дня). Всё грузится через COPY
+пачками по --chunk строк.
+
+Бренды и услуги берутся из базы — сначала запустите seed-database.
+
+    DATABASE_URL=postgresql://localhost/hybrid python scripts/synthetic.py \
+        --bookings 1000000 --reviews 100000 --posts 5000 --models 40 --seed 42
+'''
+
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Iterator, List, Sequence, Tuple
+
+import psycopg2
+
+FIRST_NAMES = ['Александр', 'Дмитрий', 'Максим', 'Сергей', 'Андрей', 'Алексей', 'Иван', 'Михаил',
+               'Анна', 'Мария', 'Елена', 'Ольга', 'Наталья', 'Татьяна', 'Екатерина', 'Ирина']
+LAST_NAMES = ['Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов', 'Михайлов',
+              'Новиков', 'Фёдоров', 'Морозов', 'Волков', 'Алексеев', 'Лебедев', 'Семёнов', 'Егоров']
+COMMENTS = ['', '', '', 'Стучит подвеска', 'Горит check engine', 'Нужна замена колодок',
+            'Перед дальней поездкой', 'Плохо заводится в мороз', 'Скрип при торможении']
+REVIEW_TEXTS = ['Отличный сервис, всё сделали быстро', 'Вежливые мастера, цены как обещали',
+                'Пришлось подождать, но результатом доволен', 'Сделали диагностику и всё объяснили',
+                'Не понравилось, что задержали машину на день', 'Рекомендую, обслуживаюсь не первый год']
+BLOG_CATEGORIES = ['Советы', 'Обслуживание', 'Ремонт', 'Новости', 'Сезонное']
+BLOG_ICONS = ['FileText', 'Wrench', 'Snowflake', 'Sun', 'Settings', 'Car']
+MODEL_PREFIXES = ['X', 'GT', 'LX', 'CR', 'Q', 'S', 'RX', 'Sport', 'City', 'Terra']
+BOOKING_TIMES = [f'{hour:02d}:00' for hour in range(9, 21)]
+MONTHS = ['января', 'февраля', 'марта', 'апреля', 'мая', 'июня', 'июля', 'августа',
+          'сентября', 'октября', 'ноября', 'декабря']
+
+# Доли статусов: старые заявки в основном закрыты
+STATUS_WEIGHTS = (('new', 8), ('confirmed', 12), ('completed', 65), ('cancelled', 15))
+
+
+def copy_rows(cur: Any, table: str, columns: Sequence[str], rows: Iterator[Tuple[Any, ...]], chunk: int) -> int:
+    '''COPY строк пачками: в памяти не больше chunk строк CSV'''
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    total = 0
+    while True:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        count = 0
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+            if count == chunk:
+                break
+        if not count:
+            return total
+        buffer.seek(0)
+        cur.copy_expert(sql, buffer)
+        total += count
+
+
+def person(rng: random.Random) -> str:
+    return f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+
+
+def phone(rng: random.Random) -> str:
+    return f'+79{rng.randrange(10 ** 9):09d}'
+
+
+def timestamp_within(rng: random.Random, now: datetime, days: int) -> datetime:
+    return now - timedelta(seconds=rng.randrange(days * 86400))
+
+
+def generate_models(rng: random.Random, brand_ids: List[int], per_brand: int) -> Iterator[Tuple[Any, ...]]:
+    for brand_id in brand_ids:
+        for index in range(per_brand):
+            year_from = rng.randrange(1995, 2024)
+            year_to = year_from + rng.randrange(3, 10) if rng.random() < 0.7 else ''
+            yield brand_id, f'{rng.choice(MODEL_PREFIXES)}{index + 1}', year_from, year_to
+
+
+def generate_model_prices(rng: random.Random, models: List[Tuple[int, int]], brand_prices: dict,
+                          share: float) -> Iterator[Tuple[Any, ...]]:
+    '''Цена модели — цена бренда (или общая) с наценкой от -10% до +40%'''
+    for model_id, brand_id in models:
+        for (price_brand_id, service_id), base_price in brand_prices.items():
+            if price_brand_id != brand_id or rng.random() >= share:
+                continue
+            yield service_id, brand_id, model_id, round(float(base_price) * rng.uniform(0.9, 1.4), -1)
+
+
+def generate_bookings(rng: random.Random, count: int, brands: List[Tuple[int, str]], models_by_brand: dict,
+                      service_titles: List[str], days: int) -> Iterator[Tuple[Any, ...]]:
+    now = datetime.combine(date.today(), datetime.min.time())
+    statuses = [status for status, _ in STATUS_WEIGHTS]
+    weights = [weight for _, weight in STATUS_WEIGHTS]
+    for _ in range(count):
+        created_at = timestamp_within(rng, now, days)
+        updated_at = min(now, created_at + timedelta(seconds=rng.randrange(3 * 86400)))
+        brand_id, brand_name = rng.choice(brands)
+        models = models_by_brand.get(brand_id)
+        services = rng.sample(service_titles, k=min(len(service_titles), rng.choice((1, 1, 1, 2, 3))))
+        has_date = rng.random() < 0.85
+        yield (
+            person(rng),
+            phone(rng),
+            f'user{rng.randrange(10 ** 6)}@example.com' if rng.random() < 0.4 else '',
+            ', '.join(services),
+            brand_name,
+            rng.choice(models) if models else '',
+            (created_at.date() + timedelta(days=rng.randrange(15))).isoformat() if has_date else '',
+            rng.choice(BOOKING_TIMES) if has_date else '',
+            rng.choice(COMMENTS),
+            rng.choices(statuses, weights)[0],
+            created_at.isoformat(),
+            updated_at.isoformat()
+        )
+
+
+def generate_reviews(rng: random.Random, count: int, service_titles: List[str], days: int,
+                     seed: int) -> Iterator[Tuple[Any, ...]]:
+    now = datetime.combine(date.today(), datetime.min.time())
+    for index in range(count):
+        created_at = timestamp_within(rng, now, days)
+        from_2gis = rng.random() < 0.6
+        yield (
+            person(rng),
+            rng.choices((5, 4, 3, 2, 1), (55, 25, 10, 5, 5))[0],
+            rng.choice(REVIEW_TEXTS),
+            rng.choice(service_titles) if rng.random() < 0.7 else '',
+            created_at.date().isoformat(),
+            't' if rng.random() < 0.9 else 'f',
+            '2gis' if from_2gis else 'manual',
+            f'synthetic-{seed}-{index}' if from_2gis else '',
+            created_at.isoformat(),
+            created_at.isoformat()
+        )
+
+
+def generate_posts(rng: random.Random, count: int, days: int) -> Iterator[Tuple[Any, ...]]:
+    today = date.today()
+    for index in range(count):
+        published = today - timedelta(days=rng.randrange(days))
+        sections = [{
+            'title': f'{number}. Раздел {number}',
+            'text': ' '.join(rng.choice(REVIEW_TEXTS) for _ in range(rng.randrange(2, 6))),
+            **({'list': [f'Пункт {item}' for item in range(1, rng.randrange(3, 7))]} if rng.random() < 0.6 else {})
+        } for number in range(1, rng.randrange(3, 8))]
+        yield (
+            f'Статья {index + 1}: {rng.choice(BLOG_CATEGORIES).lower()} и уход за автомобилем',
+            'Краткое описание статьи для списка',
+            rng.choice(BLOG_CATEGORIES),
+            rng.choice(BLOG_ICONS),
+            f'https://picsum.photos/seed/{index}/1200/630',
+            f'{published.day} {MONTHS[published.month - 1]} {published.year}',
+            f'{rng.randrange(3, 15)} мин',
+            'Вступление к статье.',
+            json.dumps(sections, ensure_ascii=False),
+            'Заключение статьи.'
+        )
+
+
+def timed(label: str, action: Callable[[], int]) -> None:
+    started = time.monotonic()
+    count = action()
+    print(f'{label}: {count} строк за {time.monotonic() - started:.1f} с')
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description='Синтетические данные для нагрузочных тестов')
+    parser.add_argument('--dsn', default=os.environ.get('DATABASE_URL'), help='по умолчанию DATABASE_URL')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--bookings', type=int, default=100000)
+    parser.add_argument('--reviews', type=int, default=10000)
+    parser.add_argument('--posts', type=int, default=1000)
+    parser.add_argument('--models', type=int, default=20, help='моделей на бренд')
+    parser.add_argument('--model-price-share', type=float, default=0.5,
+                        help='доля пар модель × услуга со своей ценой')
+    parser.add_argument('--days', type=int, default=730, help='глубина истории в днях')
+    parser.add_argument('--chunk', type=int, default=50000, help='строк в одном COPY')
+    args = parser.parse_args(argv)
+    if not args.dsn:
+        parser.error('нужен --dsn или DATABASE_URL')
+
+    rng = random.Random(args.seed)
+    conn = psycopg2.connect(args.dsn)
+    cur = conn.cursor()
+
+    cur.execute('SELECT id, name FROM brands ORDER BY id')
+    brands = cur.fetchall()
+    cur.execute('SELECT title FROM services WHERE is_active = true ORDER BY id')
+    service_titles = [row[0] for row in cur.fetchall()]
+    if not brands or not service_titles:
+        print('Нет брендов или услуг: сначала запустите seed-database', file=sys.stderr)
+        return 1
+
+    # Модели: COPY во временную таблицу и вставка без дублей (brand_id, name)
+    cur.execute("""
+        CREATE TEMP TABLE synthetic_models (
+            brand_id INTEGER, name VARCHAR(100), year_from INTEGER, year_to INTEGER
+        ) ON COMMIT DROP
+    """)
+    timed('models', lambda: copy_rows(
+        cur, 'synthetic_models', ('brand_id', 'name', 'year_from', 'year_to'),
+        generate_models(rng, [brand_id for brand_id, _ in brands], args.models), args.chunk
+    ))
+    cur.execute("""
+        INSERT INTO models (brand_id, name, year_from, year_to)
+        SELECT DISTINCT ON (brand_id, name) brand_id, name, year_from, year_to FROM synthetic_models
+        ORDER BY brand_id, name
+        ON CONFLICT (brand_id, name) DO NOTHING
+    """)
+
+    cur.execute('SELECT id, brand_id, name FROM models ORDER BY id')
+    model_rows = cur.fetchall()
+    models_by_brand: dict = {}
+    for _, brand_id, name in model_rows:
+        models_by_brand.setdefault(brand_id, []).append(name)
+
+    cur.execute("""
+        SELECT brand_id, service_id, base_price FROM service_prices
+        WHERE brand_id IS NOT NULL AND model_id IS NULL
+        ORDER BY brand_id, service_id
+    """)
+    brand_prices = {(brand_id, service_id): price for brand_id, service_id, price in cur.fetchall()}
+
+    cur.execute("""
+        CREATE TEMP TABLE synthetic_prices (
+            service_id INTEGER, brand_id INTEGER, model_id INTEGER, base_price NUMERIC(10, 2)
+        ) ON COMMIT DROP
+    """)
+    timed('model prices', lambda: copy_rows(
+        cur, 'synthetic_prices', ('service_id', 'brand_id', 'model_id', 'base_price'),
+        generate_model_prices(rng, [(model_id, brand_id) for model_id, brand_id, _ in model_rows],
+                              brand_prices, args.model_price_share), args.chunk
+    ))
+    cur.execute("""
+        INSERT INTO service_prices (service_id, brand_id, model_id, base_price)
+        SELECT service_id, brand_id, model_id, base_price FROM synthetic_prices
+        ON CONFLICT (service_id, (COALESCE(brand_id, 0)), (COALESCE(model_id, 0))) DO NOTHING
+    """)
+
+    # NOTIFY на каждую строку для long-poll здесь не нужен, а updated_at
+    # берётся из данных, а не проставляется триггером в момент вставки
+    cur.execute('ALTER TABLE bookings DISABLE TRIGGER trg_bookings_notify')
+    cur.execute('ALTER TABLE bookings DISABLE TRIGGER trg_bookings_touch_updated_at')
+    timed('bookings', lambda: copy_rows(
+        cur, 'bookings',
+        ('customer_name', 'customer_phone', 'customer_email', 'service_type', 'car_brand', 'car_model',
+         'preferred_date', 'preferred_time', 'comment', 'status', 'created_at', 'updated_at'),
+        generate_bookings(rng, args.bookings, brands, models_by_brand, service_titles, args.days), args.chunk
+    ))
+    cur.execute('ALTER TABLE bookings ENABLE TRIGGER trg_bookings_notify')
+    cur.execute('ALTER TABLE bookings ENABLE TRIGGER trg_bookings_touch_updated_at')
+
+    timed('reviews', lambda: copy_rows(
+        cur, 'reviews',
+        ('customer_name', 'rating', 'review_text', 'service_name', 'review_date', 'is_visible',
+         'source', 'source_id', 'created_at', 'updated_at'),
+        generate_reviews(rng, args.reviews, service_titles, args.days, args.seed), args.chunk
+    ))
+    timed('blog posts', lambda: copy_rows(
+        cur, 'blog_posts',
+        ('title', 'excerpt', 'category', 'icon', 'image', 'date', 'read_time', 'intro', 'sections', 'conclusion'),
+        generate_posts(rng, args.posts, args.days), args.chunk
+    ))
+
+    conn.commit()
+
+    # Свежая статистика, чтобы планировщик сразу видел новые объёмы
+    conn.autocommit = True
+    for table in ('models', 'service_prices', 'bookings', 'reviews', 'blog_posts'):
+        cur.execute(f'ANALYZE {table}')
+    cur.close()
+    conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -1,4 +1,4 @@
-import { useState } from 'react';
+import { useState, useRef, useEffect, useCallback } from 'react';
 import { Button } from '@/components/ui/button';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
 import { Input } from '@/components/ui/input';
@@ -63,22 +63,132 @@ const services = [
   }
 ];
 
+const BOOKING_URL = 'https://functions.poehali.dev/55c039ba-f940-49e1-8589-73ace0f01f05';
+const ALL_TIMES = ['09:00', '10:00', '11:00', '12:00', '13:00', '14:00', '15:00', '16:00', '17:00', '18:00', '19:00', '20:00'];
+const AVAILABILITY_DAYS = 31;
+const BRAND_DETAILS_URL = 'https://functions.poehali.dev/9fd8ddff-189b-4246-afc3-73d082eb8699';
+const BRANDS_URL = 'https://functions.poehali.dev/3811becc-a55e-4be9-a710-283d3eee897f';
+
+interface CatalogBrand {
+  name: string;
+  slug: string;
+}
+
+interface CarModel {
+  id: number;
+  name: string;
+}
+
+interface CarPricing {
+  models: CarModel[];
+  prices: { title: string; price: number | null }[];
+}
+
+interface Availability {
+  until: string | null;
+  days: { date: string; times: string[] }[];
+}
+
 interface BookingDialogProps {
   setIsBookingOpen: (open: boolean) => void;
+  brandName?: string;
+  brandSlug?: string;
 }
 
-const BookingDialog = ({ setIsBookingOpen }: BookingDialogProps) => {
+const BookingDialog = ({ setIsBookingOpen, brandName, brandSlug }: BookingDialogProps) => {
   const [selectedServices, setSelectedServices] = useState<number[]>([]);
   const [date, setDate] = useState<Date>();
   const [time, setTime] = useState('');
   const [name, setName] = useState('');
   const [phone, setPhone] = useState('');
   const [email, setEmail] = useState('');
-  const [brand, setBrand] = useState('');
+  const [brand, setBrand] = useState(brandName ?? '');
   const [model, setModel] = useState('');
   const [comment, setComment] = useState('');
   const [isSubmitting, setIsSubmitting] = useState(false);
   const [submitSuccess, setSubmitSuccess] = useState(false);
+  // One key per distinct form payload: retries and double clicks reuse it
+  const idempotencyRef = useRef<{ key: string; payload: string } | null>(null);
+  const [availability, setAvailability] = useState<Availability | null>(null);
+  const [carPricing, setCarPricing] = useState<CarPricing | null>(null);
+  const brandModelsRef = useRef<CarModel[]>([]);
+  const [catalogBrands, setCatalogBrands] = useState<CatalogBrand[]>([]);
+
+  const selectedServiceTitles = selectedServices
+    .map(id => services.find(s => s.id === id)?.title)
+    .filter(Boolean)
+    .join(', ');
+
+  const loadAvailability = useCallback(async () => {
+    try {
+      const params = new URLSearchParams({ days: String(AVAILABILITY_DAYS), service: selectedServiceTitles });
+      const response = await fetch(`${BOOKING_URL}?${params}`);
+      if (response.ok) {
+        setAvailability(await response.json());
+      }
+    } catch (error) {
+      console.error('Error loading availability:', error);
+    }
+  }, [selectedServiceTitles]);
+
+  useEffect(() => {
+    loadAvailability();
+  }, [loadAvailability]);
+
+  useEffect(() => {
+    fetch(BRANDS_URL)
+      .then(response => (response.ok ? response.json() : null))
+      .then(data => setCatalogBrands(data?.brands ?? []))
+      .catch(error => console.error('Error loading brands:', error));
+  }, []);
+
+  // Slugs come from the catalog: they are not always derivable from the name ('li auto')
+  const enteredBrand = brand.trim().toLowerCase();
+  const slug = brandSlug && enteredBrand === (brandName ?? '').trim().toLowerCase()
+    ? brandSlug
+    : catalogBrands.find(b => b.name.toLowerCase() === enteredBrand || b.slug === enteredBrand)?.slug ?? '';
+
+  // Models of the entered brand and prices resolved for the chosen model (model -> brand -> global)
+  useEffect(() => {
+    if (!slug) {
+      setCarPricing(null);
+      return;
+    }
+    const controller = new AbortController();
+    const timer = setTimeout(async () => {
+      try {
+        const params = new URLSearchParams({ slug, view: 'models' });
+        const knownModel = brandModelsRef.current.find(m => m.name.toLowerCase() === model.trim().toLowerCase());
+        if (knownModel) {
+          params.set('model', String(knownModel.id));
+        }
+        const response = await fetch(`${BRAND_DETAILS_URL}?${params}`, { signal: controller.signal });
+        const data: CarPricing | null = response.ok ? await response.json() : null;
+        brandModelsRef.current = data?.models ?? [];
+        setCarPricing(data);
+      } catch (error) {
+        if (!controller.signal.aborted) {
+          console.error('Error loading car pricing:', error);
+        }
+      }
+    }, 400);
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [slug, model]);
+
+  // Dates beyond the slot horizon keep the full list: the request is confirmed by phone
+  const dateKey = date ? format(date, 'yyyy-MM-dd') : '';
+  const timeOptions = availability?.until && dateKey && dateKey <= availability.until
+    ? availability.days.find(day => day.date === dateKey)?.times ?? []
+    : ALL_TIMES;
+
+  useEffect(() => {
+    if (time && !timeOptions.includes(time)) {
+      setTime('');
+    }
+  }, [time, timeOptions]);
 
   const toggleService = (id: number) => {
     setSelectedServices(prev =>
@@ -95,7 +205,11 @@ const BookingDialog = ({ setIsBookingOpen }: BookingDialogProps) => {
       5: 5000,
       6: 10000
     };
-    return selectedServices.reduce((sum, id) => sum + basePrices[id], 0);
+    return selectedServices.reduce((sum, id) => {
+      const title = services.find(s => s.id === id)?.title;
+      const resolved = carPricing?.prices.find(p => p.title === title)?.price;
+      return sum + (resolved ?? basePrices[id]);
+    }, 0);
   };
 
   const handleBooking = async () => {
@@ -107,27 +221,28 @@ const BookingDialog = ({ setIsBookingOpen }: BookingDialogProps) => {
     setIsSubmitting(true);
 
     try {
-      const selectedServiceTitles = selectedServices
-        .map(id => services.find(s => s.id === id)?.title)
-        .filter(Boolean)
-        .join(', ');
+      const payload = JSON.stringify({
+        name,
+        phone,
+        email,
+        service: selectedServiceTitles || 'Не указано',
+        brand,
+        model,
+        date: dateKey,
+        time,
+        comment,
+      });
+      if (idempotencyRef.current?.payload !== payload) {
+        idempotencyRef.current = { key: crypto.randomUUID(), payload };
+      }
 
-      const response = await fetch('https://functions.poehali.dev/55c039ba-f940-49e1-8589-73ace0f01f05', {
+      const response = await fetch(BOOKING_URL, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          'Idempotency-Key': idempotencyRef.current.key,
         },
-        body: JSON.stringify({
-          name,
-          phone,
-          email,
-          service: selectedServiceTitles || 'Не указано',
-          brand,
-          model,
-          date: date ? format(date, 'yyyy-MM-dd') : '',
-          time,
-          comment,
-        }),
+        body: payload,
       });
 
       const data = await response.json();
@@ -137,6 +252,10 @@ const BookingDialog = ({ setIsBookingOpen }: BookingDialogProps) => {
         setTimeout(() => {
           setIsBookingOpen(false);
         }, 2000);
+      } else if (response.status === 409) {
+        alert(data.error);
+        setTime('');
+        loadAvailability();
       } else {
         alert(data.error || 'Ошибка при отправке заявки. Попробуйте позже.');
       }
@@ -233,18 +352,13 @@ const BookingDialog = ({ setIsBookingOpen }: BookingDialogProps) => {
                 <SelectValue placeholder="Выберите время" />
               </SelectTrigger>
               <SelectContent>
-                <SelectItem value="09:00">09:00</SelectItem>
-                <SelectItem value="10:00">10:00</SelectItem>
-                <SelectItem value="11:00">11:00</SelectItem>
-                <SelectItem value="12:00">12:00</SelectItem>
-                <SelectItem value="13:00">13:00</SelectItem>
-                <SelectItem value="14:00">14:00</SelectItem>
-                <SelectItem value="15:00">15:00</SelectItem>
-                <SelectItem value="16:00">16:00</SelectItem>
-                <SelectItem value="17:00">17:00</SelectItem>
-                <SelectItem value="18:00">18:00</SelectItem>
-                <SelectItem value="19:00">19:00</SelectItem>
-                <SelectItem value="20:00">20:00</SelectItem>
+                {timeOptions.length === 0 ? (
+                  <SelectItem value="none" disabled>Нет свободного времени</SelectItem>
+                ) : (
+                  timeOptions.map(option => (
+                    <SelectItem key={option} value={option}>{option}</SelectItem>
+                  ))
+                )}
               </SelectContent>
             </Select>
           </div>
@@ -288,19 +402,31 @@ const BookingDialog = ({ setIsBookingOpen }: BookingDialogProps) => {
             <Label htmlFor="brand">Марка авто</Label>
             <Input
               id="brand"
+              list="brand-options"
               placeholder="Toyota"
               value={brand}
               onChange={(e) => setBrand(e.target.value)}
             />
+            <datalist id="brand-options">
+              {catalogBrands.map(b => (
+                <option key={b.slug} value={b.name} />
+              ))}
+            </datalist>
           </div>
           <div className="space-y-2">
             <Label htmlFor="model">Модель</Label>
             <Input
               id="model"
+              list="model-options"
               placeholder="Camry"
               value={model}
               onChange={(e) => setModel(e.target.value)}
             />
+            <datalist id="model-options">
+              {carPricing?.models.map(m => (
+                <option key={m.id} value={m.name} />
+              ))}
+            </datalist>
           </div>
         </div>
 
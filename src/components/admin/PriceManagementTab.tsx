@@ -9,6 +9,14 @@ import { TabsContent } from '@/components/ui/tabs';
 import Icon from '@/components/ui/icon';
 import { Brand, Service, Price } from './types';
 
+interface AdjustedPrice {
+  id: number;
+  brand_name: string | null;
+  service_title: string;
+  old_price: number;
+  new_price: number;
+}
+
 interface PriceManagementTabProps {
   prices: Price[];
   brands: Brand[];
@@ -23,6 +31,10 @@ const PriceManagementTab = ({ prices, brands, services, onRefresh }: PriceManage
   const [bulkModalOpen, setBulkModalOpen] = useState(false);
   const [bulkForm, setBulkForm] = useState({ service_id: '', base_price: '', brand_ids: [] as number[] });
   const [savingBulk, setSavingBulk] = useState(false);
+  const [adjustModalOpen, setAdjustModalOpen] = useState(false);
+  const [adjustForm, setAdjustForm] = useState({ brand_id: 'all', service_id: 'all', percent: '', round_to: '10' });
+  const [adjustPreview, setAdjustPreview] = useState<AdjustedPrice[] | null>(null);
+  const [adjusting, setAdjusting] = useState(false);
 
   const openPriceModal = (price?: Price) => {
     if (price) {
@@ -114,41 +126,81 @@ const PriceManagementTab = ({ prices, brands, services, onRefresh }: PriceManage
     }
 
     setSavingBulk(true);
-    let successCount = 0;
-    let errorCount = 0;
 
-    for (const brandId of bulkForm.brand_ids) {
-      try {
-        const response = await fetch('https://functions.poehali.dev/238c471e-a087-4373-8dcf-cec9258e7a04', {
-          method: 'POST',
-          headers: { 'Content-Type': 'application/json' },
-          body: JSON.stringify({
+    try {
+      // One import request for all selected brands instead of a POST per brand
+      const response = await fetch('https://functions.poehali.dev/238c471e-a087-4373-8dcf-cec9258e7a04', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+          rows: bulkForm.brand_ids.map(brandId => ({
             service_id: parseInt(bulkForm.service_id),
             brand_id: brandId,
             base_price: parseFloat(bulkForm.base_price),
-          }),
-        });
+          })),
+        }),
+      });
 
-        const data = await response.json();
-        if (response.ok && data.success) {
-          successCount++;
-        } else {
-          errorCount++;
-        }
-      } catch (error) {
-        console.error('Error saving bulk price:', error);
-        errorCount++;
+      const data = await response.json();
+      if (response.ok && data.success) {
+        setBulkModalOpen(false);
+        onRefresh();
+        const summary = `Добавлено: ${data.inserted}, изменено: ${data.updated}, без изменений: ${data.unchanged}`;
+        alert(data.rejected.length === 0 ? summary : `${summary}, ошибок: ${data.rejected.length}`);
+      } else {
+        alert(data.error || 'Ошибка при сохранении цен');
       }
+    } catch (error) {
+      console.error('Error saving bulk prices:', error);
+      alert('Ошибка при сохранении цен');
+    } finally {
+      setSavingBulk(false);
     }
+  };
 
-    setSavingBulk(false);
-    setBulkModalOpen(false);
-    onRefresh();
-    
-    if (errorCount === 0) {
-      alert(`Успешно добавлено цен: ${successCount}`);
-    } else {
-      alert(`Добавлено: ${successCount}, Ошибок: ${errorCount}`);
+  const openAdjustModal = () => {
+    setAdjustForm({ brand_id: 'all', service_id: 'all', percent: '', round_to: '10' });
+    setAdjustPreview(null);
+    setAdjustModalOpen(true);
+  };
+
+  // dry_run returns the same before/after set the real update would write
+  const adjustPrices = async (dryRun: boolean) => {
+    if (!adjustForm.percent) {
+      alert('Укажите процент изменения');
+      return;
+    }
+
+    setAdjusting(true);
+    try {
+      const response = await fetch('https://functions.poehali.dev/238c471e-a087-4373-8dcf-cec9258e7a04', {
+        method: 'PATCH',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+          all: adjustForm.brand_id === 'all' && adjustForm.service_id === 'all',
+          brand_ids: adjustForm.brand_id === 'all' ? [] : [parseInt(adjustForm.brand_id)],
+          service_ids: adjustForm.service_id === 'all' ? [] : [parseInt(adjustForm.service_id)],
+          percent: parseFloat(adjustForm.percent),
+          round_to: parseFloat(adjustForm.round_to),
+          dry_run: dryRun,
+        }),
+      });
+
+      const data = await response.json();
+      if (!response.ok || !data.success) {
+        alert(data.error || 'Ошибка при изменении цен');
+      } else if (dryRun) {
+        setAdjustPreview(data.prices);
+      } else {
+        setAdjustModalOpen(false);
+        onRefresh();
+        alert(data.message);
+      }
+    } catch (error) {
+      console.error('Error adjusting prices:', error);
+      alert('Ошибка при изменении цен');
+    } finally {
+      setAdjusting(false);
     }
   };
 
@@ -164,6 +216,10 @@ const PriceManagementTab = ({ prices, brands, services, onRefresh }: PriceManage
             <Icon name="ListPlus" className="mr-2" size={18} />
             Массовое добавление
           </Button>
+          <Button onClick={openAdjustModal} variant="outline">
+            <Icon name="Percent" className="mr-2" size={18} />
+            Изменить на %
+          </Button>
         </div>
 
         <div className="space-y-2">
@@ -322,6 +378,98 @@ const PriceManagementTab = ({ prices, brands, services, onRefresh }: PriceManage
           </div>
         </DialogContent>
       </Dialog>
+      <Dialog open={adjustModalOpen} onOpenChange={setAdjustModalOpen}>
+        <DialogContent className="max-w-2xl max-h-[80vh] overflow-y-auto">
+          <DialogHeader>
+            <DialogTitle>Изменение цен на процент</DialogTitle>
+            <DialogDescription>Проверьте новые цены перед применением</DialogDescription>
+          </DialogHeader>
+          <div className="space-y-4">
+            <div className="grid grid-cols-2 gap-4">
+              <div className="space-y-2">
+                <Label>Бренд</Label>
+                <Select value={adjustForm.brand_id} onValueChange={(value) => { setAdjustForm({ ...adjustForm, brand_id: value }); setAdjustPreview(null); }}>
+                  <SelectTrigger>
+                    <SelectValue />
+                  </SelectTrigger>
+                  <SelectContent>
+                    <SelectItem value="all">Все бренды</SelectItem>
+                    {brands.map((brand) => (
+                      <SelectItem key={brand.id} value={brand.id.toString()}>
+                        {brand.name}
+                      </SelectItem>
+                    ))}
+                  </SelectContent>
+                </Select>
+              </div>
+              <div className="space-y-2">
+                <Label>Услуга</Label>
+                <Select value={adjustForm.service_id} onValueChange={(value) => { setAdjustForm({ ...adjustForm, service_id: value }); setAdjustPreview(null); }}>
+                  <SelectTrigger>
+                    <SelectValue />
+                  </SelectTrigger>
+                  <SelectContent>
+                    <SelectItem value="all">Все услуги</SelectItem>
+                    {services.map((service) => (
+                      <SelectItem key={service.id} value={service.id.toString()}>
+                        {service.title}
+                      </SelectItem>
+                    ))}
+                  </SelectContent>
+                </Select>
+              </div>
+              <div className="space-y-2">
+                <Label>Изменение, % *</Label>
+                <Input
+                  type="number"
+                  value={adjustForm.percent}
+                  onChange={(e) => { setAdjustForm({ ...adjustForm, percent: e.target.value }); setAdjustPreview(null); }}
+                  placeholder="10"
+                />
+              </div>
+              <div className="space-y-2">
+                <Label>Округление</Label>
+                <Select value={adjustForm.round_to} onValueChange={(value) => { setAdjustForm({ ...adjustForm, round_to: value }); setAdjustPreview(null); }}>
+                  <SelectTrigger>
+                    <SelectValue />
+                  </SelectTrigger>
+                  <SelectContent>
+                    <SelectItem value="1">до 1 ₽</SelectItem>
+                    <SelectItem value="10">до 10 ₽</SelectItem>
+                    <SelectItem value="50">до 50 ₽</SelectItem>
+                    <SelectItem value="100">до 100 ₽</SelectItem>
+                  </SelectContent>
+                </Select>
+              </div>
+            </div>
+            {adjustPreview && (
+              <div className="space-y-1 max-h-60 overflow-y-auto border rounded-md p-2 text-sm">
+                <div className="font-semibold">Изменится цен: {adjustPreview.length}</div>
+                {adjustPreview.map((price) => (
+                  <div key={price.id} className="flex justify-between">
+                    <span>{price.brand_name ?? 'Все бренды'} — {price.service_title}</span>
+                    <span>{price.old_price.toLocaleString()} → {price.new_price.toLocaleString()}</span>
+                  </div>
+                ))}
+              </div>
+            )}
+            <div className="flex gap-2 justify-end">
+              <Button variant="outline" onClick={() => setAdjustModalOpen(false)} disabled={adjusting}>
+                Отмена
+              </Button>
+              {adjustPreview ? (
+                <Button onClick={() => adjustPrices(false)} className="gradient-primary" disabled={adjusting || adjustPreview.length === 0}>
+                  Применить
+                </Button>
+              ) : (
+                <Button onClick={() => adjustPrices(true)} className="gradient-primary" disabled={adjusting}>
+                  Предпросмотр
+                </Button>
+              )}
+            </div>
+          </div>
+        </DialogContent>
+      </Dialog>
     </>
   );
 };
@@ -20,3 +20,14 @@ export interface Price {
   service_title: string;
   brand_name: string;
 }
+
+export interface PriceMatrix {
+  brands: Brand[];
+  services: Service[];
+  currency: string | null;
+  // prices[brandIndex][serviceIndex], null where the brand has no price for the service
+  prices: (number | null)[][];
+  price_ids: (number | null)[][];
+  // Per-cell currencies for brand rows that mix currencies, null for rows priced in `currency`
+  currencies: ((string | null)[] | null)[];
+}
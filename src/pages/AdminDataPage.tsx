@@ -5,7 +5,28 @@ import { Tabs, TabsList, TabsTrigger } from '@/components/ui/tabs';
 import Icon from '@/components/ui/icon';
 import BrandManagementTab from '@/components/admin/BrandManagementTab';
 import PriceManagementTab from '@/components/admin/PriceManagementTab';
-import { Brand, Service, Price } from '@/components/admin/types';
+import { Brand, Service, Price, PriceMatrix } from '@/components/admin/types';
+
+const PRICE_MATRIX_URL = 'https://functions.poehali.dev/238c471e-a087-4373-8dcf-cec9258e7a04?view=matrix';
+
+const matrixPrices = (matrix: PriceMatrix): Price[] =>
+  matrix.brands.flatMap((brand, brandIndex) =>
+    matrix.services.flatMap((service, serviceIndex) => {
+      const id = matrix.price_ids[brandIndex][serviceIndex];
+      const basePrice = matrix.prices[brandIndex][serviceIndex];
+      return id === null || basePrice === null
+        ? []
+        : [{
+            id,
+            service_id: service.id,
+            brand_id: brand.id,
+            base_price: basePrice,
+            currency: matrix.currencies?.[brandIndex]?.[serviceIndex] ?? matrix.currency ?? '₽',
+            service_title: service.title,
+            brand_name: brand.name,
+          }];
+    })
+  );
 
 const AdminDataPage = () => {
   const navigate = useNavigate();
@@ -38,19 +59,13 @@ const AdminDataPage = () => {
   const fetchData = async () => {
     setLoading(true);
     try {
-      const [brandsRes, servicesRes, pricesRes] = await Promise.all([
-        fetch('https://functions.poehali.dev/3811becc-a55e-4be9-a710-283d3eee897f'),
-        fetch('https://functions.poehali.dev/43a403bc-db40-4188-82e3-9949126abbfc'),
-        fetch('https://functions.poehali.dev/238c471e-a087-4373-8dcf-cec9258e7a04'),
-      ]);
-      
-      const brandsData = await brandsRes.json();
-      const servicesData = await servicesRes.json();
-      const pricesData = await pricesRes.json();
-      
-      setBrands(brandsData.brands || []);
-      setServices(servicesData.services || []);
-      setPrices(pricesData.prices || []);
+      // Brands, services and prices come from one matrix request
+      const response = await fetch(PRICE_MATRIX_URL);
+      const matrix: PriceMatrix = await response.json();
+
+      setBrands(matrix.brands || []);
+      setServices(matrix.services || []);
+      setPrices(matrix.prices ? matrixPrices(matrix) : []);
     } catch (error) {
       console.error('Error fetching data:', error);
     } finally {
@@ -1,8 +1,9 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
 import { Button } from '@/components/ui/button';
 import { Badge } from '@/components/ui/badge';
+import { Checkbox } from '@/components/ui/checkbox';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@/components/ui/select';
 import Icon from '@/components/ui/icon';
 import { format } from 'date-fns';
@@ -38,12 +39,30 @@ const statusLabels: Record<string, string> = {
   cancelled: 'Отменена',
 };
 
+const BOOKINGS_URL = 'https://functions.poehali.dev/07871607-696c-49db-b330-8d0d08b2896e';
+const UPDATE_STATUS_URL = 'https://functions.poehali.dev/04351be8-3746-49dd-9c00-c57ea8ad97f3';
+const LONG_POLL_WAIT_S = 25;
+const SYNC_RETRY_MS = 5000;
+
+const sortBookings = (list: Booking[]) =>
+  [...list].sort((a, b) => b.created_at.localeCompare(a.created_at) || b.id - a.id);
+
 const AdminPage = () => {
   const navigate = useNavigate();
   const [bookings, setBookings] = useState<Booking[]>([]);
   const [loading, setLoading] = useState(true);
   const [filterStatus, setFilterStatus] = useState<string>('all');
   const [updatingId, setUpdatingId] = useState<number | null>(null);
+  const [selectedIds, setSelectedIds] = useState<number[]>([]);
+  const [bulkStatus, setBulkStatus] = useState('confirmed');
+  const [bulkUpdating, setBulkUpdating] = useState(false);
+  const [statusCounts, setStatusCounts] = useState<Record<string, number>>({});
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const watermarkRef = useRef<string | null>(null);
+  const latestRef = useRef<string | null>(null);
+  const nextCursorRef = useRef<string | null>(null);
+  nextCursorRef.current = nextCursor;
 
   // Check authentication
   useEffect(() => {
@@ -64,16 +83,24 @@ const AdminPage = () => {
     }
   }, [navigate]);
 
+  const bookingsUrl = (cursor?: string) => {
+    const params = new URLSearchParams();
+    if (filterStatus !== 'all') params.set('status', filterStatus);
+    if (cursor) params.set('cursor', cursor);
+    const query = params.toString();
+    return query ? `${BOOKINGS_URL}?${query}` : BOOKINGS_URL;
+  };
+
   const fetchBookings = async () => {
     setLoading(true);
     try {
-      const url = filterStatus === 'all'
-        ? 'https://functions.poehali.dev/07871607-696c-49db-b330-8d0d08b2896e'
-        : `https://functions.poehali.dev/07871607-696c-49db-b330-8d0d08b2896e?status=${filterStatus}`;
-      
-      const response = await fetch(url);
+      const response = await fetch(bookingsUrl());
       const data = await response.json();
       setBookings(data.bookings || []);
+      setStatusCounts(data.status_counts || {});
+      setNextCursor(data.next_cursor || null);
+      watermarkRef.current = data.watermark || null;
+      latestRef.current = null;
     } catch (error) {
       console.error('Error fetching bookings:', error);
     } finally {
@@ -81,14 +108,148 @@ const AdminPage = () => {
     }
   };
 
+  // Merges changed bookings from get-bookings?since= into the loaded list.
+  // Counts come from the server: a change to a booking on a page that is not
+  // loaded yet cannot be counted here
+  const applyChanges = (changes: Booking[], counts?: Record<string, number>) => {
+    if (counts) setStatusCounts(counts);
+
+    const changed = new Map(changes.map(change => [change.id, change]));
+    setBookings(prev => {
+      const known = new Set(prev.map(booking => booking.id));
+      const oldest = prev[prev.length - 1];
+      // Unknown bookings join the list only inside the loaded range; older ones arrive with the next page
+      const inLoadedRange = (booking: Booking) =>
+        !nextCursorRef.current || !oldest || sortBookings([booking, oldest])[0] === booking;
+      const merged = prev.map(booking => changed.get(booking.id) ?? booking);
+      const added = changes.filter(change => !known.has(change.id) && inLoadedRange(change));
+      return sortBookings([...merged, ...added])
+        .filter(booking => filterStatus === 'all' || booking.status === filterStatus);
+    });
+  };
+
+  // Long poll: get-bookings holds the request until a booking is created or changed
+  useEffect(() => {
+    const controller = new AbortController();
+    const sleep = (ms: number) => new Promise(resolve => setTimeout(resolve, ms));
+
+    const poll = async () => {
+      while (!controller.signal.aborted) {
+        const since = watermarkRef.current;
+        if (!since) {
+          await sleep(1000);
+          continue;
+        }
+        try {
+          const params = new URLSearchParams({ since, wait: String(LONG_POLL_WAIT_S) });
+          if (latestRef.current) params.set('latest', latestRef.current);
+          const response = await fetch(`${BOOKINGS_URL}?${params}`, { signal: controller.signal });
+          const data = await response.json();
+          if (!response.ok) {
+            await sleep(SYNC_RETRY_MS);
+            continue;
+          }
+          if (watermarkRef.current !== since) continue;
+          applyChanges(data.bookings || [], data.status_counts);
+          watermarkRef.current = data.watermark;
+          latestRef.current = data.latest;
+        } catch (error) {
+          if (controller.signal.aborted) return;
+          console.error('Error syncing bookings:', error);
+          await sleep(SYNC_RETRY_MS);
+        }
+      }
+    };
+
+    poll();
+    return () => controller.abort();
+  }, [filterStatus]);
+
+  const loadMoreBookings = async () => {
+    if (!nextCursor) return;
+    setLoadingMore(true);
+    try {
+      const response = await fetch(bookingsUrl(nextCursor));
+      const data = await response.json();
+      setBookings(prev => {
+        const loaded = new Set(prev.map(booking => booking.id));
+        return [...prev, ...(data.bookings || []).filter((booking: Booking) => !loaded.has(booking.id))];
+      });
+      setNextCursor(data.next_cursor || null);
+    } catch (error) {
+      console.error('Error fetching bookings:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     fetchBookings();
+    setSelectedIds([]);
   }, [filterStatus]);
 
+  const toggleSelected = (bookingId: number) => {
+    setSelectedIds(prev =>
+      prev.includes(bookingId) ? prev.filter(id => id !== bookingId) : [...prev, bookingId]
+    );
+  };
+
+  const handleBulkStatusChange = async () => {
+    if (selectedIds.length === 0) return;
+    setBulkUpdating(true);
+    try {
+      const response = await fetch(UPDATE_STATUS_URL, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+          booking_ids: selectedIds,
+          status: bulkStatus,
+        }),
+      });
+
+      const data = await response.json();
+
+      if (response.ok && data.success) {
+        const updated = new Map<number, { previous_status: string; updated_at: string }>();
+        (data.results || []).forEach((result: { booking_id: number; success: boolean; previous_status: string; updated_at: string }) => {
+          if (result.success) updated.set(result.booking_id, result);
+        });
+        setStatusCounts(prev => {
+          const next = { ...prev };
+          updated.forEach(({ previous_status }) => {
+            if (previous_status === bulkStatus) return;
+            next[previous_status] = Math.max((next[previous_status] || 0) - 1, 0);
+            next[bulkStatus] = (next[bulkStatus] || 0) + 1;
+          });
+          return next;
+        });
+        setBookings(prev =>
+          prev.map(booking => {
+            const result = updated.get(booking.id);
+            return result ? { ...booking, status: bulkStatus, updated_at: result.updated_at } : booking;
+          })
+        );
+        setSelectedIds([]);
+        if (data.not_found) {
+          alert(data.message);
+        }
+      } else {
+        alert(data.error || 'Ошибка при обновлении статуса');
+      }
+    } catch (error) {
+      console.error('Error updating status:', error);
+      alert('Ошибка при обновлении статуса');
+    } finally {
+      setBulkUpdating(false);
+    }
+  };
+
   const handleStatusChange = async (bookingId: number, newStatus: string) => {
     setUpdatingId(bookingId);
     try {
-      const response = await fetch('https://functions.poehali.dev/04351be8-3746-49dd-9c00-c57ea8ad97f3', {
+      const response = await fetch(UPDATE_STATUS_URL, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -102,6 +263,14 @@ const AdminPage = () => {
       const data = await response.json();
 
       if (response.ok && data.success) {
+        const previousStatus = bookings.find(booking => booking.id === bookingId)?.status;
+        if (previousStatus && previousStatus !== newStatus) {
+          setStatusCounts(prev => ({
+            ...prev,
+            [previousStatus]: Math.max((prev[previousStatus] || 0) - 1, 0),
+            [newStatus]: (prev[newStatus] || 0) + 1,
+          }));
+        }
         // Update local state
         setBookings(prev =>
           prev.map(booking =>
@@ -139,8 +308,8 @@ const AdminPage = () => {
   };
 
   const getStatusCount = (status: string) => {
-    if (status === 'all') return bookings.length;
-    return bookings.filter(b => b.status === status).length;
+    if (status === 'all') return Object.values(statusCounts).reduce((sum, count) => sum + count, 0);
+    return statusCounts[status] || 0;
   };
 
   if (loading) {
@@ -228,6 +397,33 @@ const AdminPage = () => {
           </Card>
         </div>
 
+        {/* Bulk status change */}
+        {selectedIds.length > 0 && (
+          <Card className="mb-4">
+            <CardContent className="p-4 flex flex-wrap items-center gap-4">
+              <span className="font-medium">Выбрано заявок: {selectedIds.length}</span>
+              <Select value={bulkStatus} onValueChange={setBulkStatus}>
+                <SelectTrigger className="w-[160px]">
+                  <SelectValue />
+                </SelectTrigger>
+                <SelectContent>
+                  <SelectItem value="new">Новая</SelectItem>
+                  <SelectItem value="confirmed">Подтверждена</SelectItem>
+                  <SelectItem value="completed">Завершена</SelectItem>
+                  <SelectItem value="cancelled">Отменена</SelectItem>
+                </SelectContent>
+              </Select>
+              <Button onClick={handleBulkStatusChange} disabled={bulkUpdating}>
+                {bulkUpdating && <Icon name="Loader" className="mr-2 animate-spin" size={18} />}
+                Применить
+              </Button>
+              <Button variant="ghost" onClick={() => setSelectedIds([])}>
+                Снять выбор
+              </Button>
+            </CardContent>
+          </Card>
+        )}
+
         {/* Bookings List */}
         <div className="space-y-4">
           {bookings.length === 0 ? (
@@ -244,6 +440,10 @@ const AdminPage = () => {
                   <div className="flex items-start justify-between gap-4">
                     <div className="flex-1">
                       <div className="flex items-center gap-3 mb-2">
+                        <Checkbox
+                          checked={selectedIds.includes(booking.id)}
+                          onCheckedChange={() => toggleSelected(booking.id)}
+                        />
                         <CardTitle className="text-xl">
                           {booking.customer_name}
                         </CardTitle>
@@ -348,6 +548,18 @@ const AdminPage = () => {
               </Card>
             ))
           )}
+          {nextCursor && (
+            <div className="flex justify-center">
+              <Button variant="outline" onClick={loadMoreBookings} disabled={loadingMore}>
+                {loadingMore ? (
+                  <Icon name="Loader" className="mr-2 animate-spin" size={18} />
+                ) : (
+                  <Icon name="ChevronDown" className="mr-2" size={18} />
+                )}
+                Показать ещё
+              </Button>
+            </div>
+          )}
         </div>
       </div>
     </div>
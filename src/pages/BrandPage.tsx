@@ -190,7 +190,7 @@ export default function BrandPage() {
       <Footer />
       
       <Dialog open={isBookingOpen} onOpenChange={setIsBookingOpen}>
-        <BookingDialog setIsBookingOpen={setIsBookingOpen} />
+        <BookingDialog setIsBookingOpen={setIsBookingOpen} brandName={brand.name} brandSlug={brand.slug} />
       </Dialog>
     </div>
   );